@@ -101,6 +101,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Middleware to keep the reads of a user in the primary after a write
+    'feedback_tracking.base.middlewares.ReplicaRoutingMiddleware',
     # 'tenant_users.tenants.middleware.TenantAccessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -177,30 +179,125 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.UserModel'
 
 # Email
-EMAIL_HOST = 'smtp.sendgrid.net'
-EMAIL_HOST_USER = 'apikey'
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.sendgrid.net')
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='apikey')
 EMAIL_HOST_PASSWORD = config('SENDGRID_API_KEY')
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
 
+# Email outbox
+EMAIL_OUTBOX_BATCH_SIZE = config(
+    'EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config(
+    'EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+# Seconds before the first retry of a failed email, doubled on every attempt
+EMAIL_OUTBOX_RETRY_BACKOFF = config(
+    'EMAIL_OUTBOX_RETRY_BACKOFF', default=60, cast=int)
+# Seconds after which an email being sent is considered lost
+EMAIL_OUTBOX_STALE_SECONDS = config(
+    'EMAIL_OUTBOX_STALE_SECONDS', default=600, cast=int)
+
 # Frontend URL
 FRONTEND_URL = config('FRONTEND_URL')
 
+# Sign up provisioning
+REGISTRATION_MAX_ATTEMPTS = config(
+    'REGISTRATION_MAX_ATTEMPTS', default=5, cast=int)
+# Seconds before the first retry of a failed sign up, doubled on every attempt
+REGISTRATION_RETRY_BACKOFF = config(
+    'REGISTRATION_RETRY_BACKOFF', default=10, cast=int)
+# Seconds after which a pending sign up is queued again
+REGISTRATION_STALE_SECONDS = config(
+    'REGISTRATION_STALE_SECONDS', default=600, cast=int)
+
+# Bulk user import
+USER_IMPORT_MAX_ROWS = config('USER_IMPORT_MAX_ROWS', default=1000, cast=int)
+# Processes that hash the passwords of an import, 1 hashes in the request
+USER_IMPORT_HASH_WORKERS = config(
+    'USER_IMPORT_HASH_WORKERS', default=4, cast=int)
+
+# User permissions
+# Seconds the granted locations and groups of a user are cached, only with
+# a shared cache (CACHE_URL)
+PERMISSIONS_CACHE_SECONDS = config(
+    'PERMISSIONS_CACHE_SECONDS', default=300, cast=int)
+
+# Kiosk locations
+# Seconds the machine number of a location is cached for the kiosk requests,
+# only with a shared cache (CACHE_URL)
+KIOSK_AUTH_CACHE_SECONDS = config(
+    'KIOSK_AUTH_CACHE_SECONDS', default=300, cast=int)
+# Locations updated by batch when their credentials are rotated
+LOCATION_ROTATION_BATCH_SIZE = config(
+    'LOCATION_ROTATION_BATCH_SIZE', default=500, cast=int)
+# Rows removed by statement when a deleted location or group is purged
+LOCATION_PURGE_CHUNK_SIZE = config(
+    'LOCATION_PURGE_CHUNK_SIZE', default=5000, cast=int)
+
+# Invoices
+# Seconds the first page of invoices of an organization is cached
+INVOICES_CACHE_SECONDS = config(
+    'INVOICES_CACHE_SECONDS', default=300, cast=int)
+
 # Stripe
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
 STRIPE_SIGNING_SECRET = config('STRIPE_SIGNING_SECRET')
+# Stripe HTTP client
+# Url of the Stripe API, e.g. the fake server of the fake_stripe_server command
+STRIPE_API_BASE = config('STRIPE_API_BASE', default=None)
+STRIPE_CONNECT_TIMEOUT = config(
+    'STRIPE_CONNECT_TIMEOUT', default=5, cast=float)
+STRIPE_READ_TIMEOUT = config('STRIPE_READ_TIMEOUT', default=30, cast=float)
+# Retries of failed calls, POST calls are retried with an idempotency key
+STRIPE_MAX_NETWORK_RETRIES = config(
+    'STRIPE_MAX_NETWORK_RETRIES', default=2, cast=int)
+STRIPE_CIRCUIT_FAILURE_THRESHOLD = config(
+    'STRIPE_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)
+STRIPE_CIRCUIT_RESET_SECONDS = config(
+    'STRIPE_CIRCUIT_RESET_SECONDS', default=30, cast=int)
+# Stripe webhook inbox
+STRIPE_EVENT_MAX_ATTEMPTS = config(
+    'STRIPE_EVENT_MAX_ATTEMPTS', default=8, cast=int)
+# Seconds before the first retry of a failed event, doubled on every attempt
+STRIPE_EVENT_RETRY_BACKOFF = config(
+    'STRIPE_EVENT_RETRY_BACKOFF', default=30, cast=int)
+STRIPE_EVENT_LOCK_RETRY_SECONDS = config(
+    'STRIPE_EVENT_LOCK_RETRY_SECONDS', default=2, cast=int)
+# Seconds a delivered event id is remembered in the cache
+STRIPE_EVENT_DEDUPE_SECONDS = config(
+    'STRIPE_EVENT_DEDUPE_SECONDS', default=3600, cast=int)
+# Stripe id -> local id mappings kept in memory by each worker
+STRIPE_RESOLVER_CACHE_SIZE = config(
+    'STRIPE_RESOLVER_CACHE_SIZE', default=10000, cast=int)
+# Seconds after which an unprocessed event is queued again
+STRIPE_EVENT_STALE_SECONDS = config(
+    'STRIPE_EVENT_STALE_SECONDS', default=300, cast=int)
+# Days of invoices compared with Stripe by the reconciliation
+STRIPE_RECONCILIATION_INVOICE_DAYS = config(
+    'STRIPE_RECONCILIATION_INVOICE_DAYS', default=35, cast=int)
+# Seconds between the checks of the price catalog version, the version is
+# shared through the cache so it needs redis with several processes
+PRICE_CATALOG_CHECK_SECONDS = config(
+    'PRICE_CATALOG_CHECK_SECONDS', default=30, cast=int)
 
 # Django tenants
 TENANT_MODEL = 'organizations.OrganizationModel'
 TENANT_DOMAIN_MODEL = 'organizations.DomainModel'
 TENANT_USERS_ACCESS_ERROR_MESSAGE = 'Custom access denied message.'
 TENANT_USERS_DOMAIN = 'localhost'
+# Skip the SET search_path of every cursor, safe only with the pool aware backend
+TENANT_LIMIT_SET_CALLS = bool(DATABASES['default']['OPTIONS'].get('pool'))
 
 # Django Database routers
 DATABASE_ROUTERS = (
+    'feedback_tracking.base.routers.TenantReplicaRouter',
+    # Required by django-tenants checks, TenantReplicaRouter already extends it
     'django_tenants.routers.TenantSyncRouter',
 )
+# Seconds the reads of a user stay in the primary after a write
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
 
 AUTHENTICATION_BACKENDS = ('tenant_users.permissions.backend.UserBackend',)
 
@@ -249,5 +346,41 @@ SIMPLE_JWT = {
 }
 
 
+# Cache, shared between processes when CACHE_URL points to redis
+CACHE_URL = config('CACHE_URL', default='')
+
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Celery
 CELERY_BROKER_URL = config('CELERY_BROKER_URL')
+# Result backend, required by chords
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='django-db')
+
+# Tenant fan-out of celery tasks
+TENANT_FAN_OUT_CHUNK_SIZE = config(
+    'TENANT_FAN_OUT_CHUNK_SIZE', default=25, cast=int)
+TENANT_FAN_OUT_MAX_CONCURRENCY = config(
+    'TENANT_FAN_OUT_MAX_CONCURRENCY', default=4, cast=int)
+
+# Feedback partitions
+FEEDBACK_PARTITIONS_AHEAD = config(
+    'FEEDBACK_PARTITIONS_AHEAD', default=3, cast=int)
+# Months of feedbacks kept by tenant, 0 keeps everything
+FEEDBACK_RETENTION_MONTHS = config(
+    'FEEDBACK_RETENTION_MONTHS', default=0, cast=int)
+# Detach the expired partitions instead of dropping them
+FEEDBACK_RETENTION_DETACH = config(
+    'FEEDBACK_RETENTION_DETACH', default=False, cast=bool)
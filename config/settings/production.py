@@ -1,6 +1,8 @@
 from .base import BASE_DIR, config
 from corsheaders.defaults import default_headers
 
+from feedback_tracking.base.db import get_pool_options
+
 
 DEBUG = False
 ALLOWED_HOSTS = ['127.0.0.1', 'localhost',
@@ -15,15 +17,31 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
 # Database
 DATABASES = {
     'default': {
-        'ENGINE': 'django_tenants.postgresql_backend',
+        'ENGINE': 'feedback_tracking.base.postgresql_backend',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        # Pooled connections, enabled with DB_POOL=True
+        'OPTIONS': get_pool_options(config),
     }
 }
 
+# Read replica, used by the read only views decorated with use_replica.
+# Locally it can point to a second Postgres instance or to the same one.
+if config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST'),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'OPTIONS': get_pool_options(config),
+        'TEST': {'MIRROR': 'default'},
+    }
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -46,6 +46,10 @@ urlpatterns = [
          include('feedback_tracking.api.webhooks.urls')),
     path(f'accounts/{api_version}/',
          include('feedback_tracking.api.accounts.urls')),
+    path(f'integrations/{api_version}/',
+         include('feedback_tracking.api.integrations.urls')),
+    path(f'metrics/{api_version}/',
+         include('feedback_tracking.base.urls')),
 
     path(f'<slug:portal>/{api_version}/',
          include('feedback_tracking.api.urls')),
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import OrganizationModel, PriceModel, PriceLimitModel, SubscriptionModel, PaymentMethodModel, InvoiceModel
+from .models import OrganizationModel, PriceModel, PriceLimitModel, SubscriptionModel, PaymentMethodModel, InvoiceModel, StripeEventModel, RegistrationJobModel, EmailOutboxModel
 
 
 admin.site.register(OrganizationModel)
@@ -9,3 +9,6 @@ admin.site.register(PriceModel)
 admin.site.register(PriceLimitModel)
 admin.site.register(InvoiceModel)
 admin.site.register(PaymentMethodModel)
+admin.site.register(StripeEventModel)
+admin.site.register(RegistrationJobModel)
+admin.site.register(EmailOutboxModel)
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
 
 
 class OrganizationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'feedback_tracking.administrative_system.organizations'
+
+    def ready(self):
+
+        from .models import PriceModel, PriceLimitModel
+        from .price_catalog import invalidate_price_catalog
+
+        # Changes from the admin publish a new price catalog
+        for model in (PriceModel, PriceLimitModel):
+            post_save.connect(invalidate_price_catalog, sender=model,
+                              dispatch_uid=f'price_catalog_{model.__name__}_saved')
+            post_delete.connect(invalidate_price_catalog, sender=model,
+                                dispatch_uid=f'price_catalog_{model.__name__}_deleted')
@@ -0,0 +1,47 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.utils import timezone
+
+from feedback_tracking.administrative_system.organizations.models import StripeEventModel
+
+
+class Command(BaseCommand):
+
+    help = 'Show the outcome and the processing duration of the Stripe webhook events by event type.'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--hours', type=int, default=24,
+                            help='Only count the events received in the last hours.')
+
+    def handle(self, *args, **options):
+
+        since = timezone.now() - datetime.timedelta(hours=options['hours'])
+        statuses = StripeEventModel.StripeEventStatus
+
+        stats = StripeEventModel.objects.filter(created_at__gte=since).values('event_type').annotate(
+            total=Count('id'),
+            processed=Count('id', filter=Q(status=statuses.PROCESSED)),
+            failed=Count('id', filter=Q(status=statuses.FAILED)),
+            dead=Count('id', filter=Q(status=statuses.DEAD)),
+            pending=Count('id', filter=Q(
+                status__in=[statuses.RECEIVED, statuses.PROCESSING])),
+            redeliveries=Sum('delivery_count') - Count('id'),
+            avg_ms=Avg('duration_ms'),
+            max_ms=Max('duration_ms'),
+        ).order_by('-total')
+
+        self.stdout.write(
+            f'{"event type":<40}{"total":>7}{"ok":>7}{"failed":>8}{"dead":>6}'
+            f'{"pending":>9}{"redeliv.":>10}{"avg ms":>9}{"max ms":>9}')
+
+        for row in stats:
+            self.stdout.write(
+                f'{row["event_type"]:<40}{row["total"]:>7}{row["processed"]:>7}{row["failed"]:>8}'
+                f'{row["dead"]:>6}{row["pending"]:>9}{row["redeliveries"]:>10}'
+                f'{round(row["avg_ms"] or 0):>9}{row["max_ms"] or 0:>9}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stripe events of the last {options["hours"]} hours.'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:26
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('organizations', '0005_invoicemodel_subtotal_invoicemodel_total_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='subscriptionmodel',
+            index=models.Index(fields=['organization', 'status', 'created_at'], name='subscription_org_status_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0006_subscriptionmodel_subscription_org_status_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeEventModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('stripe_event_id', models.CharField(help_text='Unique identifier for the Stripe event', max_length=100, unique=True)),
+                ('event_type', models.CharField(max_length=100)),
+                ('stripe_customer_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('stripe_created', models.BigIntegerField()),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('RECEIVED', 'Recibido'), ('PROCESSING', 'Procesando'), ('PROCESSED', 'Procesado'), ('FAILED', 'Fallido'), ('DEAD', 'Descartado')], default='RECEIVED', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['stripe_customer_id', 'status', 'stripe_created'], name='stripe_event_customer_idx')],
+            },
+        ),
+    ]
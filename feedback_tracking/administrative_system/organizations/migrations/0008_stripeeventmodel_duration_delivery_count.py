@@ -0,0 +1,23 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0007_stripeeventmodel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stripeeventmodel',
+            name='delivery_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='stripeeventmodel',
+            name='duration_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
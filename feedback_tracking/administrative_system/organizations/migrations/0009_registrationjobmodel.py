@@ -0,0 +1,37 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:36
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0008_stripeeventmodel_duration_delivery_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationJobModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('user_data', models.JSONField()),
+                ('organization_data', models.JSONField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('PROVISIONING', 'Aprovisionando'), ('CHECKOUT_READY', 'Pago listo'), ('FAILED', 'Fallido')], default='PENDING', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('checkout_session_id', models.CharField(blank=True, max_length=200, null=True)),
+                ('checkout_url', models.URLField(blank=True, max_length=1000, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('organization', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='organization_registration_job', to='organizations.organizationmodel')),
+                ('price', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_registration_jobs', to='organizations.pricemodel')),
+                ('subscription', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subscription_registration_job', to='organizations.subscriptionmodel')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0009_registrationjobmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutboxModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('template', models.CharField(choices=[('organization_created', 'Organización creada'), ('subscription_updated', 'Suscripción actualizada'), ('subscription_canceled', 'Suscripción cancelada')], max_length=50)),
+                ('subject', models.CharField(max_length=255)),
+                ('to', models.EmailField(max_length=255)),
+                ('context', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('SENDING', 'Enviando'), ('SENT', 'Enviado'), ('FAILED', 'Fallido'), ('DEAD', 'Descartado')], default='PENDING', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx')],
+            },
+        ),
+    ]
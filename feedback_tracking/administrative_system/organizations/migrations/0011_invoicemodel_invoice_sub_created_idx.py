@@ -0,0 +1,20 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:47
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('organizations', '0010_emailoutboxmodel'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='invoicemodel',
+            index=models.Index(fields=['subscription', '-created_at'], name='invoice_sub_created_idx'),
+        ),
+    ]
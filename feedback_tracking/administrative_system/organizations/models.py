@@ -4,6 +4,7 @@ import datetime
 from django.db import models
 from django_tenants.models import TenantMixin, DomainMixin
 from tenant_users.tenants.models import TenantBase
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
@@ -44,7 +45,7 @@ class OrganizationModel(TenantBase, BaseModel):
         if self.stripe_customer_id:
             try:
                 # Attempt to delete the customer from Stripe
-                StripeSingleton().customer().delete(self.stripe_customer_id)
+                StripeSingleton().Customer.delete(self.stripe_customer_id)
             except Exception as e:
                 print('Error deleting Stripe customer')
 
@@ -208,6 +209,12 @@ class SubscriptionModel(BaseModel):
         max_length=20, choices=SubscriptionStatus.choices, default=SubscriptionStatus.INCOMPLETE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(name='subscription_org_status_idx',
+                         fields=['organization', 'status', 'created_at']),
+        ]
+
     def __repr__(self):
         return (f'SubscriptionModel('
                 f'id={self.id}, '
@@ -250,6 +257,12 @@ class InvoiceModel(BaseModel):
     subscription = models.ForeignKey(
         SubscriptionModel, on_delete=models.DO_NOTHING, related_name='invoice_subscription', blank=False, null=False)
 
+    class Meta:
+        indexes = [
+            models.Index(name='invoice_sub_created_idx',
+                         fields=['subscription', '-created_at']),
+        ]
+
     def __repr__(self):
         return (f'PaymentModel('
                 f'id={self.id}, '
@@ -266,3 +279,183 @@ class InvoiceModel(BaseModel):
                 f'collection_method={self.collection_method}, '
                 f'status={self.status}, '
                 f'subscription={self.subscription})')
+
+
+class StripeEventModel(BaseModel):
+    """
+    Inbox of the verified Stripe webhook events, the webhook stores the event
+    and acknowledges it, then a celery worker processes it.
+
+    Attributes:
+        stripe_event_id (str): id of the event in Stripe
+        event_type (str): type of the event, e.g. invoice.payment_succeeded
+        stripe_customer_id (str): customer of the event, events of a customer are processed in order
+        stripe_created (int): creation timestamp of the event in Stripe
+        payload (dict): verified raw event
+        status (str): processing status
+        attempts (int): number of processing attempts
+        next_attempt_at (datetime): when a failed event can be processed again
+        last_error (str): error of the last failed attempt
+        processed_at (datetime): when the event was processed
+        duration_ms (int): duration of the last processing attempt
+        delivery_count (int): number of times Stripe delivered the event
+    """
+
+    class StripeEventStatus(models.TextChoices):
+
+        RECEIVED = "RECEIVED", "Recibido"
+        PROCESSING = "PROCESSING", "Procesando"
+        PROCESSED = "PROCESSED", "Procesado"
+        FAILED = "FAILED", "Fallido"
+        DEAD = "DEAD", "Descartado"
+
+    stripe_event_id = models.CharField(
+        max_length=100, unique=True, help_text="Unique identifier for the Stripe event")
+    event_type = models.CharField(max_length=100)
+    stripe_customer_id = models.CharField(
+        max_length=100, blank=True, null=True)
+    stripe_created = models.BigIntegerField()
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=20, choices=StripeEventStatus.choices, default=StripeEventStatus.RECEIVED)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    duration_ms = models.PositiveIntegerField(blank=True, null=True)
+    delivery_count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(name='stripe_event_customer_idx',
+                         fields=['stripe_customer_id', 'status', 'stripe_created']),
+        ]
+
+    def __repr__(self):
+        return (f'StripeEventModel('
+                f'id={self.id}, '
+                f'stripe_event_id={self.stripe_event_id}, '
+                f'event_type={self.event_type}, '
+                f'stripe_customer_id={self.stripe_customer_id}, '
+                f'status={self.status}, '
+                f'attempts={self.attempts})')
+
+    def __str__(self):
+        return f'{self.stripe_event_id}'
+
+
+class RegistrationJobModel(BaseModel):
+    """
+    Sign up waiting to be provisioned, the register view validates the data and
+    stores the job, then a celery worker creates the user, the organization and
+    the Stripe checkout session.
+
+    Attributes:
+        job_id (uuid): public id used to poll the status of the sign up
+        user_data (dict): validated user data, the password is already hashed
+            and it is cleared once the user is created or the job fails
+        organization_data (dict): validated organization data
+        price (PriceModel): price chosen in the sign up
+        organization (OrganizationModel): organization created by the job
+        subscription (SubscriptionModel): subscription created by the job
+        status (str): provisioning status
+        attempts (int): number of provisioning attempts
+        checkout_session_id (str): id of the Stripe checkout session
+        checkout_url (str): url of the Stripe checkout session
+        last_error (str): error of the last failed attempt
+    """
+
+    class RegistrationJobStatus(models.TextChoices):
+
+        PENDING = "PENDING", "Pendiente"
+        PROVISIONING = "PROVISIONING", "Aprovisionando"
+        CHECKOUT_READY = "CHECKOUT_READY", "Pago listo"
+        FAILED = "FAILED", "Fallido"
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user_data = models.JSONField()
+    organization_data = models.JSONField()
+    price = models.ForeignKey(
+        PriceModel, on_delete=models.CASCADE, related_name='price_registration_jobs')
+    organization = models.OneToOneField(
+        OrganizationModel, on_delete=models.SET_NULL, blank=True, null=True, related_name='organization_registration_job')
+    subscription = models.OneToOneField(
+        SubscriptionModel, on_delete=models.SET_NULL, blank=True, null=True, related_name='subscription_registration_job')
+    status = models.CharField(
+        max_length=20, choices=RegistrationJobStatus.choices, default=RegistrationJobStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    checkout_session_id = models.CharField(
+        max_length=200, blank=True, null=True)
+    checkout_url = models.URLField(max_length=1000, blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    def __repr__(self):
+        return (f'RegistrationJobModel('
+                f'id={self.id}, '
+                f'job_id={self.job_id}, '
+                f'status={self.status}, '
+                f'attempts={self.attempts}, '
+                f'organization={self.organization_id})')
+
+    def __str__(self):
+        return f'{self.job_id}'
+
+
+class EmailOutboxModel(BaseModel):
+    """
+    Transactional email waiting to be sent, the email is stored with the change
+    that triggers it and a celery worker sends the pending emails in batches.
+
+    Attributes:
+        template (str): template of the email, see feedback_tracking/base/templates/emails
+        subject (str): subject of the email
+        to (str): recipient of the email
+        context (dict): values to render the template
+        status (str): delivery status
+        attempts (int): number of delivery attempts
+        next_attempt_at (datetime): when the email can be sent
+        last_error (str): error of the last failed attempt
+        sent_at (datetime): when the email was sent
+    """
+
+    class EmailTemplate(models.TextChoices):
+
+        ORGANIZATION_CREATED = "organization_created", "Organización creada"
+        SUBSCRIPTION_UPDATED = "subscription_updated", "Suscripción actualizada"
+        SUBSCRIPTION_CANCELED = "subscription_canceled", "Suscripción cancelada"
+
+    class EmailStatus(models.TextChoices):
+
+        PENDING = "PENDING", "Pendiente"
+        SENDING = "SENDING", "Enviando"
+        SENT = "SENT", "Enviado"
+        FAILED = "FAILED", "Fallido"
+        DEAD = "DEAD", "Descartado"
+
+    template = models.CharField(max_length=50, choices=EmailTemplate.choices)
+    subject = models.CharField(max_length=255)
+    to = models.EmailField(max_length=255)
+    context = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20, choices=EmailStatus.choices, default=EmailStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(name='email_outbox_due_idx',
+                         fields=['status', 'next_attempt_at']),
+        ]
+
+    def __repr__(self):
+        return (f'EmailOutboxModel('
+                f'id={self.id}, '
+                f'template={self.template}, '
+                f'to={self.to}, '
+                f'status={self.status}, '
+                f'attempts={self.attempts})')
+
+    def __str__(self):
+        return f'{self.template} -> {self.to}'
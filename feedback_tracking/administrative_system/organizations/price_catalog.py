@@ -0,0 +1,277 @@
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from decimal import Decimal
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import PriceModel, PriceLimitModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+PRICE_CATALOG_VERSION_KEY = 'price_catalog:version'
+
+# Stripe recurring interval -> PriceModel.IntervalTypeEnum
+STRIPE_INTERVALS = {
+    'month': PriceModel.IntervalTypeEnum.MONTHLY,
+    'year': PriceModel.IntervalTypeEnum.ANNUAL,
+}
+
+
+def make_etag(data):
+    """
+    :param data: json data of a response
+    :return: strong ETag of the data
+    """
+
+    return '"{}"'.format(hashlib.sha1(
+        json.dumps(data, sort_keys=True).encode()).hexdigest())
+
+
+def etag_matches(request, etag: str):
+    """
+    :param request: request with the If-None-Match header
+    :param etag: current ETag of the response
+    :return: True when the client already has the response (304)
+    """
+
+    if_none_match = request.headers.get('If-None-Match', '')
+
+    return if_none_match.strip() == '*' or etag in (
+        value.strip().removeprefix('W/') for value in if_none_match.split(','))
+
+
+class CatalogPrice(NamedTuple):
+    """
+    Price of the catalog with its limits, it is immutable so it can be shared
+    by every request of the process.
+    """
+
+    stripe_price_id: str
+    name: str
+    description: str
+    amount: Decimal
+    plan_type: str
+    interval: Optional[str]
+    max_locations: int
+    max_users: int
+    max_feedbacks: int
+
+    def to_representation(self):
+
+        return {
+            'stripe_price_id': self.stripe_price_id,
+            'name': self.name,
+            'description': self.description,
+            'amount': str(self.amount),
+            'plan_type': self.plan_type,
+            'interval': self.interval,
+            'max_locations': self.max_locations,
+            'max_users': self.max_users,
+            'max_feedbacks': self.max_feedbacks,
+        }
+
+
+class PriceCatalog():
+    """
+    Snapshot of the prices of a catalog version.
+    """
+
+    def __init__(self, version: str, prices: list):
+
+        self.version = version
+        self.prices = MappingProxyType(
+            {price.stripe_price_id: price for price in prices})
+        self.data = tuple(price.to_representation() for price in prices)
+        self.etag = make_etag(self.data)
+
+    def get(self, stripe_price_id: str):
+        """
+        :param stripe_price_id: id of the price
+        :return: CatalogPrice or None
+        """
+
+        return self.prices.get(stripe_price_id)
+
+    def __iter__(self):
+        return iter(self.prices.values())
+
+
+_catalog = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def load_price_catalog(version: str):
+    """
+    Build the catalog from the database.
+
+    :param version: version of the catalog
+    :return: PriceCatalog
+    """
+
+    prices = []
+
+    for price in PriceModel.objects.select_related('price_limit').order_by('plan_type', 'interval', 'amount'):
+
+        price_limit = getattr(price, 'price_limit', None)
+
+        prices.append(CatalogPrice(
+            stripe_price_id=price.stripe_price_id,
+            name=price.name,
+            description=price.description,
+            amount=price.amount,
+            plan_type=price.plan_type,
+            interval=price.interval,
+            max_locations=price_limit.max_locations if price_limit else 0,
+            max_users=price_limit.max_users if price_limit else 0,
+            max_feedbacks=price_limit.max_feedbacks if price_limit else 0,
+        ))
+
+    return PriceCatalog(version, prices)
+
+
+def get_price_catalog():
+    """
+    Get the price catalog of the process.
+
+    The version in the cache is read at most every PRICE_CATALOG_CHECK_SECONDS
+    and the catalog is only loaded from the database when the version changed,
+    so price lookups do not query the database.
+
+    :return: PriceCatalog
+    """
+
+    global _catalog, _checked_at
+
+    if _catalog is not None and time.monotonic() - _checked_at < settings.PRICE_CATALOG_CHECK_SECONDS:
+        return _catalog
+
+    with _lock:
+
+        version = cache.get(PRICE_CATALOG_VERSION_KEY)
+
+        if version is None:
+            version = uuid.uuid4().hex
+            # Other process may have set it meanwhile
+            if not cache.add(PRICE_CATALOG_VERSION_KEY, version, None):
+                version = cache.get(PRICE_CATALOG_VERSION_KEY, version)
+
+        if _catalog is None or _catalog.version != version:
+            _catalog = load_price_catalog(version)
+            logger.info('Price catalog %s loaded with %s prices',
+                        version, len(_catalog.prices))
+
+        _checked_at = time.monotonic()
+
+    return _catalog
+
+
+def get_price(stripe_price_id: str):
+    """
+    Get a price of the catalog like PriceModel.objects.get.
+
+    :param stripe_price_id: id of the price
+    :return: CatalogPrice
+    """
+
+    price = get_price_catalog().get(stripe_price_id)
+
+    if price is None:
+        raise PriceModel.DoesNotExist(f'Price {stripe_price_id} not found')
+
+    return price
+
+
+def invalidate_price_catalog(*args, **kwargs):
+    """
+    Publish a new version of the catalog, every process reloads it on its next
+    check. It is connected to the changes of PriceModel and PriceLimitModel.
+    """
+
+    def publish():
+        global _checked_at
+        cache.set(PRICE_CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+        _checked_at = 0.0
+
+    transaction.on_commit(publish)
+
+
+def sync_price_catalog(stripe_connection):
+    """
+    Copy the active recurring prices of Stripe to PriceModel and PriceLimitModel.
+
+    The plan type and the limits are read from the metadata of the product,
+    the metadata of the price overrides them: plan_type, max_locations,
+    max_users and max_feedbacks. Prices without plan_type are skipped.
+
+    :param stripe_connection: The Stripe connection object.
+    :return: number of prices synchronized
+    """
+
+    products = {
+        product.id: product
+        for product in stripe_connection.Product.list(active=True, limit=100).auto_paging_iter()
+    }
+
+    prices = []
+    price_limits = []
+
+    for stripe_price in stripe_connection.Price.list(active=True, type='recurring', limit=100).auto_paging_iter():
+
+        product_id = stripe_price.get('product')
+        product = products.get(product_id if isinstance(product_id, str) else product_id.get('id'))
+
+        if product is None:
+            continue
+
+        metadata = {**(product.get('metadata') or {}), **(stripe_price.get('metadata') or {})}
+        plan_type = (metadata.get('plan_type') or '').upper()
+
+        if plan_type not in PriceModel.PriceTypeEnum.values:
+            logger.warning('Stripe price %s has no valid plan_type, skipped',
+                           stripe_price.id)
+            continue
+
+        prices.append(PriceModel(
+            stripe_price_id=stripe_price.id,
+            name=product.get('name'),
+            description=product.get('description') or '',
+            amount=Decimal(stripe_price.get('unit_amount') or 0) / 100,
+            plan_type=plan_type,
+            interval=STRIPE_INTERVALS.get(
+                (stripe_price.get('recurring') or {}).get('interval')),
+        ))
+        price_limits.append(PriceLimitModel(
+            price_id=stripe_price.id,
+            max_locations=int(metadata.get('max_locations') or 0),
+            max_users=int(metadata.get('max_users') or 0),
+            max_feedbacks=int(metadata.get('max_feedbacks') or 0),
+        ))
+
+    with transaction.atomic():
+
+        PriceModel.objects.bulk_create(
+            prices, update_conflicts=True, unique_fields=['stripe_price_id'],
+            update_fields=['name', 'description', 'amount', 'plan_type', 'interval'])
+        PriceLimitModel.objects.bulk_create(
+            price_limits, update_conflicts=True, unique_fields=['price'],
+            update_fields=['max_locations', 'max_users', 'max_feedbacks'])
+
+        # bulk_create does not send post_save
+        invalidate_price_catalog()
+
+    return len(prices)
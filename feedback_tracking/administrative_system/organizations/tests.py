@@ -1,3 +1,19 @@
 from django.test import TestCase
 
-# Create your tests here.
+from feedback_tracking.base.test_cases import QueryPlanMixin
+from feedback_tracking.administrative_system.organizations.models import SubscriptionModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class SubscriptionQueryPlanTests(QueryPlanMixin, TestCase):
+
+    def test_subscriptions_by_organization_and_status(self):
+
+        self.assertUsesIndex(
+            SubscriptionModel.objects.filter(
+                organization_id=1, status=SubscriptionModel.SubscriptionStatus.ACTIVE).order_by('-created_at'),
+            'subscription_org_status_idx'
+        )
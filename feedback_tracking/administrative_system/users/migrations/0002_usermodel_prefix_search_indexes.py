@@ -0,0 +1,35 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:52
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='usermodel',
+            index=models.Index(models.F('organization'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('first_name'), name='text_pattern_ops'), name='user_org_first_name_prefix_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='usermodel',
+            index=models.Index(models.F('organization'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('last_name'), name='text_pattern_ops'), name='user_org_last_name_prefix_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='usermodel',
+            index=models.Index(models.F('organization'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='text_pattern_ops'), name='user_org_username_prefix_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='usermodel',
+            index=models.Index(models.F('organization'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='text_pattern_ops'), name='user_org_email_prefix_idx'),
+        ),
+    ]
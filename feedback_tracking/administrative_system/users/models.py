@@ -1,5 +1,8 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import OpClass
 
 from tenant_users.tenants.models import UserProfile, UserProfileManager
 
@@ -53,6 +56,15 @@ class UserModel(UserProfile, BaseModel):
         verbose_name_plural = 'Users'
         indexes = [
             models.Index(name='user_id_idx', fields=['id']),
+            # Prefix search of the user directory (istartswith)
+            models.Index(F('organization'), OpClass(Upper('first_name'), name='text_pattern_ops'),
+                         name='user_org_first_name_prefix_idx'),
+            models.Index(F('organization'), OpClass(Upper('last_name'), name='text_pattern_ops'),
+                         name='user_org_last_name_prefix_idx'),
+            models.Index(F('organization'), OpClass(Upper('username'), name='text_pattern_ops'),
+                         name='user_org_username_prefix_idx'),
+            models.Index(F('organization'), OpClass(Upper('email'), name='text_pattern_ops'),
+                         name='user_org_email_prefix_idx'),
         ]
 
     USERNAME_FIELD = 'username'
@@ -0,0 +1,230 @@
+import logging
+import datetime
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+from django_tenants.utils import schema_context
+
+from feedback_tracking.administrative_system.users.models import UserModel
+from feedback_tracking.administrative_system.organizations.models import OrganizationModel, SubscriptionModel, RegistrationJobModel
+from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel
+from feedback_tracking.singletons.stripe_singleton import StripeSingleton
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+def clear_password(job: RegistrationJobModel):
+    """
+    Remove the password hash from the user data of a job, it is only needed
+    to create the user. The job must be saved with user_data.
+
+    :param job: registration job
+    """
+
+    job.user_data = {**job.user_data, 'password': None}
+
+
+def create_organization(job: RegistrationJobModel):
+    """
+    Create the admin user, the organization with its schema and the incomplete
+    subscription of a sign up. Everything is created in a transaction together
+    with the link to the job, so a retried job never creates them twice.
+
+    :param job: registration job
+    """
+
+    with transaction.atomic():
+
+        # The password was hashed when the job was stored
+        user = UserModel(**job.user_data)
+        user.save()
+
+        organization = OrganizationModel.objects.create(
+            **job.organization_data, owner_id=user.id)
+        user.organization = organization
+        user.save()
+
+        with schema_context(organization.schema_name):
+            # Give user admin permissions
+            UserLevelPermissionModel.objects.create(
+                user=user,
+                level=UserLevelPermissionModel.UserLevelEnum.ADMIN,
+            )
+
+        subscription = SubscriptionModel.objects.create(
+            unit_amount=job.price.amount,
+            price=job.price,
+            organization=organization,
+            status=SubscriptionModel.SubscriptionStatus.INCOMPLETE
+        )
+
+        clear_password(job)
+        job.organization = organization
+        job.subscription = subscription
+        job.save(update_fields=['user_data', 'organization', 'subscription', 'updated_at'])
+
+
+def create_checkout_session(job: RegistrationJobModel):
+    """
+    Create the Stripe customer and the checkout session of a sign up. The
+    calls use idempotency keys of the job, a retry gets the same objects back
+    from Stripe instead of creating new ones.
+
+    :param job: registration job with its organization and subscription
+    """
+
+    stripe_connection = StripeSingleton()
+    organization = job.organization
+
+    if not organization.stripe_customer_id:
+
+        stripe_customer = stripe_connection.Customer.create(
+            email=organization.company_email,
+            name=organization.name,
+            metadata={
+                'organization_id': organization.id,
+            },
+            idempotency_key=f'registration-{job.job_id}-customer',
+        )
+
+        # Webhooks resolve the organization by this id without calling Stripe
+        OrganizationModel.objects.filter(id=organization.id).update(
+            stripe_customer_id=stripe_customer.get('id'))
+        organization.stripe_customer_id = stripe_customer.get('id')
+
+    stripe_checkout = stripe_connection.checkout.Session.create(
+        mode='subscription',
+        customer=organization.stripe_customer_id,
+        line_items=[{
+            'price': job.price.stripe_price_id,
+            'quantity': 1,
+        }],
+        payment_method_types=['card'],
+        metadata={
+            'subscription_id': job.subscription.id
+        },
+        subscription_data={
+            'metadata': {'subscription_id': job.subscription.id},
+        },
+        success_url=f'{settings.FRONTEND_URL}/register/success?session_id={{CHECKOUT_SESSION_ID}}',
+        cancel_url=f'{settings.FRONTEND_URL}/cancel',
+        idempotency_key=f'registration-{job.job_id}-checkout',
+    )
+
+    job.checkout_session_id = stripe_checkout.id
+    job.checkout_url = stripe_checkout.url
+
+
+@shared_task(bind=True, max_retries=None)
+def provision_registration(self, registration_job_id):
+    """
+    Task to provision a sign up: user, organization, schema, permissions,
+    subscription, Stripe customer and checkout session.
+
+    A failed job is retried with exponential backoff, after
+    REGISTRATION_MAX_ATTEMPTS attempts or when the user or the organization
+    already exist it is marked as failed.
+
+    :param registration_job_id: id of the RegistrationJobModel
+    :return: status of the job
+    """
+
+    # Claim the job, a job queued twice is only provisioned by one worker
+    claimed = RegistrationJobModel.objects.filter(
+        id=registration_job_id,
+        status=RegistrationJobModel.RegistrationJobStatus.PENDING,
+    ).update(
+        status=RegistrationJobModel.RegistrationJobStatus.PROVISIONING,
+        attempts=F('attempts') + 1,
+        updated_at=timezone.now(),
+    )
+
+    job = RegistrationJobModel.objects.select_related(
+        'price', 'organization', 'subscription').get(id=registration_job_id)
+
+    if not claimed:
+        return job.status
+
+    try:
+
+        if job.organization is None:
+            create_organization(job)
+
+        create_checkout_session(job)
+
+    except IntegrityError as e:
+
+        logger.warning('Registration job %s conflicts with existing data: %s',
+                       job.job_id, e)
+
+        job.status = RegistrationJobModel.RegistrationJobStatus.FAILED
+        job.last_error = 'User or organization already exists'
+        clear_password(job)
+        job.save(update_fields=['status', 'last_error', 'user_data', 'updated_at'])
+
+        return job.status
+
+    except Exception as e:
+
+        logger.exception('Registration job %s failed (attempt %s)',
+                         job.job_id, job.attempts)
+
+        job.last_error = str(e)
+
+        if job.attempts >= settings.REGISTRATION_MAX_ATTEMPTS:
+            job.status = RegistrationJobModel.RegistrationJobStatus.FAILED
+            clear_password(job)
+            job.save(update_fields=['status', 'last_error', 'user_data', 'updated_at'])
+            return job.status
+
+        # Back to pending until the retry claims it again
+        job.status = RegistrationJobModel.RegistrationJobStatus.PENDING
+        job.save(update_fields=['status', 'last_error', 'updated_at'])
+
+        raise self.retry(
+            countdown=settings.REGISTRATION_RETRY_BACKOFF * 2 ** (job.attempts - 1))
+
+    job.status = RegistrationJobModel.RegistrationJobStatus.CHECKOUT_READY
+    job.last_error = None
+    job.save(update_fields=['status', 'checkout_session_id', 'checkout_url',
+                            'last_error', 'updated_at'])
+
+    return job.status
+
+
+@shared_task
+def requeue_registration_jobs():
+    """
+    Task to queue again the sign ups that were stored but never provisioned,
+    e.g. when the broker was down or the worker died while provisioning. It
+    should be run periodically.
+
+    :return: number of jobs queued
+    """
+
+    stale = timezone.now() - datetime.timedelta(
+        seconds=settings.REGISTRATION_STALE_SECONDS)
+
+    # Jobs of a worker that died are released after an hour
+    RegistrationJobModel.objects.filter(
+        status=RegistrationJobModel.RegistrationJobStatus.PROVISIONING,
+        updated_at__lt=timezone.now() - datetime.timedelta(hours=1),
+    ).update(status=RegistrationJobModel.RegistrationJobStatus.PENDING)
+
+    registration_job_ids = list(RegistrationJobModel.objects.filter(
+        status=RegistrationJobModel.RegistrationJobStatus.PENDING,
+        updated_at__lt=stale,
+    ).values_list('id', flat=True))
+
+    for registration_job_id in registration_job_ids:
+        provision_registration.delay(registration_job_id)
+
+    return len(registration_job_ids)
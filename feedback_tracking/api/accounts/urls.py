@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import RegisterView, OrganizationValidatorView, UserValidatorView, OrganizationCancelledValidatorView, ReactivateOrganizationView, RetrievePriceView
+from .views import RegisterView, RegistrationStatusView, OrganizationValidatorView, UserValidatorView, OrganizationCancelledValidatorView, ReactivateOrganizationView, RetrievePriceView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -13,6 +13,8 @@ __version__ = '0.1'
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
+    path('register/<uuid:job_id>/', RegistrationStatusView.as_view(),
+         name='register_status'),
     path('reactivate-organization/', ReactivateOrganizationView.as_view(),
          name='reactivate_organization'),
     path('verify/organization/', OrganizationValidatorView.as_view(),
@@ -1,7 +1,7 @@
 from django.db.models import Q
 from django.db import transaction
-from django.conf import settings
 from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth.hashers import make_password
 from django_tenants.utils import schema_context
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -10,10 +10,12 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.response import Response
 
 from feedback_tracking.administrative_system.users.models import UserModel
-from .serializers import GETUserSerializer, POSTUserSerializer, GETOrganizationSerializer, POSTOrganizationSerializer, GETSubscriptionSerializer, GETPriceSerializer
-from feedback_tracking.administrative_system.organizations.models import OrganizationModel, SubscriptionModel, PriceModel, PaymentMethodModel
+from .serializers import GETUserSerializer, POSTUserSerializer, GETOrganizationSerializer, POSTOrganizationSerializer, GETSubscriptionSerializer
+from feedback_tracking.administrative_system.organizations.models import OrganizationModel, SubscriptionModel, PaymentMethodModel, RegistrationJobModel
+from feedback_tracking.administrative_system.organizations.price_catalog import get_price_catalog, make_etag, etag_matches
 from feedback_tracking.singletons.stripe_singleton import StripeSingleton
 from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel
+from .tasks import provision_registration
 
 
 __author__ = "Ricardo"
@@ -31,12 +33,13 @@ class RegisterView(APIView):
 
     def post(self, request, *args, **kwargs):
         """
-        Allow us sign up
+        Allow us sign up, the data is validated and a worker provisions the
+        organization and the checkout session (see tasks.py)
 
         :param user: user data
         :param organization: organization data
         :param payment: payment data
-        :return: message with payment data
+        :return: id of the registration job to poll
         """
 
         user_data = request.data.get('user', None)
@@ -48,14 +51,11 @@ class RegisterView(APIView):
             return Response(data={'message': 'Missing data'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Validate the price ID from payment data
-        price = PriceModel.objects.filter(
-            stripe_price_id=payment_data['price_id'])
+        price = get_price_catalog().get(payment_data['price_id'])
 
-        if not price.exists():
+        if price is None:
             return Response(data={'msg': 'Price not found'}, status=status.HTTP_400_BAD_REQUEST)
 
-        price = price.first()
-
         # Check if a customer with the provided email already exists
         user = UserModel.objects.filter(
             Q(email=user_data['email']) | Q(username=user_data['username']))
@@ -64,7 +64,6 @@ class RegisterView(APIView):
             return Response(data={'msg': 'Customer with that email or username already exists'}, status=status.HTTP_400_BAD_REQUEST)
 
         organization = None
-        subscription = None
 
         # Check if an organization with the provided data already exists
         organization = OrganizationModel.objects.filter(
@@ -87,77 +86,36 @@ class RegisterView(APIView):
 
         if user_valid and org_valid:
 
-            stripe_connection = StripeSingleton()
-
-            try:
-
-                # Create user and organization
-                with transaction.atomic():
-
-                    user = user_serializer.save()
-                    organization = organization_serializer.save(
-                        owner_id=user.id)
-                    user.organization = organization
-                    user.save()
-
-                    with schema_context(organization.schema_name):
-                        # Give user admin permissions
-                        UserLevelPermissionModel.objects.create(
-                            user=user,
-                            level=UserLevelPermissionModel.UserLevelEnum.ADMIN,
-                        )
-                        # UserTenantPermissions.objects.create(
-                        #    profile=user,
-                        #    is_staff=True,
-                        #    is_superuser=True,
-                        # )
-
-                        # payment_method - x
-                        # subscription -
-                        # plan -
-
-                    subscription = SubscriptionModel.objects.create(
-                        unit_amount=price.amount,
-                        price=price,
-                        organization=organization,
-                        status=SubscriptionModel.SubscriptionStatus.INCOMPLETE
-                    )
-
-            except Exception as e:
-                return Response(data={'msg': 'Error creating user or organization'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Create a new customer in Stripe
-            try:
-                stripe_customer = stripe_connection.Customer.create(
-                    email=organization_data['company_email'],
-                    name=organization_data['name'],
-                    metadata={
-                        'organization_id': organization.id,
-                    }
-                )
-            except Exception as e:
-                return Response(data={'msg': 'Error creating Stripe customer'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Create a new checkout session
-            try:
-                stripe_checkout = stripe_connection.checkout.Session.create(
-                    mode='subscription',
-                    customer=stripe_customer.get('id'),
-                    line_items=[{
-                        'price': payment_data['price_id'],
-                        'quantity': 1,
-                    }],
-                    payment_method_types=['card'],
-                    metadata={
-                        'subscription_id': subscription.id
-                    },
-                    success_url=f'{settings.FRONTEND_URL}/register/success?session_id={{CHECKOUT_SESSION_ID}}',
-                    cancel_url=f'{settings.FRONTEND_URL}/cancel',
+            # A sign up with the same data may be waiting to be provisioned
+            if RegistrationJobModel.objects.filter(
+                Q(user_data__email=user_data['email']) |
+                Q(user_data__username=user_data['username']) |
+                Q(organization_data__name=organization_data['name']) |
+                Q(organization_data__company_email=organization_data['company_email']) |
+                Q(organization_data__phone_number=organization_data['phone_number']),
+                status__in=[RegistrationJobModel.RegistrationJobStatus.PENDING,
+                            RegistrationJobModel.RegistrationJobStatus.PROVISIONING],
+            ).exists():
+                return Response(data={'msg': 'A registration with that data is in progress'}, status=status.HTTP_400_BAD_REQUEST)
+
+            validated_user_data = dict(user_serializer.validated_data)
+            validated_user_data['password'] = make_password(
+                validated_user_data['password'])
+
+            # User, organization, schema and Stripe objects are created by a worker
+            with transaction.atomic():
+
+                registration_job = RegistrationJobModel.objects.create(
+                    user_data=validated_user_data,
+                    organization_data=dict(
+                        organization_serializer.validated_data),
+                    price_id=price.stripe_price_id,
                 )
-            except Exception as e:
-                return Response(data={'msg': 'Error creating Stripe subscription'}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response(data=dict(checkout_session_id=stripe_checkout.id, url=stripe_checkout.url), status=status.HTTP_201_CREATED)
+                transaction.on_commit(
+                    lambda: provision_registration.delay(registration_job.id))
+
+            return Response(data={'job_id': registration_job.job_id}, status=status.HTTP_202_ACCEPTED)
 
         else:
 
@@ -169,6 +127,37 @@ class RegisterView(APIView):
             return Response(data=errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class RegistrationStatusView(APIView):
+
+    permission_classes = (AllowAny,)
+
+    def get(self, request, job_id, *args, **kwargs):
+        """
+        Get the status of a sign up, the frontend polls it until the checkout
+        session is ready
+
+        :param job_id: id of the registration job
+        :return: status of the job and the checkout session when it is ready
+        """
+
+        registration_job = RegistrationJobModel.objects.filter(job_id=job_id).values(
+            'status', 'checkout_session_id', 'checkout_url').first()
+
+        if registration_job is None:
+            return Response(data={'msg': 'Registration not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        data = {'status': registration_job['status']}
+
+        if registration_job['status'] == RegistrationJobModel.RegistrationJobStatus.CHECKOUT_READY:
+            data.update(checkout_session_id=registration_job['checkout_session_id'],
+                        url=registration_job['checkout_url'])
+        elif registration_job['status'] == RegistrationJobModel.RegistrationJobStatus.FAILED:
+            # The error is only logged, this endpoint is public
+            data.update(msg='Registration failed')
+
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
 class ReactivateOrganizationView(APIView):
 
     permission_classes = (AllowAny,)
@@ -178,14 +167,11 @@ class ReactivateOrganizationView(APIView):
         This endpoint is used to reactivate an organization.
         """
 
-        price = PriceModel.objects.filter(
-            stripe_price_id=request.data['price_id'])
+        price = get_price_catalog().get(request.data['price_id'])
 
-        if not price.exists():
+        if price is None:
             return Response(data={'msg': 'Price not found'}, status=status.HTTP_400_BAD_REQUEST)
 
-        price = price.first()
-
         user = authenticate(
             request, username=request.data['username'], password=request.data['password'])
 
@@ -214,7 +200,7 @@ class ReactivateOrganizationView(APIView):
         with transaction.atomic():
             subscription = SubscriptionModel.objects.create(
                 unit_amount=price.amount,
-                price=price,
+                price_id=price.stripe_price_id,
                 organization=organization,
                 status=SubscriptionModel.SubscriptionStatus.INCOMPLETE
             )
@@ -243,25 +229,40 @@ class RetrievePriceView(APIView):
 
     def get(self, request, portal, *args, **kwargs):
         """
-        This endpoint is used to retrieve a price in a subscription.
+        This endpoint is used to retrieve a price in a subscription, the price
+        is read from the price catalog.
 
-        :return: Price details
+        :return: Price details, 304 when If-None-Match has the ETag
         """
 
-        organization = OrganizationModel.objects.filter(portal=portal)
+        price_id = SubscriptionModel.objects.filter(
+            organization__portal=portal).values_list('price_id', flat=True).last()
 
-        if not organization.exists():
-            return Response(data={'msg': 'Organization not found'}, status=status.HTTP_404_NOT_FOUND)
+        if price_id is None:
 
-        subscription = SubscriptionModel.objects.filter(
-            organization=organization.first(),)
+            if not OrganizationModel.objects.filter(portal=portal).exists():
+                return Response(data={'msg': 'Organization not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        if not subscription.exists():
             return Response(data={'msg': 'Subscription not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        subscription = subscription.last()
+        price = get_price_catalog().get(price_id)
+
+        if price is None:
+            return Response(data={'msg': 'Price not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Fields of both GETPriceSerializer of the accounts serializers
+        data = {
+            'interval': price.interval,
+            'plan_type': price.plan_type,
+            'amount': str(price.amount),
+            'stripe_price_id': price.stripe_price_id,
+        }
+        etag = make_etag(data)
+
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
 
-        return Response(data=GETPriceSerializer(subscription.price).data, status=status.HTTP_200_OK)
+        return Response(data=data, status=status.HTTP_200_OK, headers={'ETag': etag})
 
 
 # ---------------------------------------------
@@ -16,7 +16,10 @@ from rest_framework.pagination import PageNumberPagination
 
 from feedback_tracking.feedback_system.feedbacks.models import FeedbackModel, PositiveFeedbackModel, NegativeFeedbackModel, PositiveFeedbackTypeModel, NegativeFeedbackTypeModel
 from feedback_tracking.feedback_system.locations.models import LocationModel, GroupModel, AvailabilityModel
+from feedback_tracking.feedback_system.locations.kiosk_auth import is_kiosk_authorized
+from feedback_tracking.feedback_system.locations.availability import is_open_on, get_second_of_day
 from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel
+from feedback_tracking.base.routers import use_replica
 from feedback_tracking.api.permissions import BelongsToOrganizationPermission, CanCreateFeedbackUnderPricingLimitPermission
 from .serializers import GETFeedbackSerializer, GETFeedbacksSerializer, GETNegativeFeedbackSerializer, GETPositiveFeedbackSerializer
 from .statistics import get_feedback_distribution
@@ -29,6 +32,41 @@ __version__ = '0.1'
 paginator = PageNumberPagination()
 
 
+# --------------------------------------------
+#               Date range
+# --------------------------------------------
+
+def filter_by_date_range(feedbacks, request):
+    """
+    Function to filter feedbacks by the optional start_date and end_date query
+    params (YYYY-MM-DD, both included). A bounded range only scans the monthly
+    partitions of those dates.
+
+    :param feedbacks: feedbacks queryset
+    :param request: request
+    :return: tuple with the filtered queryset and an error message or None
+    """
+
+    try:
+        start_date = request.query_params.get('start_date', None)
+        end_date = request.query_params.get('end_date', None)
+
+        if start_date:
+            start_date = datetime.date.fromisoformat(start_date)
+            feedbacks = feedbacks.filter(created_at__gte=timezone.make_aware(
+                datetime.datetime.combine(start_date, datetime.time.min)))
+
+        if end_date:
+            end_date = datetime.date.fromisoformat(end_date) + timedelta(days=1)
+            feedbacks = feedbacks.filter(created_at__lt=timezone.make_aware(
+                datetime.datetime.combine(end_date, datetime.time.min)))
+
+    except ValueError:
+        return feedbacks, 'Invalid date, use the format YYYY-MM-DD'
+
+    return feedbacks, None
+
+
 # --------------------------------------------
 #               Create feedback
 # --------------------------------------------
@@ -58,7 +96,7 @@ def manage_positive_feedbacks(feedback_classification, feedback_types, feedback_
     )
 
     PositiveFeedbackTypeModel.objects.bulk_create([PositiveFeedbackTypeModel(
-        feedback=new_feedback, positive_feedback=positive_feedback) for positive_feedback in positive_feedbacks_gotten])
+        feedback=new_feedback, feedback_created_at=new_feedback.created_at, positive_feedback=positive_feedback) for positive_feedback in positive_feedbacks_gotten])
 
     return JsonResponse({"msg": "Positive feedback received"}, status=status.HTTP_201_CREATED)
 
@@ -88,7 +126,7 @@ def manage_negative_feedbacks(feedback_classification, feedback_types, feedback_
     )
 
     NegativeFeedbackTypeModel.objects.bulk_create([NegativeFeedbackTypeModel(
-        feedback=new_feedback, negative_feedback=negative_feedback) for negative_feedback in negative_feedbacks_gotten])
+        feedback=new_feedback, feedback_created_at=new_feedback.created_at, negative_feedback=negative_feedback) for negative_feedback in negative_feedbacks_gotten])
 
     return JsonResponse({"msg": "Negative feedback received"}, status=status.HTTP_201_CREATED)
 
@@ -138,24 +176,24 @@ class FeedbackView(APIView):
             return JsonResponse({"msg": "Invalid signature"}, status=status.HTTP_403_FORBIDDEN)
 
         # validating existence
-        location = LocationModel.objects.filter(
-            id=location_id, machine_number=machine_number, is_active=True)
-
-        if not location.exists():
+        if not is_kiosk_authorized(location_id, machine_number):
             return JsonResponse({"msg": "Location does not exist or is not in use"}, status=status.HTTP_404_NOT_FOUND)
 
         date = datetime.datetime.now()
-        today = date.strftime('%A').lower()
-        now = date.time()
 
-        location = location.first()
-        availability = AvailabilityModel.objects.filter(
-            location=location,).first()
+        availability = AvailabilityModel.objects.select_related('location').only(
+            'weekdays_mask', 'start_second', 'end_second', 'location').filter(
+            location_id=location_id,).first()
+
+        if availability is None:
+            return JsonResponse({"msg": "Location does not exist or is not in use"}, status=status.HTTP_404_NOT_FOUND)
+
+        location = availability.location
 
-        if not getattr(availability, today):
+        if not is_open_on(availability.weekdays_mask, date):
             return JsonResponse({"msg": "Location is not available today"}, status=status.HTTP_403_FORBIDDEN)
 
-        if not (availability.start_time <= now <= availability.end_time):
+        if not availability.start_second <= get_second_of_day(date) <= availability.end_second:
             return JsonResponse({"msg": "Location is not available at this hour"}, status=status.HTTP_403_FORBIDDEN)
 
         if feedback not in FeedbackModel.FeedbackClassification.values:
@@ -249,6 +287,7 @@ def get_positive_feedback_types(request, portal):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
+@use_replica
 def get_feedbacks(request, portal):
     """
     Function to get feedbacks
@@ -354,6 +393,11 @@ def get_feedbacks(request, portal):
     if location_id:
         feedbacks = feedbacks.filter(location=location)
 
+    feedbacks, error = filter_by_date_range(feedbacks, request)
+
+    if error:
+        return JsonResponse({"msg": error}, status=status.HTTP_400_BAD_REQUEST)
+
     paginator.page_size = int(request.query_params.get('page_size', page_size))
     result_page = paginator.paginate_queryset(feedbacks, request)
     serializer = GETFeedbacksSerializer(result_page, many=True)
@@ -424,6 +468,7 @@ def get_feedback(request, portal, pk):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
+@use_replica
 def get_feedback_logistics(request, portal):
     """
     Function to get feedback logistics
@@ -489,6 +534,11 @@ def get_feedback_logistics(request, portal):
             )
         )
 
+    feedbacks, error = filter_by_date_range(feedbacks, request)
+
+    if error:
+        return JsonResponse({"msg": error}, status=status.HTTP_400_BAD_REQUEST)
+
     total_feedbacks = feedbacks.count()
     total_positive_feedbacks = feedbacks.filter(classification__in=[
                                                 FeedbackModel.FeedbackClassification.EXCELLENT, FeedbackModel.FeedbackClassification.GOOD]).count()
@@ -1,8 +1,9 @@
 from django.db.models import Q
 
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
-from feedback_tracking.feedback_system.locations.models import GroupModel
+from feedback_tracking.feedback_system.locations.models import GroupModel, GroupAvailabilityTemplateModel
 from feedback_tracking.feedback_system.feedbacks.models import FeedbackModel
 
 
@@ -67,6 +68,10 @@ class PostPutGroupSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description',
                   'target_percentage',]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        # The name stays taken until a deleted group is purged
+        extra_kwargs = {
+            'name': {'validators': [UniqueValidator(queryset=GroupModel.all_objects.all())]},
+        }
 
     def validate_target_percentage(self, value):
 
@@ -81,3 +86,20 @@ class PostPutGroupSerializer(serializers.ModelSerializer):
                 "The percentage must be a multiple of 5.")
 
         return value
+
+
+class GroupAvailabilityTemplateSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = GroupAvailabilityTemplateModel
+        fields = ['start_time', 'end_time', 'monday', 'tuesday',
+                  'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+        extra_kwargs = {field: {'required': True} for field in fields}
+
+    def validate(self, attrs):
+
+        if attrs['start_time'] > attrs['end_time']:
+            raise serializers.ValidationError(
+                "The start time must be before the end time.")
+
+        return attrs
@@ -17,4 +17,6 @@ urlpatterns = [
          views.delete_group, name="delete_group"),
     path('group/<int:group_id>/locations/',
          views.get_group_locations, name="get_group_locations"),
+    path('group/<int:group_id>/availability/',
+         views.group_availability_template, name="group_availability_template"),
 ]
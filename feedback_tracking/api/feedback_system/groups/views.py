@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 
@@ -10,7 +11,11 @@ from ...permissions import BelongsToOrganizationPermission
 from feedback_tracking.feedback_system.locations.models import GroupModel, LocationModel
 from feedback_tracking.api.feedback_system.locations.serializers import GetLocationsSerializer
 from feedback_tracking.administrative_system.users.models import UserModel
-from .serializers import GetGroupsSerializer, PostPutGroupSerializer
+from feedback_tracking.feedback_system.locations.availability_templates import save_group_template
+from feedback_tracking.feedback_system.locations.purge import soft_delete_group
+from feedback_tracking.feedback_system.locations.tasks import queue_location_purge
+from feedback_tracking.feedback_system.permissions.cache import get_granted_group_ids
+from .serializers import GetGroupsSerializer, PostPutGroupSerializer, GroupAvailabilityTemplateSerializer
 from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel, UserGroupPermissionModel
 
 
@@ -144,9 +149,12 @@ def delete_group(request, portal, group_id):
     except GroupModel.DoesNotExist:
         return JsonResponse({"message": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    group.delete()
+    # The locations and data of the group are removed in the background
+    with transaction.atomic():
+        soft_delete_group(group)
+        task_id = queue_location_purge(group_ids=[group.id])
 
-    return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({"message": "Group deleted successfully", "task_id": task_id}, status=status.HTTP_202_ACCEPTED)
 
 
 @api_view(['GET'])
@@ -187,3 +195,55 @@ def get_group_locations(request, portal, group_id):
         locations = LocationModel.objects.filter(group=group)
 
     return Response(GetLocationsSerializer(locations, many=True).data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET', 'PUT'])
+@permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
+def group_availability_template(request, portal, group_id):
+    """
+    Get or save the availability template of a group, when it is saved the
+    availability of every location of the group is updated with it.
+
+    :param group_id(int): group id
+    :param start_time(str): opening time
+    :param end_time(str): closing time
+    :param monday...sunday(bool): open weekdays
+    :param apply(bool): update the locations of the group, true by default
+    """
+
+    if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.USER:
+        return Response({'message': 'User does not have permission to manage group availability'}, status=status.HTTP_403_FORBIDDEN)
+
+    elif request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.MANAGER:
+
+        if group_id not in get_granted_group_ids(request.user):
+            return Response({"message": "User does not have permission to manage this group"}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        group = GroupModel.objects.get(id=group_id)
+    except GroupModel.DoesNotExist:
+        return Response({"message": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+
+        template = getattr(group, 'availability_template', None)
+
+        if template is None:
+            return Response({"message": "Group has no availability template"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(GroupAvailabilityTemplateSerializer(template).data, status=status.HTTP_200_OK)
+
+    template_serialized = GroupAvailabilityTemplateSerializer(data=request.data)
+
+    if not template_serialized.is_valid():
+        return Response(template_serialized.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    apply = request.data.get('apply', True) not in (False, 'false', '0', 0)
+
+    template, updated = save_group_template(
+        group, template_serialized.validated_data, apply)
+
+    return Response({
+        **GroupAvailabilityTemplateSerializer(template).data,
+        'updated_locations': updated,
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,76 @@
+import json
+import zipfile
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class ZipStream():
+    """
+    Write only file for zipfile, it keeps the bytes written since the last pop
+    so the archive can be sent while it is built. It has no seek, zipfile
+    writes the sizes after every file (data descriptors) instead of going back.
+    """
+
+    def __init__(self):
+
+        self.buffer = bytearray()
+        self.offset = 0
+
+    def write(self, data):
+
+        self.buffer += data
+        self.offset += len(data)
+
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        """
+        :return: bytes written since the last call
+        """
+
+        data = bytes(self.buffer)
+        self.buffer.clear()
+
+        return data
+
+
+def get_credentials_file(location_id: int, machine_number: str, signature: str):
+    """
+    :return: json credentials file of a location, like get_location_credentials
+    """
+
+    return json.dumps({'machine_number': machine_number,
+                       'signature': signature,
+                       'location_id': location_id}, indent=2)
+
+
+def stream_credentials_zip(rows):
+    """
+    Build a ZIP with a credentials file by location, one file at a time, so
+    only the current file is kept in memory.
+
+    :param rows: iterable of tuples (id, name, machine_number, signature)
+    :return: generator of the bytes of the ZIP
+    """
+
+    stream = ZipStream()
+
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+
+        for location_id, name, machine_number, signature in rows:
+
+            archive.writestr(
+                f'{name}_{location_id}.json',
+                get_credentials_file(location_id, machine_number, signature))
+
+            yield stream.pop()
+
+    yield stream.pop()
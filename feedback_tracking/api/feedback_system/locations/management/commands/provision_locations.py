@@ -0,0 +1,67 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import schema_context
+
+from feedback_tracking.administrative_system.organizations.models import OrganizationModel
+from feedback_tracking.api.feedback_system.locations.provisioning import provision_locations, stream_credentials
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class Command(BaseCommand):
+
+    help = ('Create the locations of a CSV (name, target_percentage, group) or json file in a tenant '
+            'and write the credentials of the batch.')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('schema', help='Schema of the tenant.')
+        parser.add_argument('file', help='CSV or json file with the locations.')
+        parser.add_argument('--output', default='-',
+                            help='File of the credentials, stdout by default.')
+
+    def read_rows(self, path):
+
+        with open(path, encoding='utf-8-sig') as file:
+
+            if path.endswith('.json'):
+                return json.load(file)
+
+            # An empty cell takes the default, any other value is validated by
+            # the serializer and reported with its row
+            return [
+                {column: value for column, value in row.items()
+                 if not (column == 'target_percentage' and value in (None, ''))}
+                for row in csv.DictReader(file)
+            ]
+
+    def handle(self, *args, **options):
+
+        organization = OrganizationModel.objects.filter(
+            schema_name=options['schema']).first()
+
+        if organization is None:
+            raise CommandError(f'Tenant {options["schema"]} not found.')
+
+        rows = self.read_rows(options['file'])
+
+        with schema_context(options['schema']):
+            locations, errors = provision_locations(organization, rows)
+
+        if errors:
+            for error in errors:
+                self.stderr.write(f"row {error['row']} {error['name']}: {error['errors']}")
+            raise CommandError(f'{len(errors)} rows with errors, no location was created.')
+
+        if options['output'] == '-':
+            for chunk in stream_credentials(locations):
+                self.stdout.write(chunk, ending='')
+        else:
+            with open(options['output'], 'w') as output:
+                output.writelines(stream_credentials(locations))
+
+        self.stderr.write(self.style.SUCCESS(f'{len(locations)} locations created.'))
@@ -0,0 +1,141 @@
+import json
+
+from django.db import transaction
+
+from feedback_tracking.administrative_system.organizations.models import PriceModel
+from feedback_tracking.administrative_system.organizations.price_catalog import get_price
+from feedback_tracking.feedback_system.locations.models import LocationModel, AvailabilityModel, GroupModel
+from feedback_tracking.feedback_system.locations.availability_templates import get_group_templates, build_location_availability
+from .serializers import BulkLocationSerializer
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def get_available_locations(organization):
+    """
+    :param organization: organization of the tenant
+    :return: locations that can be created, None without limit
+    """
+
+    price = get_price(organization.organization_subscription.last().price_id)
+
+    if price.plan_type == PriceModel.PriceTypeEnum.ENTERPRISE:
+        return None
+
+    return max(price.max_locations - LocationModel.objects.count(), 0)
+
+
+def validate_locations(rows: list, group_ids=None):
+    """
+    Validate the rows of a provisioning against one snapshot of the groups and
+    the taken names.
+
+    :param rows: dicts with name, target_percentage and group
+    :param group_ids: groups the requester can use, every group when None
+    :return: tuple (validated data, errors by row)
+    """
+
+    groups = GroupModel.objects.all()
+
+    if group_ids is not None:
+        groups = groups.filter(id__in=group_ids)
+
+    groups = set(groups.values_list('id', flat=True))
+    names = {row.get('name') for row in rows if isinstance(row, dict)}
+    taken = set(LocationModel.all_objects.filter(name__in=names).values_list('name', flat=True))
+
+    validated = []
+    errors = []
+
+    for index, row in enumerate(rows, start=1):
+
+        serializer = BulkLocationSerializer(data=row)
+        row_errors = {} if serializer.is_valid() else dict(serializer.errors)
+        name = serializer.validated_data.get('name') if not row_errors else None
+
+        if name in taken:
+            row_errors['name'] = ['A location with this name already exists.']
+
+        if not row_errors and serializer.validated_data['group'] not in groups:
+            row_errors['group'] = ['Group not found or you do not have permission for it.']
+
+        if row_errors:
+            errors.append({'row': index, 'name': row.get('name') if isinstance(row, dict) else None,
+                           'errors': row_errors})
+        else:
+            taken.add(name)
+            validated.append(serializer.validated_data)
+
+    return validated, errors
+
+
+def provision_locations(organization, rows: list, group_ids=None):
+    """
+    Create many locations with their availability, the one of the template of
+    their group when it has one. The plan limit is checked once, the
+    credentials are computed in Python and the locations and the
+    availabilities are inserted with bulk_create in one transaction.
+
+    :param organization: organization of the tenant
+    :param rows: dicts with name, target_percentage and group
+    :param group_ids: groups the requester can use, every group when None
+    :return: tuple (created locations, errors by row)
+    """
+
+    validated, errors = validate_locations(rows, group_ids)
+
+    if errors:
+        return [], errors
+
+    with transaction.atomic():
+
+        available = get_available_locations(organization)
+
+        if available is not None and len(validated) > available:
+            return [], [{'row': None, 'name': None, 'errors': {
+                'detail': f'Location limit reached, {available} locations can be created.'}}]
+
+        locations = []
+
+        for data in validated:
+            location = LocationModel(
+                name=data['name'],
+                target_percentage=data.get('target_percentage', 0),
+                group_id=data['group'],
+            )
+            location.build_credentials()
+            locations.append(location)
+
+        LocationModel.objects.bulk_create(locations, batch_size=500)
+        templates = get_group_templates(location.group_id for location in locations)
+        AvailabilityModel.objects.bulk_create([
+            build_location_availability(location, templates.get(location.group_id))
+            for location in locations
+        ], batch_size=500)
+
+    return locations, []
+
+
+def stream_credentials(locations: list):
+    """
+    Write the credentials of the locations as a json list, one location by
+    chunk so big batches are not built in memory twice.
+
+    :param locations: created locations
+    :return: generator of json chunks
+    """
+
+    yield '[\n'
+
+    for index, location in enumerate(locations):
+        separator = ',\n' if index else ''
+        yield separator + json.dumps({
+            'location_id': location.id,
+            'name': location.name,
+            'machine_number': location.machine_number,
+            'signature': location.signature,
+        }, indent=2)
+
+    yield '\n]\n'
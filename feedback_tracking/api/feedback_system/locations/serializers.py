@@ -45,7 +45,7 @@ class PostLocationSerializer(serializers.ModelSerializer):
                 "Only letters and numbers are allowed in the name."
             )
 
-        if LocationModel.objects.filter(name=value).exists():
+        if LocationModel.all_objects.filter(name=value).exists():
             raise serializers.ValidationError(
                 "A location with this name already exists.")
 
@@ -66,6 +66,24 @@ class PostLocationSerializer(serializers.ModelSerializer):
         return value
 
 
+class BulkLocationSerializer(PostLocationSerializer):
+    """
+    Validate a location of a bulk provisioning, the name uniqueness and the
+    group are checked against the snapshot of the batch instead of by row.
+    """
+
+    group = serializers.IntegerField(required=True)
+
+    def validate_name(self, value):
+
+        if not re.fullmatch(r'[A-Za-z0-9]+', value):
+            raise serializers.ValidationError(
+                "Only letters and numbers are allowed in the name."
+            )
+
+        return value
+
+
 class GetLocationsSerializer(serializers.ModelSerializer):
 
     group: int = serializers.IntegerField(source="group.id", required=True)
@@ -159,7 +177,7 @@ class PUTLocationSerializer(serializers.ModelSerializer):
 
     def validate_name(self, value):
 
-        if LocationModel.objects.filter(name=value).exclude(id=self.instance.id).exists():
+        if LocationModel.all_objects.filter(name=value).exclude(id=self.instance.id).exists():
             raise serializers.ValidationError(
                 "A location with this name already exists.")
 
@@ -1,3 +1,61 @@
-from django.test import TestCase
+import io
+import json
+import zipfile
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .credentials import stream_credentials_zip
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class StreamCredentialsZipTests(SimpleTestCase):
+
+    def test_credentials_files(self):
+
+        rows = [
+            (1, 'Lobby', 'machine-1', 'signature-1'),
+            (2, 'Cafeteria', 'machine-2', 'signature-2'),
+        ]
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_credentials_zip(rows))))
+
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.namelist(), ['Lobby_1.json', 'Cafeteria_2.json'])
+        self.assertEqual(json.loads(archive.read('Cafeteria_2.json')), {
+            'machine_number': 'machine-2',
+            'signature': 'signature-2',
+            'location_id': 2,
+        })
+
+    def test_streams_by_location(self):
+
+        rows = [(index, f'Location {index}', f'machine-{index}', 'signature') for index in range(3)]
+
+        chunks = list(stream_credentials_zip(rows))
+
+        # One chunk by file and the central directory
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(all(chunks))
+
+    def test_reads_rows_lazily(self):
+
+        consumed = []
+
+        def get_rows():
+            for index in range(3):
+                consumed.append(index)
+                yield index, f'Location {index}', f'machine-{index}', 'signature'
+
+        stream = stream_credentials_zip(get_rows())
+        next(stream)
+
+        self.assertEqual(consumed, [0])
+
+    def test_empty(self):
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_credentials_zip([]))))
+
+        self.assertEqual(archive.namelist(), [])
@@ -5,11 +5,21 @@ from . import views
 
 urlpatterns = [
     path('', views.get_locations, name='locations'),
+    path('open/', views.get_open_locations, name='open_locations'),
     path('location/', views.LocationView.as_view(), name='base_location'),
+    path('location/bulk/', views.LocationBulkView.as_view(), name='bulk_locations'),
+    path('location/credentials/',
+         views.export_location_credentials, name='export_location_credentials'),
     path('location/credentials/<int:location_id>/',
          views.get_location_credentials, name='get_location_credentials'),
     path('location/regenerate-credentials/<int:location_id>/',
          views.regenerate_location_credentials, name='regenerate_location_credentials'),
+    path('location/rotate-credentials/',
+         views.rotate_credentials, name='rotate_credentials'),
+    path('location/rotate-credentials/<uuid:task_id>/',
+         views.get_job_status, name='get_rotation_status'),
+    path('location/jobs/<uuid:task_id>/',
+         views.get_job_status, name='get_job_status'),
     path('location/verify-credentials/<int:location_id>/',
          views.verify_location_credentials, name='verify_location_credentials'),
     path('location/retrieve/<int:location_id>/',
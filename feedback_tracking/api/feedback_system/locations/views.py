@@ -1,17 +1,28 @@
-import json
-from django.http import HttpResponse, JsonResponse
-from django.db import transaction, IntegrityError
+import datetime
+from itertools import chain
+
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db import connection, transaction, IntegrityError
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
+from celery.result import AsyncResult
 
 from ...permissions import BelongsToOrganizationPermission, CanCreateLocationUnderPricingLimitPermission
+from .credentials import get_credentials_file, stream_credentials_zip
+from .provisioning import provision_locations, stream_credentials
 from .serializers import GetLocationSerializer, GetLocationsSerializer, PostLocationSerializer, PUTLocationSerializer, PUTAvailabilitySerializer
-from feedback_tracking.feedback_system.locations.models import LocationModel, AvailabilityModel, GroupModel
+from feedback_tracking.feedback_system.locations.models import LocationModel, GroupModel
+from feedback_tracking.feedback_system.locations.kiosk_auth import is_kiosk_authorized
+from feedback_tracking.feedback_system.locations.availability import filter_open_at
+from feedback_tracking.feedback_system.locations.availability_templates import get_group_templates, build_location_availability
+from feedback_tracking.feedback_system.locations.tasks import rotate_location_credentials, queue_location_purge, LocationJobError
+from feedback_tracking.feedback_system.locations.purge import soft_delete_locations
 from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel, UserLocationPermissionModel, UserGroupPermissionModel
+from feedback_tracking.feedback_system.permissions.cache import get_granted_group_ids
 
 
 class LocationView(APIView):
@@ -29,7 +40,8 @@ class LocationView(APIView):
             with transaction.atomic():
 
                 location = serializer.save()
-                AvailabilityModel.objects.create(location=location)
+                build_location_availability(
+                    location, get_group_templates([location.group_id]).get(location.group_id)).save()
 
         except IntegrityError as e:
             return Response(
@@ -40,6 +52,174 @@ class LocationView(APIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class LocationBulkView(APIView):
+    permission_classes = [IsAuthenticated, BelongsToOrganizationPermission,]
+
+    def post(self, request, portal):
+        """
+        Create many locations with their availability and download their
+        credentials. Managers can only create locations in their groups.
+
+        :param locations: list of locations with name, target_percentage and group
+        :return: json file with the credentials of the created locations
+        """
+
+        rows = request.data.get('locations', None)
+
+        if not isinstance(rows, list) or not rows:
+            return Response({'detail': 'A list of locations is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.USER:
+            return Response({"msg": "User does not have permission to create locations"}, status=status.HTTP_403_FORBIDDEN)
+
+        group_ids = None
+
+        if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.MANAGER:
+            group_ids = request.user.user_group_permissions.filter(
+                has_permission=True).values_list('group_id', flat=True)
+
+        try:
+            locations, errors = provision_locations(
+                request.organization, rows, group_ids)
+        except IntegrityError:
+            return Response(
+                {'detail': 'Error creating locations and availabilities', },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            stream_credentials(locations), content_type='application/json', status=status.HTTP_201_CREATED)
+        response['Content-Disposition'] = 'attachment; filename=locations_credentials.json'
+        return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
+def get_open_locations(request, portal):
+    """
+    Get the locations that accept feedbacks at a moment, the availability of
+    every location is evaluated in one query.
+
+    :param ids: location ids separated by ',', optional
+    :param group: group id, optional
+    :param at: ISO datetime, now by default
+    :return: ids of the open locations
+    """
+
+    if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.USER:
+        locations = LocationModel.objects.filter(id__in=request.user.user_location_permissions.filter(
+            has_permission=True).values_list('location_id', flat=True))
+
+    elif request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.MANAGER:
+        locations = LocationModel.objects.filter(group_id__in=get_granted_group_ids(request.user))
+
+    elif request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.ADMIN:
+        locations = LocationModel.objects.all()
+
+    ids = request.query_params.get('ids', '')
+    group = request.query_params.get('group', '')
+    at = request.query_params.get('at', '')
+
+    try:
+        location_ids = [int(location_id) for location_id in ids.split(',') if location_id.strip()]
+        group_id = int(group) if group else None
+        # Same clock as the feedbacks endpoint, the naive local time
+        at = datetime.datetime.fromisoformat(at) if at else datetime.datetime.now()
+    except ValueError:
+        return Response({'detail': 'Invalid location ids, group or date.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if at.tzinfo is not None:
+        at = at.astimezone().replace(tzinfo=None)
+
+    if location_ids:
+        locations = locations.filter(id__in=location_ids)
+
+    if group_id is not None:
+        locations = locations.filter(group_id=group_id)
+
+    open_ids = filter_open_at(
+        locations.filter(is_active=True), at, 'availability_location__').order_by('id').values_list('id', flat=True)
+
+    return Response({'at': at.isoformat(), 'open': list(open_ids)}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
+def rotate_credentials(request, portal):
+    """
+    Start a background job that rotates the credentials of many locations,
+    its progress is read with get_rotation_status.
+
+    :param location_ids: list of location ids, optional
+    :param group: group id, optional
+    :return: id of the job
+    """
+
+    if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.USER:
+        return Response({"msg": "User does not have permission to regenerate credentials"}, status=status.HTTP_403_FORBIDDEN)
+
+    location_ids = request.data.get('location_ids', None)
+    group = request.data.get('group', None)
+
+    try:
+        location_ids = [int(location_id) for location_id in location_ids] if location_ids is not None else None
+        group_ids = [int(group)] if group is not None else None
+    except (TypeError, ValueError):
+        return Response({'detail': 'Location and group ids must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.MANAGER:
+
+        granted_group_ids = get_granted_group_ids(request.user)
+
+        if group_ids is None:
+            group_ids = list(granted_group_ids)
+        elif not set(group_ids) <= granted_group_ids:
+            return Response({"msg": "Group not found or you do not have permission to access it"}, status=status.HTTP_404_NOT_FOUND)
+
+    job = rotate_location_credentials.delay(
+        location_ids=location_ids, group_ids=group_ids, schema_name=connection.schema_name)
+
+    return Response({"msg": "Credentials rotation started", "task_id": job.id}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
+def get_job_status(request, portal, task_id):
+    """
+    Get the state of a background job of the organization, a credentials
+    rotation or the purge of deleted locations and groups.
+
+    :param task_id: id of the job
+    :return: state with the progress of the job, e.g. done and total locations,
+        and msg when it failed
+    """
+
+    if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.USER:
+        return Response({"msg": "User does not have permission to view jobs"}, status=status.HTTP_403_FORBIDDEN)
+
+    job = AsyncResult(str(task_id))
+
+    if isinstance(job.info, LocationJobError):
+        info = {'schema_name': job.info.schema_name, 'msg': job.info.msg}
+    else:
+        info = job.info if isinstance(job.info, dict) else {}
+
+    # Jobs of other tenants are not shown, a queued job has no info yet
+    if job.state != 'PENDING' and info.get('schema_name') != connection.schema_name:
+        return Response({"msg": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'task_id': job.id,
+        'state': job.state,
+        'done': 0,
+        'total': None,
+        **{key: value for key, value in info.items() if key != 'schema_name'},
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([])
 def verify_location_credentials(request, portal, location_id):
@@ -61,10 +241,7 @@ def verify_location_credentials(request, portal, location_id):
     if not LocationModel.verify_signature(machine_number, signature):
         return JsonResponse({"msg": "Invalid signature"}, status=status.HTTP_403_FORBIDDEN)
 
-    location = LocationModel.objects.filter(
-        id=location_id, machine_number=machine_number, is_active=True)
-
-    if not location.exists():
+    if not is_kiosk_authorized(location_id, machine_number):
         return JsonResponse({"msg": "Location does not exist or is not in use"}, status=status.HTTP_404_NOT_FOUND)
 
     return Response({"msg": "Credentials verified"}, status=status.HTTP_200_OK)
@@ -154,15 +331,64 @@ def get_location_credentials(request, portal, location_id):
     location = location.first()
 
     response = HttpResponse(
-        json.dumps({'machine_number': location.machine_number,
-                    'signature': location.signature,
-                    'location_id': location_id}, indent=2),
+        get_credentials_file(
+            location_id, location.machine_number, location.signature),
         content_type='application/json'
     )
     response['Content-Disposition'] = f'attachment; filename=location_credentials.json'
     return response
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
+def export_location_credentials(request, portal):
+    """
+    Download a ZIP with the credentials file of many locations, it is streamed
+    while the locations are read.
+
+    :param ids: location ids separated by ',', optional
+    :param group: group id, optional
+    :return: zip file, every location the user can access when no filter
+    """
+
+    if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.USER:
+        return Response({"msg": "User does not have permission to download credentials"}, status=status.HTTP_403_FORBIDDEN)
+
+    locations = LocationModel.objects.all()
+
+    if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.MANAGER:
+        locations = locations.filter(group_id__in=get_granted_group_ids(request.user))
+
+    ids = request.query_params.get('ids', '')
+    group = request.query_params.get('group', '')
+
+    try:
+        location_ids = [int(location_id) for location_id in ids.split(',') if location_id.strip()]
+        group_id = int(group) if group else None
+    except ValueError:
+        return Response({'detail': 'Location and group ids must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if location_ids:
+        locations = locations.filter(id__in=location_ids)
+
+    if group_id is not None:
+        locations = locations.filter(group_id=group_id)
+
+    rows = locations.order_by('id').values_list(
+        'id', 'name', 'machine_number', 'signature').iterator(chunk_size=500)
+
+    # The first row tells if there is something to export without a count query
+    first = next(rows, None)
+
+    if first is None:
+        return Response({"msg": "Locations not found or you do not have permission to access them"}, status=status.HTTP_404_NOT_FOUND)
+
+    response = StreamingHttpResponse(
+        stream_credentials_zip(chain([first], rows)), content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename=locations_credentials.zip'
+    return response
+
+
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
 def regenerate_location_credentials(request, portal, location_id):
@@ -255,7 +481,11 @@ def delete_location(request, portal, location_id):
     if not location.exists():
         return Response({"msg": "Location not found or you do not have permission to access it"}, status=status.HTTP_404_NOT_FOUND)
 
-    location = location.first()
-    location.delete()
+    location_id = location.values_list('id', flat=True).first()
+
+    # The data of the location is removed in the background
+    with transaction.atomic():
+        soft_delete_locations([location_id])
+        task_id = queue_location_purge(location_ids=[location_id])
 
-    return Response({"msg": "Location deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+    return Response({"msg": "Location deleted successfully", "task_id": task_id}, status=status.HTTP_202_ACCEPTED)
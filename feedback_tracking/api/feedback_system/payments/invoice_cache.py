@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def get_invoices_cache_key(organization_id: int):
+    """
+    :param organization_id: id of the organization
+    :return: cache key of the first page of invoices
+    """
+
+    return f'invoices:first_page:{organization_id}'
+
+
+def get_cached_invoices_page(organization_id: int):
+    """
+    :param organization_id: id of the organization
+    :return: data of the first page of invoices or None
+    """
+
+    return cache.get(get_invoices_cache_key(organization_id))
+
+
+def cache_invoices_page(organization_id: int, data: dict):
+    """
+    :param organization_id: id of the organization
+    :param data: data of the first page of invoices
+    """
+
+    cache.set(get_invoices_cache_key(organization_id), data,
+              settings.INVOICES_CACHE_SECONDS)
+
+
+def forget_invoices_page(organization_id: int):
+    """
+    Remove the first page of invoices once the transaction that wrote an
+    invoice is committed.
+
+    :param organization_id: id of the organization
+    """
+
+    transaction.on_commit(
+        lambda: cache.delete(get_invoices_cache_key(organization_id)))
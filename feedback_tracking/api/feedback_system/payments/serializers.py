@@ -1,3 +1,5 @@
+from django.db.models import CharField, F, Func, Value
+from django.db.models.functions import Cast, Coalesce
 from rest_framework import serializers
 
 from feedback_tracking.administrative_system.organizations.models import InvoiceModel, PriceModel
@@ -20,6 +22,58 @@ class GETInvoicesSerializer(serializers.ModelSerializer):
         return obj.created_at.strftime("%d/%m/%Y")
 
 
+class InvoiceValuesSerializer():
+    """
+    Bulk version of GETInvoicesSerializer for large invoice histories, the rows
+    are read with values() and the amounts and dates are formatted by the
+    database instead of by row in Python.
+    """
+
+    @classmethod
+    def get_values(cls, queryset):
+        """
+        :param queryset: invoices queryset
+        :return: values queryset, created_at is kept for the cursor pagination
+        """
+
+        return queryset.values(
+            'id', 'stripe_invoice_id', 'currency', 'status', 'created_at', 'hosted_invoice_url',
+            'invoice_pdf', 'billing_reason', 'collection_method',
+            amount_text=Cast('amount', CharField()),
+            subtotal_text=Cast('subtotal', CharField()),
+            total_text=Cast('total', CharField()),
+            created_date=Coalesce(
+                Func(F('created_at'), Value('DD/MM/YYYY'),
+                     function='to_char', output_field=CharField()),
+                Value('')),
+        )
+
+    @classmethod
+    def to_representation(cls, rows):
+        """
+        :param rows: rows of get_values
+        :return: list with the same data of GETInvoicesSerializer
+        """
+
+        return [
+            {
+                'id': row['id'],
+                'stripe_invoice_id': row['stripe_invoice_id'],
+                'amount': row['amount_text'],
+                'subtotal': row['subtotal_text'],
+                'total': row['total_text'],
+                'currency': row['currency'],
+                'status': row['status'],
+                'created_at': row['created_date'],
+                'hosted_invoice_url': row['hosted_invoice_url'],
+                'invoice_pdf': row['invoice_pdf'],
+                'billing_reason': row['billing_reason'],
+                'collection_method': row['collection_method'],
+            }
+            for row in rows
+        ]
+
+
 class GETInvoiceItemSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -1,17 +1,21 @@
 from datetime import timedelta
 from django.db import transaction
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 
-from feedback_tracking.administrative_system.organizations.models import SubscriptionModel, InvoiceModel, PriceModel
+from feedback_tracking.administrative_system.organizations.models import SubscriptionModel, InvoiceModel
+from feedback_tracking.administrative_system.organizations.price_catalog import get_price_catalog
 from feedback_tracking.singletons.stripe_singleton import StripeSingleton
+from feedback_tracking.base.routers import use_replica
 from feedback_tracking.api.permissions import IsOrganizationPortalOwner, BelongsToOrganizationPermission
-from .serializers import GETInvoicesSerializer, GETInvoiceItemSerializer, GETPriceSerializer
+from .serializers import InvoiceValuesSerializer
+from .invoice_cache import get_cached_invoices_page, cache_invoices_page
 
 
 class CancelSubscriptionView(APIView):
@@ -99,14 +103,15 @@ class UpdateSubscriptionView(APIView):
         if not price_id:
             return Response({"msg": "price_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            new_price = PriceModel.objects.get(stripe_price_id=price_id)
-        except PriceModel.DoesNotExist:
+        catalog = get_price_catalog()
+        new_price = catalog.get(price_id)
+
+        if new_price is None:
             return Response({"msg": "Price was not found"}, status=status.HTTP_404_NOT_FOUND)
 
         # Get current subscription
         subscription = subscription_qs.first()
-        current_price = subscription.price
+        current_price = catalog.get(subscription.price_id)
 
         # Normalize current and new plan names and frequencies
         current_name, current_freq = current_price.plan_type, current_price.interval
@@ -149,21 +154,56 @@ class UpdateSubscriptionView(APIView):
         return Response({'msg': 'Subscription updated successfully'}, status=status.HTTP_200_OK)
 
 
+class InvoiceCursorPagination(CursorPagination):
+    """
+    Keyset pagination of the invoices, pages are read from the index without
+    OFFSET nor COUNT.
+    """
+
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
 class ListInvoicesView(APIView):
 
     permission_classes = (
         IsAuthenticated, BelongsToOrganizationPermission, IsOrganizationPortalOwner,)
 
+    @method_decorator(use_replica)
     def get(self, request, *args, **kwargs):
+        """
+        List the invoices of the organization, newest first, with cursor
+        pagination. The first page with the default size is cached until a
+        new invoice is stored.
+
+        :param cursor: cursor of the page, from next or previous
+        :param page_size: invoices by page
+        :return: page of invoices
+        """
 
         organization = request.user.organization
-        queryset = InvoiceModel.objects.filter(
-            subscription__organization=organization
-        ).order_by('-created_at')
+        paginator = InvoiceCursorPagination()
+        is_first_page = not ({paginator.cursor_query_param, paginator.page_size_query_param} & set(request.query_params))
+
+        if is_first_page:
+            data = get_cached_invoices_page(organization.id)
+
+            if data is not None:
+                return Response(data, status=status.HTTP_200_OK)
+
+        # The subscriptions of the organization use the (subscription, created_at) index
+        subscription_ids = list(SubscriptionModel.objects.filter(
+            organization=organization).values_list('id', flat=True))
+        queryset = InvoiceValuesSerializer.get_values(
+            InvoiceModel.objects.filter(subscription_id__in=subscription_ids))
 
-        paginator = PageNumberPagination()
-        paginator.page_size = int(request.query_params.get('page_size', 25))
         page = paginator.paginate_queryset(queryset, request)
-        serializer = GETInvoicesSerializer(page, many=True)
+        response = paginator.get_paginated_response(
+            InvoiceValuesSerializer.to_representation(page))
+
+        if is_first_page:
+            cache_invoices_page(organization.id, response.data)
 
-        return paginator.get_paginated_response(serializer.data)
+        return response
@@ -0,0 +1,255 @@
+import io
+import csv
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from feedback_tracking.administrative_system.organizations.models import PriceModel
+from feedback_tracking.administrative_system.organizations.price_catalog import get_price
+from feedback_tracking.administrative_system.users.models import UserModel
+from feedback_tracking.feedback_system.locations.models import LocationModel, GroupModel
+from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel, UserLocationPermissionModel, UserGroupPermissionModel
+from .serialiezs import POSTUserSerializer
+from .password_hashing import hash_passwords
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class BulkUserSerializer(POSTUserSerializer):
+    """
+    Validate the fields of an imported user, the uniqueness of username and
+    email is checked against the snapshot of the import instead of by row.
+    """
+
+    class Meta(POSTUserSerializer.Meta):
+        extra_kwargs = {
+            'username': {'validators': []},
+            'email': {'validators': []},
+        }
+
+
+class UserImportSnapshot():
+    """
+    State of the organization the rows of an import are validated against, it
+    is read once by import.
+
+    Attributes:
+        locations (dict): group id by location id the requester can assign
+        groups (set): group ids the requester can assign
+        usernames (set): taken usernames
+        emails (set): taken emails
+        available_users (int|None): users that can be created, None without limit
+    """
+
+    def __init__(self, request, rows: list):
+
+        requester_level = request.user.user_level_permissions.level
+
+        locations = LocationModel.objects.all()
+        groups = GroupModel.objects.all()
+
+        if requester_level == UserLevelPermissionModel.UserLevelEnum.MANAGER:
+            group_ids = request.user.user_group_permissions.filter(
+                has_permission=True).values_list('group_id', flat=True)
+            locations = locations.filter(group__in=group_ids)
+            groups = groups.none()
+
+        self.locations = dict(locations.values_list('id', 'group_id'))
+        self.groups = set(groups.values_list('id', flat=True))
+
+        usernames = {row.get('username') for row in rows if row.get('username')}
+        emails = {row.get('email') for row in rows if row.get('email')}
+        self.usernames = set(UserModel.objects.filter(
+            username__in=usernames).values_list('username', flat=True))
+        self.emails = set(UserModel.objects.filter(
+            email__in=emails).values_list('email', flat=True))
+
+        organization = request.organization
+        price = get_price(organization.organization_subscription.last().price_id)
+
+        if price.plan_type == PriceModel.PriceTypeEnum.ENTERPRISE:
+            self.available_users = None
+        else:
+            # +1 to account for the admin user
+            self.available_users = max(
+                price.max_users + 1 - organization.user_organization.count(), 0)
+
+
+def parse_id_list(value):
+    """
+    :param value: list of ids or string separated by ';' (CSV)
+    :return: list of int ids
+    """
+
+    if value in (None, ''):
+        return []
+
+    if isinstance(value, str):
+        value = [item for item in value.split(';') if item.strip()]
+
+    return [int(item) for item in value]
+
+
+def read_import_rows(request):
+    """
+    Read the users of an import, a CSV file in 'file' or a json list in 'users'.
+    The CSV columns are the fields of the user, user_level, user_locations and
+    user_groups, the ids separated by ';'.
+
+    :param request: request object
+    :return: list of dicts
+    """
+
+    upload = request.FILES.get('file')
+
+    if upload is not None:
+        return list(csv.DictReader(io.TextIOWrapper(upload.file, encoding='utf-8-sig')))
+
+    users = request.data.get('users')
+
+    if not isinstance(users, list):
+        raise serializers.ValidationError(
+            {'detail': 'A CSV file or a list of users is required.'})
+
+    return users
+
+
+def validate_import_row(row: dict, requester_level: str, snapshot: UserImportSnapshot, seen: dict):
+    """
+    Validate a row with the rules of create_system_user.
+
+    :param row: user data
+    :param requester_level: level of the user that imports
+    :param snapshot: snapshot of the import
+    :param seen: usernames and emails of the previous rows
+    :return: tuple (validated data, user level, location ids, group ids, errors)
+    """
+
+    errors = {}
+    user_level = row.get('user_level')
+    user_locations = []
+    user_groups = []
+
+    serializer = BulkUserSerializer(data=row)
+
+    if not serializer.is_valid():
+        errors.update(serializer.errors)
+
+    username = row.get('username')
+    email = row.get('email')
+
+    if username in snapshot.usernames or username in seen['usernames']:
+        errors['username'] = ['A user with that username already exists.']
+
+    if email in snapshot.emails or email in seen['emails']:
+        errors['email'] = ['A user with that email already exists.']
+
+    try:
+        user_locations = parse_id_list(row.get('user_locations'))
+        user_groups = parse_id_list(row.get('user_groups'))
+    except (TypeError, ValueError):
+        errors['detail'] = 'User locations and groups must be integers.'
+        return None, user_level, user_locations, user_groups, errors
+
+    if user_level == UserLevelPermissionModel.UserLevelEnum.USER:
+
+        location_groups = {snapshot.locations.get(location_id) for location_id in user_locations}
+
+        if not user_locations or None in location_groups:
+            errors['user_locations'] = 'One or more locations are invalid or you do not have permission for them.'
+        elif len(location_groups) != 1 or (user_groups and user_groups != list(location_groups)):
+            errors['user_locations'] = 'All locations must belong to the single user group provided.'
+
+        user_groups = []
+
+    elif user_level == UserLevelPermissionModel.UserLevelEnum.MANAGER and requester_level == UserLevelPermissionModel.UserLevelEnum.ADMIN:
+
+        if user_locations:
+            errors['detail'] = 'You must include user groups or user locations, not both.'
+        elif not user_groups or not set(user_groups) <= snapshot.groups:
+            errors['user_groups'] = 'Some user groups are invalid.'
+
+    else:
+        errors['user_level'] = 'You do not have permission to create this user level.'
+
+    seen['usernames'].add(username)
+    seen['emails'].add(email)
+
+    return serializer.validated_data if not errors else None, user_level, user_locations, user_groups, errors
+
+
+def import_users(request):
+    """
+    Validate every row of an import against one snapshot of the organization
+    and create the valid users with their permissions in one transaction.
+    Nothing is created when a row has errors.
+
+    :param request: request object
+    :return: tuple (created users, errors by row)
+    """
+
+    rows = read_import_rows(request)
+
+    if len(rows) > settings.USER_IMPORT_MAX_ROWS:
+        raise serializers.ValidationError(
+            {'detail': f'An import can not have more than {settings.USER_IMPORT_MAX_ROWS} users.'})
+
+    requester_level = request.user.user_level_permissions.level
+    snapshot = UserImportSnapshot(request, rows)
+    seen = {'usernames': set(), 'emails': set()}
+
+    valid_rows = []
+    errors = []
+
+    for index, row in enumerate(rows, start=1):
+
+        validated_data, user_level, user_locations, user_groups, row_errors = validate_import_row(
+            row, requester_level, snapshot, seen)
+
+        if row_errors:
+            errors.append({'row': index, 'username': row.get('username'), 'errors': row_errors})
+        else:
+            valid_rows.append((validated_data, user_level, user_locations, user_groups))
+
+    if snapshot.available_users is not None and len(rows) > snapshot.available_users:
+        errors.append({'row': None, 'username': None, 'errors': {
+            'detail': f'User limit reached, {snapshot.available_users} users can be created.'}})
+
+    if errors:
+        return [], errors
+
+    passwords = hash_passwords(
+        [validated_data['password'] for validated_data, _, _, _ in valid_rows])
+
+    users = [
+        UserModel(**{**validated_data, 'password': password},
+                  organization=request.organization)
+        for (validated_data, _, _, _), password in zip(valid_rows, passwords)
+    ]
+
+    with transaction.atomic():
+
+        UserModel.objects.bulk_create(users, batch_size=500)
+
+        level_permissions = []
+        location_permissions = []
+        group_permissions = []
+
+        for user, (_, user_level, user_locations, user_groups) in zip(users, valid_rows):
+
+            level_permissions.append(UserLevelPermissionModel(user=user, level=user_level))
+            location_permissions.extend(
+                UserLocationPermissionModel(user=user, location_id=location_id, has_permission=True)
+                for location_id in user_locations)
+            group_permissions.extend(
+                UserGroupPermissionModel(user=user, group_id=group_id, has_permission=True)
+                for group_id in user_groups)
+
+        UserLevelPermissionModel.objects.bulk_create(level_permissions, batch_size=500)
+        UserLocationPermissionModel.objects.bulk_create(location_permissions, batch_size=500)
+        UserGroupPermissionModel.objects.bulk_create(group_permissions, batch_size=500)
+
+    return users, []
@@ -0,0 +1,75 @@
+from django.db.models import Exists, F, OuterRef, Q
+
+from feedback_tracking.administrative_system.users.models import UserModel
+from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel, UserLocationPermissionModel, UserGroupPermissionModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+# Fields matched by the search, every one has a prefix index on UserModel
+SEARCH_FIELDS = ('first_name', 'last_name', 'username', 'email')
+
+
+def get_users_queryset(organization):
+    """
+    Users of an organization with their permission level in the same query.
+
+    :param organization: organization of the users
+    :return: queryset annotated with permission_level
+    """
+
+    return UserModel.objects.filter(organization=organization).annotate(
+        permission_level=F('user_level_permissions__level'),
+    ).only(
+        'id', 'first_name', 'middle_name', 'last_name', 'email', 'created_at', 'is_active',
+    ).order_by('first_name', 'last_name', 'id')
+
+
+def has_location_in_groups(group_ids):
+    """
+    :param group_ids: ids of the groups
+    :return: condition of the users with a granted location in the groups
+    """
+
+    return Exists(UserLocationPermissionModel.objects.filter(
+        user=OuterRef('pk'), has_permission=True, location__group_id__in=group_ids))
+
+
+def filter_users(queryset, query_params):
+    """
+    Filter the users of the directory.
+
+    :param queryset: users queryset
+    :param query_params: search (prefix of name, username or email), level,
+        group and location
+    :return: filtered queryset
+    """
+
+    search = query_params.get('search', '').strip()
+    level = query_params.get('level')
+    group = query_params.get('group')
+    location = query_params.get('location')
+
+    if search:
+        # istartswith is UPPER(field) LIKE 'TERM%', the prefix indexes match it
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__istartswith': search})
+        queryset = queryset.filter(condition)
+
+    if level in UserLevelPermissionModel.UserLevelEnum.values:
+        queryset = queryset.filter(user_level_permissions__level=level)
+
+    if group and group.isdigit():
+        queryset = queryset.filter(
+            has_location_in_groups([int(group)]) |
+            Exists(UserGroupPermissionModel.objects.filter(
+                user=OuterRef('pk'), has_permission=True, group_id=int(group))))
+
+    if location and location.isdigit():
+        queryset = queryset.filter(Exists(UserLocationPermissionModel.objects.filter(
+            user=OuterRef('pk'), has_permission=True, location_id=int(location))))
+
+    return queryset
@@ -0,0 +1,71 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+# Below this number of passwords they are hashed in the request process
+MIN_ROWS_FOR_HASH_POOL = 8
+
+_hash_pool = None
+
+
+def get_hash_workers():
+    """
+    :return: processes of the pool, more than the CPUs would only add overhead
+    """
+
+    return min(settings.USER_IMPORT_HASH_WORKERS, os.cpu_count() or 1)
+
+
+def init_hash_worker():
+    """
+    Configure Django in the hashing workers, this module does not import
+    models so the workers can load it before the setup.
+    """
+
+    django.setup()
+
+
+def get_hash_pool():
+    """
+    :return: process pool of the password hashing, one by process
+    """
+
+    global _hash_pool
+
+    if _hash_pool is None:
+        # spawn, forking a process with the threads of the server is not safe
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=get_hash_workers(),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_hash_worker,
+        )
+
+    return _hash_pool
+
+
+def hash_passwords(passwords: list):
+    """
+    Hash the passwords, the hasher is CPU bound so big imports are spread on a
+    process pool.
+
+    :param passwords: raw passwords
+    :return: hashed passwords in the same order
+    """
+
+    workers = get_hash_workers()
+
+    if len(passwords) < MIN_ROWS_FOR_HASH_POOL or workers < 2:
+        return [make_password(password) for password in passwords]
+
+    chunksize = max(len(passwords) // (workers * 4), 1)
+
+    return list(get_hash_pool().map(make_password, passwords, chunksize=chunksize))
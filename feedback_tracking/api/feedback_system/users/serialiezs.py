@@ -1,8 +1,8 @@
 from rest_framework import serializers
 
 from feedback_tracking.administrative_system.users.models import UserModel
-from feedback_tracking.feedback_system.locations.models import LocationModel, GroupModel
-from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel, UserGroupPermissionModel, UserLocationPermissionModel
+from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel
+from feedback_tracking.feedback_system.permissions.sync import sync_location_permissions, sync_group_permissions
 
 
 __author__ = 'Ricardo'
@@ -21,7 +21,8 @@ class GETUsersSerializer(serializers.ModelSerializer):
             'first_name': instance.first_name,
             'middle_name': instance.middle_name,
             'last_name': instance.last_name,
-            'permission_level': instance.user_level_permissions.level,
+            # Annotated by get_users_queryset, avoids a query by user
+            'permission_level': getattr(instance, 'permission_level', None) or instance.user_level_permissions.level,
             'email': instance.email,
             'created_at': instance.created_at,
             'is_active': instance.is_active,
@@ -103,50 +104,19 @@ class PATCHUserDataSerializer(serializers.ModelSerializer):
             'is_active', instance.is_active)
         user_level_permission = instance.user_level_permissions
 
-        if user_groups:
-            # Eliminar permisos de grupos existentes
-            UserGroupPermissionModel.objects.filter(user=instance).delete()
-
-        if user_locations:
-            # Eliminar permisos de locaciones existentes
-            UserLocationPermissionModel.objects.filter(user=instance).delete()
-
+        # Only the differences with the current permissions are written
         if permission_level == UserLevelPermissionModel.UserLevelEnum.ADMIN:
 
             if user_locations:
-                # Crear los permisos nuevos
-                bulk_location_perms = [
-                    UserLocationPermissionModel(
-                        user=instance, location=LocationModel.objects.get(id=loc_id), has_permission=True)
-                    for loc_id in user_locations
-                ]
-                UserLocationPermissionModel.objects.bulk_create(
-                    bulk_location_perms)
-
-                for loc_id in user_locations:
-                    print(UserLocationPermissionModel(
-                        user=instance, location=LocationModel.objects.get(id=loc_id), has_permission=True))
+                sync_location_permissions(instance, user_locations)
 
             if user_groups:
-                # Crear los permisos nuevos
-                bulk_group_perms = [
-                    UserGroupPermissionModel(
-                        user=instance, group=GroupModel.objects.get(id=group_id), has_permission=True)
-                    for group_id in user_groups
-                ]
-                UserGroupPermissionModel.objects.bulk_create(bulk_group_perms)
+                sync_group_permissions(instance, user_groups)
 
         elif permission_level == UserLevelPermissionModel.UserLevelEnum.MANAGER:
 
             if user_locations:
-                # Crear los permisos nuevos
-                bulk_location_perms = [
-                    UserLocationPermissionModel(
-                        user=instance, location_id=loc_id, has_permission=True)
-                    for loc_id in user_locations
-                ]
-                UserLocationPermissionModel.objects.bulk_create(
-                    bulk_location_perms)
+                sync_location_permissions(instance, user_locations)
 
         user_level_permission.level = user_level
         user_level_permission.save()
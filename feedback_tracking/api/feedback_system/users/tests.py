@@ -1,3 +1,161 @@
-from django.test import TestCase
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel
+from .bulk_import import parse_id_list, validate_import_row
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+ADMIN = UserLevelPermissionModel.UserLevelEnum.ADMIN
+MANAGER = UserLevelPermissionModel.UserLevelEnum.MANAGER
+USER = UserLevelPermissionModel.UserLevelEnum.USER
+
+
+class ParseIdListTests(SimpleTestCase):
+
+    def test_empty(self):
+
+        self.assertEqual(parse_id_list(None), [])
+        self.assertEqual(parse_id_list(''), [])
+        self.assertEqual(parse_id_list([]), [])
+
+    def test_csv_string(self):
+
+        self.assertEqual(parse_id_list('1;2; 3;'), [1, 2, 3])
+
+    def test_list(self):
+
+        self.assertEqual(parse_id_list([4, '5']), [4, 5])
+
+    def test_invalid(self):
+
+        with self.assertRaises(ValueError):
+            parse_id_list('1;a')
+
+
+class ValidateImportRowTests(SimpleTestCase):
+
+    def setUp(self):
+
+        # Locations 1 and 2 belong to group 10, location 3 to group 20
+        self.snapshot = SimpleNamespace(
+            locations={1: 10, 2: 10, 3: 20},
+            groups={10, 20},
+            usernames={'taken'},
+            emails={'taken@test.com'},
+        )
+        self.seen = {'usernames': set(), 'emails': set()}
+
+    def get_row(self, **kwargs):
+
+        row = {
+            'first_name': 'Ana',
+            'middle_name': 'Maria',
+            'last_name': 'Lopez',
+            'username': 'alopez',
+            'email': 'alopez@test.com',
+            'password': 'S3cure-password',
+            'user_level': USER,
+            'user_locations': '1;2',
+        }
+        row.update(kwargs)
+
+        return row
+
+    def validate(self, row, requester_level=ADMIN):
+
+        return validate_import_row(row, requester_level, self.snapshot, self.seen)
+
+    def test_valid_user(self):
+
+        data, user_level, user_locations, user_groups, errors = self.validate(self.get_row())
+
+        self.assertEqual(errors, {})
+        self.assertEqual(data['username'], 'alopez')
+        self.assertEqual(user_level, USER)
+        self.assertEqual(user_locations, [1, 2])
+        self.assertEqual(user_groups, [])
+        self.assertEqual(self.seen, {'usernames': {'alopez'}, 'emails': {'alopez@test.com'}})
+
+    def test_valid_manager(self):
+
+        data, _, user_locations, user_groups, errors = self.validate(
+            self.get_row(user_level=MANAGER, user_locations='', user_groups='10;20'))
+
+        self.assertEqual(errors, {})
+        self.assertEqual(user_locations, [])
+        self.assertEqual(user_groups, [10, 20])
+
+    def test_taken_username_and_email(self):
+
+        data, *_, errors = self.validate(self.get_row(username='taken', email='taken@test.com'))
+
+        self.assertIsNone(data)
+        self.assertIn('username', errors)
+        self.assertIn('email', errors)
+
+    def test_duplicated_in_import(self):
+
+        self.validate(self.get_row())
+        data, *_, errors = self.validate(self.get_row())
+
+        self.assertIsNone(data)
+        self.assertIn('username', errors)
+        self.assertIn('email', errors)
+
+    def test_invalid_ids(self):
+
+        data, *_, errors = self.validate(self.get_row(user_locations='1;x'))
+
+        self.assertIsNone(data)
+        self.assertEqual(errors['detail'], 'User locations and groups must be integers.')
+
+    def test_user_unknown_location(self):
+
+        *_, errors = self.validate(self.get_row(user_locations='1;99'))
+
+        self.assertIn('user_locations', errors)
+
+    def test_user_locations_of_several_groups(self):
+
+        *_, errors = self.validate(self.get_row(user_locations='1;3'))
+
+        self.assertEqual(errors['user_locations'],
+                         'All locations must belong to the single user group provided.')
+
+    def test_user_group_not_matching_locations(self):
+
+        *_, errors = self.validate(self.get_row(user_groups='20'))
+
+        self.assertIn('user_locations', errors)
+
+    def test_manager_with_locations(self):
+
+        *_, errors = self.validate(self.get_row(user_level=MANAGER, user_groups='10'))
+
+        self.assertEqual(errors['detail'], 'You must include user groups or user locations, not both.')
+
+    def test_manager_unknown_group(self):
+
+        *_, errors = self.validate(self.get_row(user_level=MANAGER, user_locations='', user_groups='30'))
+
+        self.assertIn('user_groups', errors)
+
+    def test_manager_can_not_create_manager(self):
+
+        *_, errors = self.validate(
+            self.get_row(user_level=MANAGER, user_locations='', user_groups='10'), requester_level=MANAGER)
+
+        self.assertIn('user_level', errors)
+
+    def test_invalid_fields(self):
+
+        data, *_, errors = self.validate(self.get_row(email='not an email', first_name=''))
+
+        self.assertIsNone(data)
+        self.assertIn('email', errors)
+        self.assertIn('first_name', errors)
@@ -9,6 +9,9 @@ __version__ = '0.1'
 urlpatterns = [
     path('', views.get_users, name='get_users'),
     path('user/', views.create_system_user, name='create_user'),
+    path('import/', views.import_system_users, name='import_users'),
+    path('permissions/bulk/', views.bulk_update_permissions,
+         name='bulk_update_permissions'),
     path('user/<int:user_id>/', views.get_user, name='get_user'),
     path('user-delete/<int:user_id>/', views.delete_user, name='delete_user'),
     path('user-update/<int:user_id>/', views.update_user, name='update_user'),
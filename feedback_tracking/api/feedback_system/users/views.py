@@ -11,6 +11,10 @@ from feedback_tracking.api.permissions import BelongsToOrganizationPermission, C
 from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel, UserLocationPermissionModel, UserGroupPermissionModel
 from feedback_tracking.feedback_system.locations.models import LocationModel, GroupModel
 from feedback_tracking.administrative_system.users.models import UserModel
+from .bulk_import import import_users
+from .filters import get_users_queryset, filter_users, has_location_in_groups
+from feedback_tracking.feedback_system.permissions.cache import get_granted_group_ids
+from feedback_tracking.feedback_system.permissions.sync import bulk_assign_permissions, bulk_revoke_permissions
 from .serialiezs import GETUsersSerializer, GETUserSerializer, POSTUserSerializer, PATCHUserDataSerializer, PATCHUserAccountSerializer, PATCHUserPasswordSerializer
 
 
@@ -51,6 +55,10 @@ def get_users(request, portal):
     If the user is an admin, they will see all users in the organization.
 
     :param request: request object
+    :param search: prefix of the name, username or email
+    :param level: permission level
+    :param group: group id of the permissions
+    :param location: location id of the permissions
     :return: list of users
     """
 
@@ -63,25 +71,19 @@ def get_users(request, portal):
 
     elif request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.MANAGER:
 
-        permission_ids = request.user.user_group_permissions.filter(
-            has_permission=True).values_list('group_id', flat=True)
-
-        locations = LocationModel.objects.filter(
-            group__in=permission_ids).values_list('id', flat=True)
+        group_ids = get_granted_group_ids(request.user)
 
-        users = UserModel.objects.filter(
-            user_location_permissions__location_id__in=locations,
-            user_location_permissions__has_permission=True,
+        # EXISTS instead of joining the permissions and locations with DISTINCT
+        users = get_users_queryset(request.user.organization).filter(
+            has_location_in_groups(group_ids),
             user_level_permissions__level=UserLevelPermissionModel.UserLevelEnum.USER,
         ).exclude(
             id=request.user.id
-        ).distinct()
+        )
 
     elif request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.ADMIN:
 
-        users = UserModel.objects.filter(
-            organization=request.user.organization,
-        ).exclude(
+        users = get_users_queryset(request.user.organization).exclude(
             Q(user_level_permissions__level=UserLevelPermissionModel.UserLevelEnum.ADMIN) |
             Q(id=request.user.id)
         )
@@ -91,6 +93,8 @@ def get_users(request, portal):
             status=status.HTTP_403_FORBIDDEN
         )
 
+    users = filter_users(users, request.query_params)
+
     paginator.page_size = int(request.query_params.get('page_size', 30))
     result_page = paginator.paginate_queryset(users, request)
     serializer = GETUsersSerializer(result_page, many=True)
@@ -544,6 +548,142 @@ def create_system_user(request, portal):
     return Response(GETUserSerializer(instance).data, status=status.HTTP_201_CREATED)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
+def import_system_users(request, portal):
+    """
+    This endpoint is used to create many users in the organization from a CSV
+    file or a json list, e.g. to onboard a customer.
+    The rules of create_system_user apply to every row, the rows are validated
+    together and no user is created when one of them has errors.
+
+    :param request: request object
+    :param portal: portal name
+    :param file: CSV file with the users
+    :param users: list of users, used when there is no file
+    :return: created users or the errors by row
+    """
+
+    if request.user.user_level_permissions.level == UserLevelPermissionModel.UserLevelEnum.USER:
+        return Response(
+            data={'detail': 'You do not have permission to access this resource.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    users, errors = import_users(request)
+
+    if errors:
+        return Response(data={'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(
+        data={'created': len(users), 'users': [
+            {'id': user.id, 'username': user.username} for user in users]},
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, BelongsToOrganizationPermission])
+def bulk_update_permissions(request, portal):
+    """
+    This endpoint is used to assign or revoke location or group permissions of many users at once.
+    If the user is a regular user, they will not have access to this endpoint.
+    If the user is a manager, they can only change locations of their groups for users in their groups.
+    If the user is an admin, they can change locations of users and groups of managers.
+
+    :param request: request object
+    :param portal: portal name
+    :param action: assign or revoke
+    :param users: user ids
+    :param user_locations: location ids, for users
+    :param user_groups: group ids, for managers
+    :return: number of changed permissions
+    """
+
+    action = request.data.get('action', None)
+    user_ids = request.data.get('users', [])
+    user_locations = request.data.get('user_locations', [])
+    user_groups = request.data.get('user_groups', [])
+    requester_level = request.user.user_level_permissions.level
+
+    if requester_level == UserLevelPermissionModel.UserLevelEnum.USER:
+        return Response(
+            data={'detail': 'You do not have permission to access this resource.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    if action not in ('assign', 'revoke'):
+        return Response(data={'detail': 'Action must be assign or revoke.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if bool(user_locations) == bool(user_groups):
+        return Response(
+            data={'detail': 'You must include user groups or user locations, not both.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        user_ids = set(map(int, user_ids))
+        user_locations = set(map(int, user_locations))
+        user_groups = set(map(int, user_groups))
+    except (TypeError, ValueError):
+        return Response({'detail': 'users, user_locations and user_groups must be lists of integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not user_ids:
+        return Response(data={'detail': 'Users are required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Scope of the requester, compared as sets
+    target_level = UserLevelPermissionModel.UserLevelEnum.USER if user_locations else UserLevelPermissionModel.UserLevelEnum.MANAGER
+    users = get_users_queryset(request.organization).filter(
+        id__in=user_ids, user_level_permissions__level=target_level)
+
+    if requester_level == UserLevelPermissionModel.UserLevelEnum.MANAGER:
+
+        if user_groups:
+            return Response(data={'detail': 'You do not have permission to change user groups.'}, status=status.HTTP_403_FORBIDDEN)
+
+        group_ids = get_granted_group_ids(request.user)
+        valid_locations = LocationModel.objects.filter(
+            group__in=group_ids, id__in=user_locations).values_list('id', flat=True)
+        users = users.filter(has_location_in_groups(group_ids))
+
+    else:
+
+        if user_locations:
+            valid_locations = LocationModel.objects.filter(
+                id__in=user_locations).values_list('id', flat=True)
+        else:
+            valid_groups = GroupModel.objects.filter(
+                id__in=user_groups).values_list('id', flat=True)
+            invalid_ids = user_groups - set(valid_groups)
+
+            if invalid_ids:
+                return Response(data={'detail': f'Invalid group ID(s): {invalid_ids}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if user_locations:
+        invalid_ids = user_locations - set(valid_locations)
+
+        if invalid_ids:
+            return Response(data={'detail': f'Invalid location ID(s): {invalid_ids}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    invalid_ids = user_ids - set(users.values_list('id', flat=True))
+
+    if invalid_ids:
+        return Response(data={'detail': f'Invalid user ID(s): {invalid_ids}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if user_locations:
+        model, field, related_ids = UserLocationPermissionModel, 'location', user_locations
+    else:
+        model, field, related_ids = UserGroupPermissionModel, 'group', user_groups
+
+    if action == 'assign':
+        created, granted = bulk_assign_permissions(model, field, user_ids, related_ids)
+        data = {'created': created, 'granted': granted}
+    else:
+        data = {'removed': bulk_revoke_permissions(model, field, user_ids, related_ids)}
+
+    return Response(data=data, status=status.HTTP_200_OK)
+
+
 def create_user(request, user_level, user_locations, user_groups):
     """
     This function creates a user based on the user level and permissions provided.
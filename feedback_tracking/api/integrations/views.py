@@ -3,7 +3,7 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from feedback_tracking.singletons.stripe_singleton import StripeSingleton
+from feedback_tracking.administrative_system.organizations.price_catalog import get_price_catalog, etag_matches
 
 
 __author__ = 'Ricardo'
@@ -19,7 +19,15 @@ class PricesView(APIView):
 
     def get(self, request, *args, **kwargs):
         """
-        Returns the prices of the plans available in Stripe.
+        Returns the prices of the plans available in Stripe, they are served
+        from the price catalog (see sync_prices) without querying the database.
+
+        :return: prices with their limits, 304 when If-None-Match has the ETag
         """
 
-        return Response(status=status.HTTP_200_OK)
+        catalog = get_price_catalog()
+
+        if etag_matches(request, catalog.etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': catalog.etag})
+
+        return Response(data=catalog.data, status=status.HTTP_200_OK, headers={'ETag': catalog.etag})
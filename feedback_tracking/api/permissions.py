@@ -1,11 +1,11 @@
-from django.utils import timezone
-
 from rest_framework import permissions
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import PermissionDenied
 
 from feedback_tracking.administrative_system.organizations.models import PriceModel
+from feedback_tracking.administrative_system.organizations.price_catalog import get_price
 from feedback_tracking.feedback_system.feedbacks.models import FeedbackModel
+from feedback_tracking.feedback_system.feedbacks.partitions import get_month_start, add_months
 from feedback_tracking.feedback_system.locations.models import LocationModel
 from feedback_tracking.feedback_system.permissions.models import UserLevelPermissionModel
 
@@ -54,10 +54,10 @@ class CanCreateLocationUnderPricingLimitPermission(BasePermission):
 
         organization = request.organization
         subscription = organization.organization_subscription.last()
-        price_limit = subscription.price.price_limit
+        price = get_price(subscription.price_id)
         all_locations = LocationModel.objects.all().count()
 
-        if all_locations < price_limit.max_locations:
+        if all_locations < price.max_locations:
             return True
         else:
             raise PermissionDenied(
@@ -74,17 +74,16 @@ class CanCreateLocationUnderPricingLimitPermission(BasePermission):
 
         organization = request.organization
         subscription = organization.organization_subscription.last()
-        price = subscription.price
+        price = get_price(subscription.price_id)
 
         # Enterprise plan has no limits
         if price.plan_type == PriceModel.PriceTypeEnum.ENTERPRISE:
             return True
 
-        price_limit = price.price_limit
         all_locations = LocationModel.objects.all()
 
         # Check if the number of locations is below the limit
-        if all_locations.count() < price_limit.max_locations:
+        if all_locations.count() < price.max_locations:
             return True
         else:
             raise PermissionDenied(
@@ -101,21 +100,21 @@ class CanCreateFeedbackUnderPricingLimitPermission(BasePermission):
 
         organization = request.organization
         subscription = organization.organization_subscription.last()
-        price = subscription.price
+        price = get_price(subscription.price_id)
 
         # Enterprise plan has no limits
         if price.plan_type == PriceModel.PriceTypeEnum.ENTERPRISE:
             return True
 
-        now = timezone.now()
+        # A range on created_at only scans the partition of the current month
+        month_start = get_month_start()
         all_feedbacks = FeedbackModel.objects.filter(
-            created_at__year=now.year,
-            created_at__month=now.month
+            created_at__gte=month_start,
+            created_at__lt=add_months(month_start, 1)
         )
-        price_limit = price.price_limit
 
         # Check if the number of feedbacks is below the limit
-        if all_feedbacks.count() < price_limit.max_feedbacks:
+        if all_feedbacks.count() < price.max_feedbacks:
             return True
         else:
             raise PermissionDenied(
@@ -132,17 +131,16 @@ class CanCreateUserUnderPricingLimitPermission(BasePermission):
 
         organization = request.organization
         subscription = organization.organization_subscription.last()
-        price = subscription.price
+        price = get_price(subscription.price_id)
 
         # Enterprise plan has no limits
         if price.plan_type == PriceModel.PriceTypeEnum.ENTERPRISE:
             return True
 
         all_users = organization.user_organization.all()
-        price_limit = price.price_limit
 
         # +1 to account for the admin user
-        if all_users.count() < price_limit.max_users+1:
+        if all_users.count() < price.max_users+1:
             return True
         else:
             raise PermissionDenied(
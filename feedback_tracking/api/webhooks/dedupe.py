@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def get_delivery_cache_key(stripe_event_id: str):
+    """
+    :param stripe_event_id: id of the event in Stripe
+    :return: cache key of the event deliveries
+    """
+
+    return f'stripe:event:{stripe_event_id}'
+
+
+def is_duplicate_delivery(stripe_event_id: str):
+    """
+    Check if an event was delivered in the last STRIPE_EVENT_DEDUPE_SECONDS and
+    mark it as delivered. The unique stripe_event_id of the inbox catches the
+    redeliveries that arrive after the cache entry expired.
+
+    :param stripe_event_id: id of the event in Stripe
+    :return: True if the event was already delivered
+    """
+
+    return not cache.add(get_delivery_cache_key(stripe_event_id), 1,
+                         settings.STRIPE_EVENT_DEDUPE_SECONDS)
+
+
+def forget_delivery(stripe_event_id: str):
+    """
+    Forget a delivery that could not be stored, so the redelivery is accepted.
+
+    :param stripe_event_id: id of the event in Stripe
+    """
+
+    cache.delete(get_delivery_cache_key(stripe_event_id))
@@ -0,0 +1,290 @@
+import json
+import time
+import uuid
+import logging
+import threading
+from urllib.parse import parse_qsl, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+# Resources served by the fake server: path -> (object name, id prefix)
+FAKE_STRIPE_RESOURCES = {
+    'customers': ('customer', 'cus'),
+    'subscriptions': ('subscription', 'sub'),
+    'checkout/sessions': ('checkout.session', 'cs_test'),
+    'products': ('product', 'prod'),
+    'prices': ('price', 'price'),
+}
+
+
+def new_stripe_id(prefix: str):
+    """
+    :param prefix: prefix of the Stripe object, e.g. cus
+    :return: new id like the ones of Stripe
+    """
+
+    return f'{prefix}_{uuid.uuid4().hex[:24]}'
+
+
+def parse_form(body: str):
+    """
+    Parse a form encoded Stripe request, e.g. metadata[organization_id]=1 or
+    line_items[0][price]=price_1.
+
+    :param body: body of the request
+    :return: dict with the nested parameters
+    """
+
+    params = {}
+
+    for key, value in parse_qsl(body, keep_blank_values=True):
+
+        parts = key.replace(']', '').split('[')
+        node = params
+
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+
+        node[parts[-1]] = value
+
+    def to_lists(node):
+
+        if not isinstance(node, dict):
+            return node
+
+        if node and all(key.isdigit() for key in node):
+            return [to_lists(node[key]) for key in sorted(node, key=int)]
+
+        return {key: to_lists(value) for key, value in node.items()}
+
+    return to_lists(params)
+
+
+class FakeStripeState():
+    """
+    In-memory objects of the fake server.
+
+    Objects that are not found are created on the fly when lenient is True, so
+    events built by stripe_fixtures can reference ids the server never saw.
+    """
+
+    def __init__(self, lenient: bool = True):
+
+        self.lenient = lenient
+        self.objects = {resource: {} for resource in FAKE_STRIPE_RESOURCES}
+        self.lock = threading.Lock()
+
+    def build(self, resource: str, params: dict, stripe_id: str = None):
+
+        object_name, prefix = FAKE_STRIPE_RESOURCES[resource]
+
+        stripe_object = {
+            'id': stripe_id or new_stripe_id(prefix),
+            'object': object_name,
+            'created': int(time.time()),
+            'livemode': False,
+            'metadata': {},
+        }
+
+        if resource == 'subscriptions':
+            stripe_object['status'] = 'active'
+            stripe_object['items'] = {'object': 'list', 'data': [
+                {'price': {'id': item.get('price')}} for item in params.pop('items', [])
+            ]}
+
+        elif resource == 'checkout/sessions':
+            stripe_object['url'] = f'https://checkout.stripe.test/{stripe_object["id"]}'
+            stripe_object['subscription'] = None
+
+        elif resource in ('products', 'prices'):
+            stripe_object['active'] = True
+
+            if resource == 'prices':
+                stripe_object['type'] = 'recurring' if 'recurring' in params else 'one_time'
+                stripe_object['unit_amount'] = int(params.pop('unit_amount', 0))
+
+        stripe_object.update(params)
+
+        return stripe_object
+
+    def create(self, resource: str, params: dict):
+
+        stripe_object = self.build(resource, params)
+
+        with self.lock:
+            self.objects[resource][stripe_object['id']] = stripe_object
+
+        return stripe_object
+
+    def retrieve(self, resource: str, stripe_id: str):
+
+        with self.lock:
+
+            stripe_object = self.objects[resource].get(stripe_id)
+
+            if stripe_object is None and self.lenient:
+                stripe_object = self.build(resource, {}, stripe_id)
+                self.objects[resource][stripe_id] = stripe_object
+
+        return stripe_object
+
+    def update(self, resource: str, stripe_id: str, params: dict):
+
+        stripe_object = self.retrieve(resource, stripe_id)
+
+        if stripe_object is None:
+            return None
+
+        with self.lock:
+            metadata = params.pop('metadata', {})
+            stripe_object.update(params)
+            stripe_object['metadata'].update(metadata)
+
+        return stripe_object
+
+    def list(self, resource: str, filters: dict):
+
+        with self.lock:
+            return [
+                stripe_object for stripe_object in self.objects[resource].values()
+                if all(json.dumps(stripe_object.get(key)).strip('"') == value for key, value in filters.items()
+                       if key not in ('limit', 'starting_after', 'ending_before')
+                       and '[' not in key and value != 'all')
+            ]
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    """
+    Handler of the Stripe API calls done by the project: Customer, Subscription,
+    checkout Session, Product and Price. Webhook signatures are computed locally by the Stripe
+    library, see stripe_fixtures.sign_payload.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written apart, keep-alive calls would wait for the delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def send_json(self, status_code: int, data: dict):
+
+        body = json.dumps(data).encode()
+
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Request-Id', new_stripe_id('req'))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_not_found(self, path: str):
+
+        self.send_json(404, {'error': {
+            'type': 'invalid_request_error',
+            'message': f'No such resource: {path}',
+        }})
+
+    def route(self):
+        """
+        :return: tuple (resource, object id or None, query params) or None
+        """
+
+        url = urlsplit(self.path)
+        path = url.path.removeprefix('/v1/').strip('/')
+
+        for resource in FAKE_STRIPE_RESOURCES:
+
+            if path == resource:
+                return resource, None, dict(parse_qsl(url.query))
+
+            if path.startswith(f'{resource}/') and '/' not in path[len(resource) + 1:]:
+                return resource, path[len(resource) + 1:], dict(parse_qsl(url.query))
+
+        return None
+
+    def read_params(self):
+
+        length = int(self.headers.get('Content-Length') or 0)
+
+        return parse_form(self.rfile.read(length).decode()) if length else {}
+
+    def handle_call(self, method: str):
+
+        delay = self.server.latency_ms / 1000
+
+        if delay:
+            time.sleep(delay)
+
+        routed = self.route()
+
+        if routed is None:
+            return self.send_not_found(self.path)
+
+        resource, stripe_id, query = routed
+        state = self.server.state
+        params = self.read_params() if method == 'POST' else {}
+
+        if stripe_id is None:
+
+            if method == 'POST':
+                return self.send_json(200, state.create(resource, params))
+
+            return self.send_json(200, {
+                'object': 'list',
+                'url': f'/v1/{resource}',
+                'has_more': False,
+                'data': state.list(resource, query),
+            })
+
+        if method == 'GET':
+            stripe_object = state.retrieve(resource, stripe_id)
+        elif method == 'POST':
+            stripe_object = state.update(resource, stripe_id, params)
+        elif resource == 'subscriptions':
+            stripe_object = state.update(
+                resource, stripe_id, {'status': 'canceled'})
+        else:
+            stripe_object = state.retrieve(resource, stripe_id)
+            stripe_object = stripe_object and {
+                'id': stripe_id, 'object': stripe_object['object'], 'deleted': True}
+
+        if stripe_object is None:
+            return self.send_not_found(self.path)
+
+        self.send_json(200, stripe_object)
+
+    def do_GET(self):
+        self.handle_call('GET')
+
+    def do_POST(self):
+        self.handle_call('POST')
+
+    def do_DELETE(self):
+        self.handle_call('DELETE')
+
+
+def create_fake_stripe_server(host: str = '127.0.0.1', port: int = 12111, latency_ms: int = 0, lenient: bool = True):
+    """
+    Create the fake Stripe server, point STRIPE_API_BASE to it to use it.
+
+    :param host: host to listen on
+    :param port: port to listen on, 0 to pick a free one
+    :param latency_ms: delay added to every call
+    :param lenient: create the objects that are not found
+    :return: ThreadingHTTPServer, call serve_forever() to run it
+    """
+
+    server = ThreadingHTTPServer((host, port), FakeStripeHandler)
+    server.daemon_threads = True
+    server.state = FakeStripeState(lenient=lenient)
+    server.latency_ms = latency_ms
+
+    return server
@@ -0,0 +1,267 @@
+import json
+import random
+import threading
+import time
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from celery import current_app
+from django.conf import settings
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from feedback_tracking.administrative_system.organizations.models import SubscriptionModel
+from feedback_tracking.singletons.stripe_singleton import StripeSingleton
+from feedback_tracking.api.webhooks.fake_stripe import create_fake_stripe_server
+from feedback_tracking.api.webhooks.stripe_fixtures import (
+    build_signed_event, build_invoice, build_subscription, build_card_payment_method)
+from feedback_tracking.api.webhooks.views import StripeWebhookView
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+EVENT_TYPES = [
+    'invoice.payment_succeeded',
+    'customer.subscription.updated',
+    'payment_method.attached',
+]
+
+
+class Command(BaseCommand):
+
+    help = ('Replay signed invoice.payment_succeeded, customer.subscription.updated and '
+            'payment_method.attached events against StripeWebhookView and report the '
+            'events per second and the latency.')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--events', type=int, default=3000,
+                            help='Total number of events to send.')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Number of concurrent senders.')
+        parser.add_argument('--redeliveries', type=float, default=0.0,
+                            help='Fraction of the events that are delivered twice.')
+        parser.add_argument('--url',
+                            help='Send the events over HTTP to a running server instead of '
+                                 'calling the view in this process.')
+        parser.add_argument('--eager', action='store_true',
+                            help='Run the event handlers inside the request instead of queuing them.')
+        parser.add_argument('--fake-stripe', action='store_true',
+                            help='Point the Stripe client to a fake server started by the command.')
+        parser.add_argument('--json', action='store_true',
+                            help='Print the result as json.')
+        parser.add_argument('--i-know-this-writes', action='store_true', dest='allow_writes',
+                            help='Required, the events update the subscriptions, invoices and payment '
+                                 'methods they are built for. It only runs with DEBUG or on a test database.')
+
+    def handle(self, *args, **options):
+
+        self.check_can_write(options['allow_writes'])
+
+        subscriptions = list(SubscriptionModel.objects.select_related('organization', 'price').filter(
+            stripe_subscription_id__isnull=False,
+            organization__stripe_customer_id__isnull=False,
+        )[:500])
+
+        if not subscriptions:
+            raise CommandError(
+                'There are no subscriptions with Stripe ids to build the events for.')
+
+        if options['fake_stripe']:
+            self.start_fake_stripe()
+
+        if options['eager']:
+            current_app.conf.task_always_eager = True
+
+        deliveries = self.build_deliveries(
+            subscriptions, options['events'], options['redeliveries'])
+
+        send = self.get_sender(options['url'])
+
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            samples = list(executor.map(send, deliveries))
+
+        elapsed = time.perf_counter() - start
+
+        result = self.summarize(samples, elapsed, options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.print_result(result)
+
+    def check_can_write(self, allow_writes):
+        """
+        The events are built for the subscriptions of the database and their
+        handlers change the billing state, the benchmark must never run
+        against production data.
+        """
+
+        if not allow_writes:
+            raise CommandError(
+                'The events change the billing state of the subscriptions, pass --i-know-this-writes to run it.')
+
+        if not (settings.DEBUG or connection.settings_dict['NAME'].startswith('test_')):
+            raise CommandError(
+                'The benchmark only runs with DEBUG or on a test database.')
+
+    def start_fake_stripe(self):
+        """
+        Start the fake Stripe server in a thread and point the client to it.
+        """
+
+        server = create_fake_stripe_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        StripeSingleton().api_base = f'http://127.0.0.1:{server.server_port}'
+
+    def build_deliveries(self, subscriptions, total_events, redeliveries):
+        """
+        Build the signed events round-robin over the event types and the
+        subscriptions.
+
+        :param subscriptions: subscriptions the events are about
+        :param total_events: number of deliveries
+        :param redeliveries: fraction of the events delivered twice
+        :return: list of tuples (event type, payload, signature)
+        """
+
+        deliveries = []
+        secret = settings.STRIPE_SIGNING_SECRET
+
+        while len(deliveries) < total_events:
+
+            i = len(deliveries)
+            event_type = EVENT_TYPES[i % len(EVENT_TYPES)]
+            subscription = subscriptions[i % len(subscriptions)]
+
+            customer_id = subscription.organization.stripe_customer_id
+            unit_amount = int(subscription.price.amount * 100)
+
+            if event_type == 'invoice.payment_succeeded':
+                data_object = build_invoice(
+                    customer_id, subscription.stripe_subscription_id,
+                    subscription.price.stripe_price_id, unit_amount)
+            elif event_type == 'customer.subscription.updated':
+                data_object = build_subscription(
+                    customer_id, subscription.stripe_subscription_id,
+                    subscription.price.stripe_price_id, unit_amount)
+            else:
+                data_object = build_card_payment_method(customer_id)
+
+            payload, signature = build_signed_event(
+                event_type, data_object, secret)
+            deliveries.append((event_type, payload, signature))
+
+            if random.random() < redeliveries and len(deliveries) < total_events:
+                deliveries.append((event_type, payload, signature))
+
+        return deliveries
+
+    def get_sender(self, url):
+        """
+        :param url: url of the webhook, None to call the view in this process
+        :return: function that sends a delivery and returns (event type, status, ms)
+        """
+
+        local = threading.local()
+
+        if url:
+
+            def send(delivery):
+
+                event_type, payload, signature = delivery
+
+                if not hasattr(local, 'session'):
+                    local.session = requests.Session()
+
+                start = time.perf_counter()
+                response = local.session.post(url, data=payload, headers={
+                    'Content-Type': 'application/json', 'Stripe-Signature': signature})
+
+                return event_type, response.status_code, (time.perf_counter() - start) * 1000
+
+            return send
+
+        factory = RequestFactory()
+        view = StripeWebhookView.as_view()
+
+        def send(delivery):
+
+            event_type, payload, signature = delivery
+
+            request = factory.post('/webhooks/stripe-webhook/', data=payload,
+                                   content_type='application/json',
+                                   HTTP_STRIPE_SIGNATURE=signature)
+
+            start = time.perf_counter()
+
+            try:
+                response = view(request)
+            except Exception:
+                return event_type, 500, (time.perf_counter() - start) * 1000
+
+            return event_type, response.status_code, (time.perf_counter() - start) * 1000
+
+        return send
+
+    def summarize(self, samples, elapsed, options):
+        """
+        :param samples: list of tuples (event type, status, ms)
+        :param elapsed: seconds the benchmark took
+        :param options: command options
+        :return: dict with the benchmark result
+        """
+
+        def latency(values):
+
+            values = sorted(values)
+            percentiles = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+
+            return {
+                'count': len(values),
+                'p50_ms': round(percentiles[49], 2),
+                'p99_ms': round(percentiles[98], 2),
+            }
+
+        return {
+            'target': options['url'] or 'StripeWebhookView (in process)',
+            'eager': options['eager'],
+            'events': len(samples),
+            'concurrency': options['concurrency'],
+            'events_per_second': round(len(samples) / elapsed, 1),
+            'errors': sum(1 for sample in samples if sample[1] != 200),
+            **latency([sample[2] for sample in samples]),
+            'by_type': {
+                event_type: latency([sample[2] for sample in samples if sample[0] == event_type])
+                for event_type in EVENT_TYPES
+                if any(sample[0] == event_type for sample in samples)
+            },
+        }
+
+    def print_result(self, result):
+
+        self.stdout.write(
+            f"{result['events']} events to {result['target']} with {result['concurrency']} "
+            f"senders{' (handlers run inline)' if result['eager'] else ''}")
+        self.stdout.write(
+            f"  {result['events_per_second']} events/s | p50 {result['p50_ms']} ms | "
+            f"p99 {result['p99_ms']} ms")
+
+        for event_type, stats in result['by_type'].items():
+            self.stdout.write(
+                f"  {event_type}: {stats['count']} events | p50 {stats['p50_ms']} ms | "
+                f"p99 {stats['p99_ms']} ms")
+
+        if result['errors']:
+            self.stdout.write(self.style.ERROR(
+                f"  {result['errors']} deliveries were not acknowledged with 200"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                '  every delivery was acknowledged'))
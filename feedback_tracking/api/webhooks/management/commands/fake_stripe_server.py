@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from feedback_tracking.api.webhooks.fake_stripe import create_fake_stripe_server
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class Command(BaseCommand):
+
+    help = ('Run a local stand-in of the Stripe API (Customer, Subscription and checkout '
+            'Session), set STRIPE_API_BASE to its url to use it.')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=12111)
+        parser.add_argument('--latency-ms', type=int, default=0,
+                            help='Delay added to every call to simulate the network.')
+        parser.add_argument('--strict', action='store_true',
+                            help='Answer 404 for unknown objects instead of creating them.')
+
+    def handle(self, *args, **options):
+
+        server = create_fake_stripe_server(
+            options['host'], options['port'], options['latency_ms'], not options['strict'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Fake Stripe listening on http://{options["host"]}:{server.server_port}'))
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
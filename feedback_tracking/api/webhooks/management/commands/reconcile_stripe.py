@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from feedback_tracking.api.webhooks.reconciliation import reconcile_stripe
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class Command(BaseCommand):
+
+    help = 'Compare the subscriptions, organizations and invoices with Stripe and repair the differences.'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the differences.')
+
+    def handle(self, *args, **options):
+
+        result = reconcile_stripe(dry_run=options['dry_run'])
+
+        self.stdout.write(
+            f"subscriptions {result['subscriptions']} | organizations {result['organizations']} | "
+            f"new invoices {result['new_invoices']} | invoices {result['invoices']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            'Differences found.' if options['dry_run'] else 'Stripe state reconciled.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from feedback_tracking.administrative_system.organizations.price_catalog import sync_price_catalog, get_price_catalog
+from feedback_tracking.singletons.stripe_singleton import StripeSingleton
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class Command(BaseCommand):
+
+    help = 'Copy the active prices of Stripe to PriceModel and PriceLimitModel and publish a new price catalog.'
+
+    def handle(self, *args, **options):
+
+        total = sync_price_catalog(StripeSingleton())
+
+        for price in get_price_catalog():
+            self.stdout.write(
+                f'{price.stripe_price_id} | {price.name} | {price.plan_type} {price.interval} | {price.amount}')
+
+        self.stdout.write(self.style.SUCCESS(f'{total} prices synchronized.'))
@@ -0,0 +1,246 @@
+import logging
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from feedback_tracking.administrative_system.organizations.models import OrganizationModel, SubscriptionModel, InvoiceModel
+from feedback_tracking.administrative_system.organizations.price_catalog import get_price_catalog
+from feedback_tracking.singletons.stripe_singleton import StripeSingleton
+from feedback_tracking.api.feedback_system.payments.invoice_cache import forget_invoices_page
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+# Stripe statuses that keep the organization active
+ACTIVE_SUBSCRIPTION_STATUSES = {'active', 'trialing'}
+
+STRIPE_PAGE_SIZE = 100
+
+
+def get_invoice_subscription_id(stripe_invoice):
+    """
+    Get the subscription of an invoice, newer API versions moved it to
+    parent.subscription_details.
+
+    :param stripe_invoice: Stripe invoice
+    :return: subscription id or None
+    """
+
+    subscription_id = stripe_invoice.get('subscription')
+
+    if not subscription_id:
+        parent = stripe_invoice.get('parent') or {}
+        subscription_id = (parent.get('subscription_details') or {}).get('subscription')
+
+    return subscription_id
+
+
+def reconcile_subscriptions(stripe_connection, subscriptions: dict, pending_subscriptions: dict, prices: set):
+    """
+    Compare every Stripe subscription with the local one.
+
+    :param stripe_connection: The Stripe connection object.
+    :param subscriptions: local subscriptions by stripe_subscription_id
+    :param pending_subscriptions: local subscriptions without Stripe id by id
+    :param prices: ids of the local prices
+    :return: tuple (changed subscriptions, Stripe statuses by organization id)
+    """
+
+    changed = {}
+    organization_statuses = {}
+
+    for stripe_subscription in stripe_connection.Subscription.list(
+            status='all', limit=STRIPE_PAGE_SIZE).auto_paging_iter():
+
+        subscription = subscriptions.get(stripe_subscription.id)
+
+        # Subscriptions whose creation event was missed only have the metadata
+        if subscription is None:
+            subscription_id = (stripe_subscription.get('metadata') or {}).get('subscription_id')
+            subscription = subscription_id and pending_subscriptions.pop(int(subscription_id), None)
+
+            if subscription is None:
+                continue
+
+            subscription.stripe_subscription_id = stripe_subscription.id
+            subscriptions[stripe_subscription.id] = subscription
+            changed[subscription.id] = subscription
+
+        organization_statuses.setdefault(subscription.organization_id, set()).add(
+            stripe_subscription.status)
+
+        status = SubscriptionModel.SubscriptionStatus(stripe_subscription.status.upper())
+
+        if subscription.status != status:
+            subscription.status = status
+            changed[subscription.id] = subscription
+
+        items = stripe_subscription.get('items', {}).get('data') or []
+        stripe_price = items[0].get('price') if items else None
+
+        if stripe_price and stripe_price.get('id') in prices and subscription.price_id != stripe_price.get('id'):
+            subscription.price_id = stripe_price.get('id')
+            subscription.unit_amount = int(stripe_price.get('unit_amount') or 0) / 100
+            changed[subscription.id] = subscription
+
+    return list(changed.values()), organization_statuses
+
+
+def reconcile_organizations(organization_statuses: dict):
+    """
+    An organization is active while one of its Stripe subscriptions is active.
+
+    :param organization_statuses: Stripe statuses of the subscriptions by organization id
+    :return: changed organizations
+    """
+
+    organizations = OrganizationModel.objects.filter(
+        id__in=organization_statuses).only('id', 'is_active')
+
+    changed = []
+
+    for organization in organizations:
+
+        is_active = bool(organization_statuses[organization.id] & ACTIVE_SUBSCRIPTION_STATUSES)
+
+        if organization.is_active != is_active:
+            organization.is_active = is_active
+            changed.append(organization)
+
+    return changed
+
+
+def reconcile_invoices(stripe_connection, subscriptions: dict, since: datetime.datetime):
+    """
+    Compare the Stripe invoices created since a date with the local ones.
+
+    :param stripe_connection: The Stripe connection object.
+    :param subscriptions: local subscriptions by stripe_subscription_id
+    :param since: first creation date of the invoices
+    :return: tuple (new invoices, changed invoices)
+    """
+
+    invoices = {
+        invoice.stripe_invoice_id: invoice
+        for invoice in InvoiceModel.objects.filter(created_at__gte=since - datetime.timedelta(days=1)).only(
+            'id', 'stripe_invoice_id', 'status', 'paid_at')
+    }
+
+    new_invoices = []
+    changed = []
+
+    for stripe_invoice in stripe_connection.Invoice.list(
+            created={'gte': int(since.timestamp())}, limit=STRIPE_PAGE_SIZE).auto_paging_iter():
+
+        subscription = subscriptions.get(get_invoice_subscription_id(stripe_invoice))
+
+        if subscription is None:
+            continue
+
+        status = InvoiceModel.InvoiceStatus(stripe_invoice.status.upper())
+        paid_at = (stripe_invoice.get('status_transitions') or {}).get('paid_at')
+        invoice = invoices.get(stripe_invoice.id)
+
+        if invoice is None:
+            new_invoices.append(InvoiceModel(
+                stripe_invoice_id=stripe_invoice.id,
+                subscription=subscription,
+                amount=int(stripe_invoice.get('amount_paid') or 0) / 100,
+                subtotal=int(stripe_invoice.get('subtotal') or 0) / 100,
+                total=int(stripe_invoice.get('total') or 0) / 100,
+                paid_at=paid_at,
+                currency=stripe_invoice.get('currency'),
+                hosted_invoice_url=stripe_invoice.get('hosted_invoice_url'),
+                invoice_pdf=stripe_invoice.get('invoice_pdf'),
+                created=stripe_invoice.get('created'),
+                billing_reason=stripe_invoice.get('billing_reason'),
+                collection_method=stripe_invoice.get('collection_method'),
+                status=status,
+            ))
+
+        elif invoice.status != status:
+            invoice.subscription = subscription
+            invoice.status = status
+            invoice.paid_at = paid_at
+            changed.append(invoice)
+
+    return new_invoices, changed
+
+
+def reconcile_stripe(dry_run: bool = False):
+    """
+    Repair the subscriptions, organizations and invoices that drifted from
+    Stripe, e.g. because a webhook was missed.
+
+    Stripe is read with list pagination, one call by page of 100 objects, the
+    local state is loaded once and compared in memory and the corrections are
+    saved with bulk_update and bulk_create.
+
+    :param dry_run: compare without saving the corrections
+    :return: dict with the number of corrections
+    """
+
+    stripe_connection = StripeSingleton()
+    now = timezone.now()
+    since = now - datetime.timedelta(days=settings.STRIPE_RECONCILIATION_INVOICE_DAYS)
+
+    subscriptions = {}
+    pending_subscriptions = {}
+
+    for subscription in SubscriptionModel.objects.only(
+            'id', 'stripe_subscription_id', 'status', 'price_id', 'unit_amount', 'organization_id'):
+
+        if subscription.stripe_subscription_id:
+            subscriptions[subscription.stripe_subscription_id] = subscription
+        else:
+            pending_subscriptions[subscription.id] = subscription
+
+    prices = set(get_price_catalog().prices)
+
+    changed_subscriptions, organization_statuses = reconcile_subscriptions(
+        stripe_connection, subscriptions, pending_subscriptions, prices)
+    changed_organizations = reconcile_organizations(organization_statuses)
+    new_invoices, changed_invoices = reconcile_invoices(
+        stripe_connection, subscriptions, since)
+
+    result = {
+        'subscriptions': len(changed_subscriptions),
+        'organizations': len(changed_organizations),
+        'new_invoices': len(new_invoices),
+        'invoices': len(changed_invoices),
+    }
+
+    logger.info('Stripe reconciliation%s: %s', ' (dry run)' if dry_run else '', result)
+
+    if dry_run:
+        return result
+
+    for changed in (changed_subscriptions, changed_organizations, changed_invoices):
+        for instance in changed:
+            instance.updated_at = now
+
+    with transaction.atomic():
+
+        SubscriptionModel.objects.bulk_update(
+            changed_subscriptions,
+            ['stripe_subscription_id', 'status', 'price', 'unit_amount', 'updated_at'],
+            batch_size=500)
+        OrganizationModel.objects.bulk_update(
+            changed_organizations, ['is_active', 'updated_at'], batch_size=500)
+        InvoiceModel.objects.bulk_update(
+            changed_invoices, ['status', 'paid_at', 'updated_at'], batch_size=500)
+        # A webhook may store the same invoice meanwhile
+        InvoiceModel.objects.bulk_create(
+            new_invoices, batch_size=500, ignore_conflicts=True)
+
+        for organization_id in {invoice.subscription.organization_id for invoice in new_invoices + changed_invoices}:
+            forget_invoices_page(organization_id)
+
+    return result
@@ -0,0 +1,126 @@
+import logging
+
+from django.conf import settings
+
+from feedback_tracking.administrative_system.organizations.models import OrganizationModel, SubscriptionModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+# Stripe id -> local id, the mapping of an id never changes
+_organization_ids = {}
+_subscription_ids = {}
+
+
+def remember(cache: dict, stripe_id: str, local_id: int):
+    """
+    Save a mapping in an in-process cache, the cache is emptied when it is full.
+
+    :param cache: cache of the mappings
+    :param stripe_id: id in Stripe
+    :param local_id: id of the local row
+    """
+
+    if len(cache) >= settings.STRIPE_RESOLVER_CACHE_SIZE:
+        cache.clear()
+
+    cache[stripe_id] = local_id
+
+
+def resolve_organization(stripe_connection, stripe_customer_id: str, stripe_customer=None):
+    """
+    Get the organization of a Stripe customer.
+
+    The in-process cache and the indexed stripe_customer_id are tried first, the
+    customer metadata is read from Stripe only when both miss and then the
+    stripe_customer_id of the organization is backfilled.
+
+    :param stripe_connection: The Stripe connection object.
+    :param stripe_customer_id: id of the customer in Stripe
+    :param stripe_customer: customer object when the caller already has it
+    :return: OrganizationModel
+    """
+
+    organization_id = _organization_ids.get(stripe_customer_id)
+
+    if organization_id:
+        return OrganizationModel.objects.get(id=organization_id)
+
+    organization = OrganizationModel.objects.filter(
+        stripe_customer_id=stripe_customer_id).first()
+
+    if not organization:
+
+        logger.info('Customer %s not mapped, reading it from Stripe',
+                    stripe_customer_id)
+
+        stripe_customer = stripe_customer or stripe_connection.Customer.retrieve(
+            stripe_customer_id)
+        organization = OrganizationModel.objects.get(
+            id=int(stripe_customer.get('metadata').get('organization_id')))
+
+        if not organization.stripe_customer_id:
+            OrganizationModel.objects.filter(id=organization.id).update(
+                stripe_customer_id=stripe_customer_id)
+            organization.stripe_customer_id = stripe_customer_id
+
+    remember(_organization_ids, stripe_customer_id, organization.id)
+
+    return organization
+
+
+def resolve_subscription(stripe_connection, stripe_subscription_id: str, stripe_subscription=None):
+    """
+    Get the local subscription of a Stripe subscription.
+
+    The in-process cache and the indexed stripe_subscription_id are tried first,
+    on a miss the subscription_id is read from the metadata of the Stripe
+    subscription or of its checkout session and the stripe_subscription_id of
+    the local subscription is backfilled.
+
+    :param stripe_connection: The Stripe connection object.
+    :param stripe_subscription_id: id of the subscription in Stripe
+    :param stripe_subscription: subscription object when the caller already has it
+    :return: SubscriptionModel
+    """
+
+    subscription_id = _subscription_ids.get(stripe_subscription_id)
+
+    if subscription_id:
+        return SubscriptionModel.objects.get(id=subscription_id)
+
+    subscription = SubscriptionModel.objects.filter(
+        stripe_subscription_id=stripe_subscription_id).first()
+
+    if not subscription:
+
+        logger.info('Subscription %s not mapped, reading it from Stripe',
+                    stripe_subscription_id)
+
+        stripe_subscription = stripe_subscription or stripe_connection.Subscription.retrieve(
+            stripe_subscription_id)
+        subscription_id = (stripe_subscription.get(
+            'metadata') or {}).get('subscription_id')
+
+        # Subscriptions created by a checkout session keep the id in the session
+        if not subscription_id:
+            sessions = stripe_connection.checkout.Session.list(
+                subscription=stripe_subscription_id).data
+            subscription_id = sessions[0].get(
+                'metadata').get('subscription_id')
+
+        subscription = SubscriptionModel.objects.get(id=int(subscription_id))
+
+        if not subscription.stripe_subscription_id:
+            SubscriptionModel.objects.filter(id=subscription.id).update(
+                stripe_subscription_id=stripe_subscription_id)
+            subscription.stripe_subscription_id = stripe_subscription_id
+
+    remember(_subscription_ids, stripe_subscription_id, subscription.id)
+
+    return subscription
@@ -0,0 +1,152 @@
+import hmac
+import json
+import time
+import hashlib
+
+from .fake_stripe import new_stripe_id
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def sign_payload(payload: str, secret: str, timestamp: int = None):
+    """
+    Sign a payload the way Stripe signs its webhooks.
+
+    :param payload: body of the webhook
+    :param secret: signing secret of the endpoint
+    :param timestamp: time of the signature, now by default
+    :return: value of the Stripe-Signature header
+    """
+
+    timestamp = timestamp or int(time.time())
+    signature = hmac.new(secret.encode(), f'{timestamp}.{payload}'.encode(),
+                         hashlib.sha256).hexdigest()
+
+    return f't={timestamp},v1={signature}'
+
+
+def build_event(event_type: str, data_object: dict, created: int = None):
+    """
+    :param event_type: type of the event, e.g. invoice.payment_succeeded
+    :param data_object: object of the event
+    :param created: creation time of the event
+    :return: Stripe event
+    """
+
+    return {
+        'id': new_stripe_id('evt'),
+        'object': 'event',
+        'api_version': '2025-06-30.basil',
+        'created': created or int(time.time()),
+        'livemode': False,
+        'pending_webhooks': 1,
+        'request': {'id': None, 'idempotency_key': None},
+        'type': event_type,
+        'data': {'object': data_object},
+    }
+
+
+def build_signed_event(event_type: str, data_object: dict, secret: str, created: int = None):
+    """
+    :param event_type: type of the event
+    :param data_object: object of the event
+    :param secret: signing secret of the endpoint
+    :param created: creation time of the event
+    :return: tuple (payload, Stripe-Signature header)
+    """
+
+    payload = json.dumps(build_event(event_type, data_object, created))
+
+    return payload, sign_payload(payload, secret)
+
+
+def build_price(price_id: str, unit_amount: int):
+
+    return {
+        'id': price_id,
+        'object': 'price',
+        'currency': 'usd',
+        'unit_amount': unit_amount,
+        'recurring': {'interval': 'month', 'interval_count': 1},
+    }
+
+
+def build_invoice(stripe_customer_id: str, stripe_subscription_id: str, price_id: str,
+                  unit_amount: int, billing_reason: str = 'subscription_cycle'):
+    """
+    :param stripe_customer_id: customer of the invoice
+    :param stripe_subscription_id: subscription of the invoice
+    :param price_id: Stripe price of the subscription
+    :param unit_amount: amount in cents
+    :param billing_reason: subscription_create, subscription_update or subscription_cycle
+    :return: paid invoice object
+    """
+
+    now = int(time.time())
+    invoice_id = new_stripe_id('in')
+
+    return {
+        'id': invoice_id,
+        'object': 'invoice',
+        'customer': stripe_customer_id,
+        'subscription': stripe_subscription_id,
+        'billing_reason': billing_reason,
+        'collection_method': 'charge_automatically',
+        'currency': 'usd',
+        'status': 'paid',
+        'amount_paid': unit_amount,
+        'subtotal': unit_amount,
+        'total': unit_amount,
+        'created': now,
+        'status_transitions': {'finalized_at': now, 'paid_at': now},
+        'hosted_invoice_url': f'https://invoice.stripe.test/{invoice_id}',
+        'invoice_pdf': f'https://invoice.stripe.test/{invoice_id}/pdf',
+        'lines': {'object': 'list', 'data': [
+            {'id': new_stripe_id('il'), 'object': 'line_item', 'proration': False,
+             'amount': unit_amount, 'price': build_price(price_id, unit_amount)},
+        ]},
+    }
+
+
+def build_subscription(stripe_customer_id: str, stripe_subscription_id: str, price_id: str,
+                       unit_amount: int, status: str = 'active'):
+    """
+    :param stripe_customer_id: customer of the subscription
+    :param stripe_subscription_id: id of the subscription
+    :param price_id: Stripe price of the subscription
+    :param unit_amount: amount in cents
+    :param status: status of the subscription
+    :return: subscription object
+    """
+
+    return {
+        'id': stripe_subscription_id,
+        'object': 'subscription',
+        'customer': stripe_customer_id,
+        'status': status,
+        'created': int(time.time()),
+        'metadata': {},
+        'items': {'object': 'list', 'data': [
+            {'id': new_stripe_id('si'), 'object': 'subscription_item',
+             'price': build_price(price_id, unit_amount)},
+        ]},
+    }
+
+
+def build_card_payment_method(stripe_customer_id: str, last4: str = '4242'):
+    """
+    :param stripe_customer_id: customer the payment method is attached to
+    :param last4: last digits of the card
+    :return: card payment method object
+    """
+
+    return {
+        'id': new_stripe_id('pm'),
+        'object': 'payment_method',
+        'customer': stripe_customer_id,
+        'type': 'card',
+        'created': int(time.time()),
+        'card': {'brand': 'visa', 'last4': last4, 'exp_month': 12, 'exp_year': 2030},
+    }
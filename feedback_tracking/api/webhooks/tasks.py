@@ -0,0 +1,241 @@
+import time
+import logging
+import datetime
+from contextlib import contextmanager
+
+from celery import shared_task
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from feedback_tracking.administrative_system.organizations.models import StripeEventModel
+from feedback_tracking.administrative_system.organizations.price_catalog import sync_price_catalog
+from feedback_tracking.singletons.stripe_singleton import StripeSingleton
+from .handlers import handle_stripe_event
+from .reconciliation import reconcile_stripe
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+# Namespace of the advisory locks taken by customer
+STRIPE_EVENT_LOCK_NAMESPACE = 7301
+
+PENDING_STATUSES = [
+    StripeEventModel.StripeEventStatus.RECEIVED,
+    StripeEventModel.StripeEventStatus.PROCESSING,
+    StripeEventModel.StripeEventStatus.FAILED,
+]
+
+
+def get_stripe_customer_id(event: dict):
+    """
+    Get the customer of a Stripe event.
+
+    :param event: Stripe event
+    :return: customer id or None if the event does not belong to a customer
+    """
+
+    data_object = event['data']['object']
+
+    if data_object.get('object') == 'customer':
+        return data_object.get('id')
+
+    customer = data_object.get('customer')
+
+    # The customer can be expanded
+    if isinstance(customer, dict):
+        return customer.get('id')
+
+    return customer
+
+
+@contextmanager
+def customer_lock(stripe_customer_id: str):
+    """
+    Try to take the advisory lock of a customer, only one worker processes the
+    events of a customer at a time.
+
+    :param stripe_customer_id: customer id
+    :return: True if the lock was taken
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s, hashtext(%s))',
+                       [STRIPE_EVENT_LOCK_NAMESPACE, stripe_customer_id])
+        acquired = cursor.fetchone()[0]
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s, hashtext(%s))',
+                               [STRIPE_EVENT_LOCK_NAMESPACE, stripe_customer_id])
+
+
+def get_retry_delay(attempts: int):
+    """
+    Get the seconds to wait before the next attempt, it grows exponentially.
+
+    :param attempts: attempts already done
+    :return: seconds to wait
+    """
+
+    return min(settings.STRIPE_EVENT_RETRY_BACKOFF * 2 ** (attempts - 1), 3600)
+
+
+def run_stripe_event(stripe_event: StripeEventModel):
+    """
+    Process an event of the inbox and save the outcome. A failed event is
+    scheduled again and after STRIPE_EVENT_MAX_ATTEMPTS it is marked as dead.
+
+    :param stripe_event: event to process
+    :return: True if the event is done (processed or dead)
+    """
+
+    stripe_event.status = StripeEventModel.StripeEventStatus.PROCESSING
+    stripe_event.attempts += 1
+    stripe_event.save(update_fields=['status', 'attempts', 'updated_at'])
+
+    start = time.perf_counter()
+
+    try:
+        handle_stripe_event(stripe_event.event_type,
+                            stripe_event.payload['data']['object'])
+
+    except Exception as e:
+
+        stripe_event.duration_ms = round((time.perf_counter() - start) * 1000)
+
+        logger.exception('Stripe event %s failed (attempt %s)',
+                         stripe_event.stripe_event_id, stripe_event.attempts)
+
+        stripe_event.last_error = str(e)
+
+        if stripe_event.attempts >= settings.STRIPE_EVENT_MAX_ATTEMPTS:
+            stripe_event.status = StripeEventModel.StripeEventStatus.DEAD
+        else:
+            delay = get_retry_delay(stripe_event.attempts)
+            stripe_event.status = StripeEventModel.StripeEventStatus.FAILED
+            stripe_event.next_attempt_at = timezone.now() + datetime.timedelta(seconds=delay)
+            process_stripe_event.apply_async(
+                (stripe_event.id,), countdown=delay)
+
+        stripe_event.save()
+
+        return stripe_event.status == StripeEventModel.StripeEventStatus.DEAD
+
+    stripe_event.duration_ms = round((time.perf_counter() - start) * 1000)
+    stripe_event.status = StripeEventModel.StripeEventStatus.PROCESSED
+    stripe_event.processed_at = timezone.now()
+    stripe_event.next_attempt_at = None
+    stripe_event.last_error = None
+    stripe_event.save()
+
+    logger.info('Stripe event %s (%s) processed in %s ms', stripe_event.stripe_event_id,
+                stripe_event.event_type, stripe_event.duration_ms)
+
+    return True
+
+
+@shared_task(bind=True, max_retries=20)
+def process_stripe_event(self, stripe_event_id):
+    """
+    Task to process an event of the Stripe inbox.
+
+    Events of the same customer are processed in the order Stripe created them:
+    the worker that holds the customer lock processes every pending event of the
+    customer, and it stops at a failed event that is waiting for its retry.
+
+    :param stripe_event_id: id of the StripeEventModel
+    :return: status of the event
+    """
+
+    stripe_event = StripeEventModel.objects.get(id=stripe_event_id)
+
+    if stripe_event.status not in PENDING_STATUSES:
+        return stripe_event.status
+
+    customer_id = stripe_event.stripe_customer_id
+
+    if not customer_id:
+        run_stripe_event(stripe_event)
+        return stripe_event.status
+
+    with customer_lock(customer_id) as acquired:
+
+        if not acquired:
+            # Other worker is processing the customer, it may process this event too
+            raise self.retry(countdown=settings.STRIPE_EVENT_LOCK_RETRY_SECONDS)
+
+        pending_events = StripeEventModel.objects.filter(
+            stripe_customer_id=customer_id,
+            status__in=PENDING_STATUSES,
+        ).order_by('stripe_created', 'id')
+
+        for pending_event in pending_events:
+
+            if (pending_event.status == StripeEventModel.StripeEventStatus.FAILED
+                    and pending_event.next_attempt_at > timezone.now()):
+                break
+
+            if not run_stripe_event(pending_event):
+                break
+
+    stripe_event.refresh_from_db(fields=['status'])
+
+    return stripe_event.status
+
+
+@shared_task
+def requeue_stripe_events():
+    """
+    Task to queue again the events that were not processed, e.g. when the broker
+    was down after the event was stored. It should be run periodically.
+
+    :return: number of events queued
+    """
+
+    stale = timezone.now() - datetime.timedelta(
+        seconds=settings.STRIPE_EVENT_STALE_SECONDS)
+
+    stripe_event_ids = list(StripeEventModel.objects.filter(
+        Q(status=StripeEventModel.StripeEventStatus.RECEIVED, created_at__lt=stale) |
+        Q(status=StripeEventModel.StripeEventStatus.PROCESSING, updated_at__lt=stale) |
+        Q(status=StripeEventModel.StripeEventStatus.FAILED, next_attempt_at__lt=stale)
+    ).order_by('stripe_created', 'id').values_list('id', flat=True))
+
+    for stripe_event_id in stripe_event_ids:
+        process_stripe_event.delay(stripe_event_id)
+
+    return len(stripe_event_ids)
+
+
+@shared_task
+def reconcile_stripe_state():
+    """
+    Task to repair the subscriptions, organizations and invoices that drifted
+    from Stripe. It should be run periodically.
+
+    :return: dict with the number of corrections
+    """
+
+    return reconcile_stripe()
+
+
+@shared_task
+def sync_stripe_prices():
+    """
+    Task to copy the active prices of Stripe to the price catalog. It should
+    be run periodically.
+
+    :return: number of prices synchronized
+    """
+
+    return sync_price_catalog(StripeSingleton())
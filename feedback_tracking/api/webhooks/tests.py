@@ -1,3 +1,95 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from feedback_tracking.singletons.stripe_http_client import StripeCircuitBreaker
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+@mock.patch('feedback_tracking.singletons.stripe_http_client.time.monotonic')
+class StripeCircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+
+        self.breaker = StripeCircuitBreaker(failure_threshold=3, reset_seconds=30)
+
+    def record_failures(self, monotonic, times, now=0):
+
+        monotonic.return_value = now
+
+        for _ in range(times):
+            self.breaker.record_failure()
+
+    def test_closed_allows_requests(self, monotonic):
+
+        self.record_failures(monotonic, 2)
+
+        self.assertEqual(self.breaker.state, StripeCircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_opens_after_threshold(self, monotonic):
+
+        self.record_failures(monotonic, 3)
+
+        self.assertEqual(self.breaker.state, StripeCircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_success_resets_failures(self, monotonic):
+
+        self.record_failures(monotonic, 2)
+        self.breaker.record_success()
+        self.record_failures(monotonic, 2)
+
+        self.assertEqual(self.breaker.state, StripeCircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failures, 2)
+
+    def test_half_open_after_reset_seconds(self, monotonic):
+
+        self.record_failures(monotonic, 3, now=100)
+
+        monotonic.return_value = 129
+        self.assertFalse(self.breaker.allow_request())
+
+        monotonic.return_value = 130
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, StripeCircuitBreaker.HALF_OPEN)
+
+        # A single trial call
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_half_open_success_closes(self, monotonic):
+
+        self.record_failures(monotonic, 3, now=100)
+        monotonic.return_value = 130
+        self.breaker.allow_request()
+
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, StripeCircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_half_open_failure_opens_again(self, monotonic):
+
+        self.record_failures(monotonic, 3, now=100)
+        monotonic.return_value = 130
+        self.breaker.allow_request()
+
+        self.record_failures(monotonic, 1, now=130)
+
+        self.assertEqual(self.breaker.state, StripeCircuitBreaker.OPEN)
+        monotonic.return_value = 159
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_stats(self, monotonic):
+
+        self.record_failures(monotonic, 1)
+
+        self.assertEqual(self.breaker.stats(), {
+            'state': StripeCircuitBreaker.CLOSED,
+            'failures': 1,
+            'failure_threshold': 3,
+            'reset_seconds': 30,
+        })
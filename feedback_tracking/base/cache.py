@@ -0,0 +1,19 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def is_shared_cache(alias: str = 'default'):
+    """
+    Check if a cache is shared by every process (web and celery workers). A
+    local memory cache is kept by each process, a change removed from it in a
+    worker is still cached in the others.
+
+    :param alias: alias of the cache
+    :return: True when the cache can hold data that other processes invalidate
+    """
+
+    return not isinstance(caches[alias], LocMemCache)
@@ -0,0 +1,52 @@
+from django.db import connections
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def reset_search_path(connection):
+    """
+    Reset callback of the connection pool, it runs every time a connection is
+    given back, so a pooled connection never keeps the schema of the last tenant.
+
+    :param connection: psycopg connection returned to the pool
+    """
+
+    with connection.transaction():
+        connection.execute('RESET search_path')
+
+
+def get_pool_options(settings_config):
+    """
+    Build the OPTIONS of a database that uses the psycopg connection pool.
+
+    :param settings_config: decouple config used to read the environment
+    :return: dict with the OPTIONS of the database, empty if pooling is disabled
+    """
+
+    if not settings_config('DB_POOL', default=False, cast=bool):
+        return {}
+
+    return {
+        'pool': {
+            'min_size': settings_config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': settings_config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': settings_config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'reset': reset_search_path,
+        }
+    }
+
+
+def get_pool_stats():
+    """
+    Get the statistics of every database that uses a connection pool.
+
+    :return: dict with the pool statistics by database alias
+    """
+
+    return {
+        alias: stats
+        for alias in connections
+        if (stats := connections[alias].pool_stats()) is not None
+    }
@@ -0,0 +1,177 @@
+import logging
+import datetime
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import get_template
+from django.utils import timezone
+
+from feedback_tracking.administrative_system.organizations.models import EmailOutboxModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(template: str, subject: str, to: str, context: dict):
+    """
+    Store an email in the outbox, it is sent by a worker after the current
+    transaction is committed.
+
+    :param template: EmailOutboxModel.EmailTemplate of the email
+    :param subject: subject of the email
+    :param to: recipient
+    :param context: json values to render the template
+    :return: EmailOutboxModel
+    """
+
+    from .tasks import dispatch_email_outbox
+
+    email = EmailOutboxModel.objects.create(
+        template=template, subject=subject, to=to, context=context)
+
+    transaction.on_commit(lambda: dispatch_email_outbox.delay())
+
+    return email
+
+
+def build_message(email: EmailOutboxModel, connection=None):
+    """
+    Render an email of the outbox. Templates are compiled once by the cached
+    template loader and reused for every email.
+
+    :param email: email of the outbox
+    :param connection: mail connection to send the message with
+    :return: EmailMultiAlternatives
+    """
+
+    text_content = get_template(f'emails/{email.template}.txt').render(email.context)
+    html_content = get_template(f'emails/{email.template}.html').render(email.context)
+
+    message = EmailMultiAlternatives(email.subject, text_content, settings.DEFAULT_FROM_EMAIL,
+                                     [email.to], connection=connection)
+    message.attach_alternative(html_content, 'text/html')
+
+    return message
+
+
+def claim_emails(batch_size: int):
+    """
+    Take the due emails of the outbox, emails taken by other workers are skipped.
+
+    :param batch_size: maximum number of emails
+    :return: list of EmailOutboxModel marked as sending
+    """
+
+    with transaction.atomic():
+
+        emails = list(EmailOutboxModel.objects.select_for_update(skip_locked=True).filter(
+            status__in=[EmailOutboxModel.EmailStatus.PENDING,
+                        EmailOutboxModel.EmailStatus.FAILED],
+            next_attempt_at__lte=timezone.now(),
+        ).order_by('next_attempt_at')[:batch_size])
+
+        EmailOutboxModel.objects.filter(id__in=[email.id for email in emails]).update(
+            status=EmailOutboxModel.EmailStatus.SENDING, updated_at=timezone.now())
+
+    return emails
+
+
+def mark_failed(email: EmailOutboxModel, error: Exception):
+    """
+    Schedule an email again with exponential backoff, after
+    EMAIL_OUTBOX_MAX_ATTEMPTS attempts it is marked as dead.
+
+    :param email: email that could not be sent
+    :param error: error of the attempt
+    """
+
+    email.attempts += 1
+    email.last_error = str(error)
+
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = EmailOutboxModel.EmailStatus.DEAD
+    else:
+        email.status = EmailOutboxModel.EmailStatus.FAILED
+        email.next_attempt_at = timezone.now() + datetime.timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_BACKOFF * 2 ** (email.attempts - 1))
+
+    email.save(update_fields=['status', 'attempts', 'last_error',
+                              'next_attempt_at', 'updated_at'])
+
+
+def send_batch(emails: list):
+    """
+    Send a batch of emails through a single SMTP connection.
+
+    :param emails: emails claimed by claim_emails
+    :return: number of emails sent
+    """
+
+    sent_ids = []
+    connection = get_connection()
+
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning('Could not connect to the mail server: %s', e)
+        for email in emails:
+            mark_failed(email, e)
+        return 0
+
+    connected = True
+
+    try:
+
+        for email in emails:
+
+            try:
+                if not connected:
+                    connection.open()
+                    connected = True
+
+                build_message(email, connection).send()
+
+            except Exception as e:
+                logger.warning('Email %s to %s failed: %s', email.id, email.to, e)
+                mark_failed(email, e)
+                # The server may have dropped the connection, the next email opens a new one
+                connection.close()
+                connected = False
+
+            else:
+                sent_ids.append(email.id)
+
+    finally:
+        connection.close()
+
+        EmailOutboxModel.objects.filter(id__in=sent_ids).update(
+            status=EmailOutboxModel.EmailStatus.SENT,
+            attempts=F('attempts') + 1,
+            last_error=None,
+            sent_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+
+    return len(sent_ids)
+
+
+def release_stale_emails():
+    """
+    Put back in the outbox the emails of a worker that died while sending them.
+
+    :return: number of emails released
+    """
+
+    stale = timezone.now() - datetime.timedelta(
+        seconds=settings.EMAIL_OUTBOX_STALE_SECONDS)
+
+    return EmailOutboxModel.objects.filter(
+        status=EmailOutboxModel.EmailStatus.SENDING,
+        updated_at__lt=stale,
+    ).update(status=EmailOutboxModel.EmailStatus.FAILED, next_attempt_at=timezone.now())
@@ -0,0 +1,169 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from feedback_tracking.administrative_system.organizations.models import EmailOutboxModel
+from feedback_tracking.base.email_outbox import build_message, claim_emails, send_batch
+from feedback_tracking.base.smtp_sink import SMTPSink
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+BENCHMARK_CONTEXT = {
+    'organization': {
+        'name': 'Benchmark', 'state': 'Jalisco', 'phone_number': '3300000000', 'portal': 'benchmark',
+    },
+    'subscription': {
+        'plan': 'Pro', 'unit_amount': '499.00', 'status': 'ACTIVE',
+    },
+}
+
+
+class Command(BaseCommand):
+
+    help = ('Send emails through the outbox dispatcher and report the emails per second, '
+            'optionally against a local SMTP sink and compared with a connection per email.')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--emails', type=int, default=1000,
+                            help='Number of emails to send.')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Emails sent by SMTP connection.')
+        parser.add_argument('--sink', action='store_true',
+                            help='Send to an SMTP sink started by the command.')
+        parser.add_argument('--sink-latency-ms', type=int, default=0,
+                            help='Delay of the sink for every message.')
+        parser.add_argument('--compare', action='store_true',
+                            help='Also send the emails with a new connection each, as before the outbox.')
+        parser.add_argument('--json', action='store_true',
+                            help='Print the result as json.')
+
+    def handle(self, *args, **options):
+
+        email_settings = {}
+        sink = None
+
+        if options['sink']:
+            sink = SMTPSink(port=0, latency_ms=options['sink_latency_ms'])
+            email_settings = {
+                'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+                'EMAIL_HOST': '127.0.0.1',
+                'EMAIL_PORT': sink.run_in_thread(),
+                'EMAIL_USE_TLS': False,
+            }
+
+        with override_settings(**email_settings):
+
+            result = {'emails': options['emails'],
+                      'outbox': self.run_outbox(options['emails'], options['batch_size'], sink)}
+
+            if options['compare']:
+                result['connection_per_email'] = self.run_connection_per_email(
+                    options['emails'], sink)
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.print_result(result)
+
+    def get_connections(self, sink):
+
+        return sink.connections if sink else None
+
+    def run_outbox(self, total_emails, batch_size, sink):
+        """
+        Store the emails in the outbox and drain it like dispatch_email_outbox.
+
+        :param total_emails: number of emails
+        :param batch_size: emails by connection
+        :param sink: SMTP sink or None
+        :return: dict with the result
+        """
+
+        emails = EmailOutboxModel.objects.bulk_create([
+            EmailOutboxModel(
+                template=EmailOutboxModel.EmailTemplate.ORGANIZATION_CREATED,
+                subject='[benchmark] Suscripción completada',
+                to=f'benchmark{i}@example.com',
+                context=BENCHMARK_CONTEXT,
+            )
+            for i in range(total_emails)
+        ])
+        email_ids = {email.id for email in emails}
+
+        connections = self.get_connections(sink)
+        sent = 0
+        start = time.perf_counter()
+
+        try:
+            while batch := claim_emails(batch_size):
+                sent += send_batch(batch)
+        finally:
+            elapsed = time.perf_counter() - start
+            failed = EmailOutboxModel.objects.filter(id__in=email_ids).exclude(
+                status=EmailOutboxModel.EmailStatus.SENT).count()
+            EmailOutboxModel.objects.filter(id__in=email_ids).delete()
+
+        return {
+            'sent': sent,
+            'failed': failed,
+            'seconds': round(elapsed, 2),
+            'emails_per_second': round(sent / elapsed, 1),
+            'connections': sink and sink.connections - connections,
+        }
+
+    def run_connection_per_email(self, total_emails, sink):
+        """
+        Render and send every email with its own connection.
+
+        :param total_emails: number of emails
+        :param sink: SMTP sink or None
+        :return: dict with the result
+        """
+
+        connections = self.get_connections(sink)
+        email = EmailOutboxModel(
+            template=EmailOutboxModel.EmailTemplate.ORGANIZATION_CREATED,
+            subject='[benchmark] Suscripción completada',
+            context=BENCHMARK_CONTEXT,
+        )
+
+        sent = 0
+        start = time.perf_counter()
+
+        for i in range(total_emails):
+            email.to = f'benchmark{i}@example.com'
+            sent += build_message(email).send()
+
+        elapsed = time.perf_counter() - start
+
+        return {
+            'sent': sent,
+            'failed': total_emails - sent,
+            'seconds': round(elapsed, 2),
+            'emails_per_second': round(sent / elapsed, 1),
+            'connections': sink and sink.connections - connections,
+        }
+
+    def print_result(self, result):
+
+        for mode in ('outbox', 'connection_per_email'):
+
+            if mode not in result:
+                continue
+
+            stats = result[mode]
+            connections = f" | {stats['connections']} connections" if stats['connections'] is not None else ''
+
+            self.stdout.write(
+                f"{mode}: {stats['sent']}/{result['emails']} emails in {stats['seconds']} s | "
+                f"{stats['emails_per_second']} emails/s{connections}")
+
+        if 'connection_per_email' in result and result['connection_per_email']['emails_per_second']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Outbox gain: x{result['outbox']['emails_per_second'] / result['connection_per_email']['emails_per_second']:.2f}"))
@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from feedback_tracking.base.db import get_pool_stats
+from feedback_tracking.base.tenant_tasks import get_tenant_schemas
+from feedback_tracking.feedback_system.locations.models import LocationModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class Command(BaseCommand):
+
+    help = ('Simulate concurrent tenant requests (switch schema, query, close) '
+            'and report the latency and throughput of the database connections.')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Total number of simulated requests.')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Number of concurrent workers.')
+        parser.add_argument('--json', action='store_true',
+                            help='Print the result as json.')
+        parser.add_argument('--compare', action='store_true',
+                            help='Run the benchmark without and with DB_POOL and compare them.')
+
+    def handle(self, *args, **options):
+
+        if options['compare']:
+            return self.compare(options)
+
+        schemas = get_tenant_schemas()
+
+        if not schemas:
+            raise CommandError('There are no tenants to run the benchmark on.')
+
+        result = self.run(schemas, options['requests'], options['concurrency'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.print_result(result)
+
+    def simulate_request(self, schema_name):
+        """
+        Simulate the database work of a tenant request, the same steps that
+        PathTenantMiddleware and the request_finished signal do.
+
+        :param schema_name: schema of the tenant
+        :return: tuple with the elapsed seconds and if the search_path was wrong
+        """
+
+        start = time.perf_counter()
+
+        try:
+            connection.set_schema(schema_name, True)
+            LocationModel.objects.exists()
+
+            with connection.cursor() as cursor:
+                cursor.execute('SHOW search_path')
+                search_path = cursor.fetchone()[0]
+        finally:
+            connection.close()
+
+        return time.perf_counter() - start, not search_path.startswith(schema_name)
+
+    def run(self, schemas, total_requests, concurrency):
+        """
+        Run the simulated requests round-robin over the tenants.
+
+        :param schemas: schema names of the tenants
+        :param total_requests: number of simulated requests
+        :param concurrency: number of threads
+        :return: dict with the benchmark result
+        """
+
+        requests = [schemas[i % len(schemas)] for i in range(total_requests)]
+
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(self.simulate_request, requests))
+
+        elapsed = time.perf_counter() - start
+        latencies = sorted(sample[0] * 1000 for sample in samples)
+        percentiles = statistics.quantiles(latencies, n=100)
+
+        return {
+            'pooled': bool(settings.DATABASES['default']['OPTIONS'].get('pool')),
+            'tenants': len(schemas),
+            'requests': total_requests,
+            'concurrency': concurrency,
+            'throughput': round(total_requests / elapsed, 1),
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+            'wrong_search_path': sum(sample[1] for sample in samples),
+            'pools': get_pool_stats(),
+        }
+
+    def print_result(self, result):
+
+        mode = 'pooled' if result['pooled'] else 'direct'
+
+        self.stdout.write(
+            f"{mode}: {result['requests']} requests over {result['tenants']} tenants "
+            f"with {result['concurrency']} workers")
+        self.stdout.write(
+            f"  throughput {result['throughput']} req/s | p50 {result['p50_ms']} ms | "
+            f"p95 {result['p95_ms']} ms | p99 {result['p99_ms']} ms")
+
+        if result['pools']:
+            self.stdout.write(f"  pool stats {result['pools']}")
+
+        if result['wrong_search_path']:
+            self.stdout.write(self.style.ERROR(
+                f"  {result['wrong_search_path']} requests ran with a wrong search_path"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                '  every request ran with its tenant search_path'))
+
+    def compare(self, options):
+        """
+        Run the benchmark in two processes, without and with the connection pool.
+
+        :param options: command options
+        """
+
+        results = {}
+
+        for pooled in (False, True):
+
+            completed = subprocess.run(
+                [sys.executable, sys.argv[0], 'benchmark_tenant_connections', '--json',
+                 '--requests', str(options['requests']),
+                 '--concurrency', str(options['concurrency'])],
+                env={**os.environ, 'DB_POOL': str(pooled)},
+                capture_output=True,
+                text=True,
+            )
+
+            if completed.returncode:
+                raise CommandError(completed.stderr)
+
+            results[pooled] = json.loads(completed.stdout.strip().splitlines()[-1])
+            self.print_result(results[pooled])
+
+        direct, pooled = results[False], results[True]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pool gain: throughput x{pooled['throughput'] / direct['throughput']:.2f}, "
+            f"p50 x{direct['p50_ms'] / pooled['p50_ms']:.2f}, "
+            f"p99 x{direct['p99_ms'] / pooled['p99_ms']:.2f}"))
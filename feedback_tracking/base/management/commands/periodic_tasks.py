@@ -4,9 +4,20 @@ from django_celery_beat.models import PeriodicTask, IntervalSchedule
 from django.utils.timezone import now
 
 
+# Tasks run once per tenant through a single fan-out entry
+TENANT_PERIODIC_TASKS = [
+    ('Create feedback partitions',
+     'feedback_tracking.feedback_system.feedbacks.tasks.create_feedback_partitions'),
+    ('Apply feedback retention',
+     'feedback_tracking.feedback_system.feedbacks.tasks.apply_feedback_retention'),
+    ('Purge deleted locations',
+     'feedback_tracking.feedback_system.locations.tasks.purge_deleted_locations'),
+]
+
+
 class Command(BaseCommand):
 
-    help = 'Create periodic tasks (if not exists) to disable trial organizations.'
+    help = 'Create periodic tasks (if not exists) to disable trial organizations, requeue Stripe events and registrations, send the email outbox, reconcile Stripe, sync the prices, maintain the tenant schemas and purge the deleted locations.'
 
     def handle(self, *args, **kwargs):
 
@@ -21,6 +32,68 @@ class Command(BaseCommand):
             task='feedback_tracking.base.tasks.disable_trial_organizations',
         )
 
+        frequent_schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=5,
+            period=IntervalSchedule.MINUTES,
+        )
+
+        _, requeue_created = PeriodicTask.objects.get_or_create(
+            interval=frequent_schedule,
+            name='Requeue Stripe events',
+            task='feedback_tracking.api.webhooks.tasks.requeue_stripe_events',
+        )
+        created = created or requeue_created
+
+        _, registration_created = PeriodicTask.objects.get_or_create(
+            interval=frequent_schedule,
+            name='Requeue registrations',
+            task='feedback_tracking.api.accounts.tasks.requeue_registration_jobs',
+        )
+        created = created or registration_created
+
+        minute_schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=1,
+            period=IntervalSchedule.MINUTES,
+        )
+
+        _, outbox_created = PeriodicTask.objects.get_or_create(
+            interval=minute_schedule,
+            name='Dispatch email outbox',
+            task='feedback_tracking.base.tasks.dispatch_email_outbox',
+        )
+        created = created or outbox_created
+
+        hourly_schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=1,
+            period=IntervalSchedule.HOURS,
+        )
+
+        _, reconciliation_created = PeriodicTask.objects.get_or_create(
+            interval=hourly_schedule,
+            name='Reconcile Stripe state',
+            task='feedback_tracking.api.webhooks.tasks.reconcile_stripe_state',
+        )
+        created = created or reconciliation_created
+
+        _, prices_created = PeriodicTask.objects.get_or_create(
+            interval=schedule,
+            name='Sync Stripe prices',
+            task='feedback_tracking.api.webhooks.tasks.sync_stripe_prices',
+        )
+        created = created or prices_created
+
+        for name, task_name in TENANT_PERIODIC_TASKS:
+
+            _, tenant_task_created = PeriodicTask.objects.get_or_create(
+                name=name,
+                defaults={
+                    'interval': schedule,
+                    'task': 'feedback_tracking.base.tenant_tasks.fan_out_tenant_task',
+                    'kwargs': json.dumps({'task_name': task_name}),
+                },
+            )
+            created = created or tenant_task_created
+
         if created:
             self.stdout.write(self.style.SUCCESS(
                 'Periodic tasks created successfully.'))
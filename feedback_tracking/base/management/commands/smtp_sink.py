@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from feedback_tracking.base.smtp_sink import SMTPSink
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class Command(BaseCommand):
+
+    help = ('Run a local SMTP server that discards every message, point EMAIL_HOST and '
+            'EMAIL_PORT to it (with EMAIL_USE_TLS=False) to test the email outbox offline.')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--latency-ms', type=int, default=0,
+                            help='Delay added to every message to simulate a real server.')
+
+    def handle(self, *args, **options):
+
+        sink = SMTPSink(options['host'], options['port'], options['latency_ms'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'SMTP sink listening on {options["host"]}:{options["port"]}'))
+
+        try:
+            sink.run()
+        except KeyboardInterrupt:
+            self.stdout.write(
+                f'{sink.messages} messages received in {sink.connections} connections')
@@ -3,6 +3,7 @@ from django.http import Http404
 from django.db import connection
 
 from feedback_tracking.administrative_system.organizations.models import OrganizationModel
+from .routers import replica_routing_context, replica_is_configured, wrote_to_primary, pin_to_primary
 
 
 class PathTenantMiddleware(TenantMainMiddleware):
@@ -17,7 +18,7 @@ class PathTenantMiddleware(TenantMainMiddleware):
         path_parts = request.path.strip("/").split("/")
         portal = path_parts[0]
 
-        if portal not in ["panel-control", "accounts", "webhooks", "integrations",]:
+        if portal not in ["panel-control", "accounts", "webhooks", "integrations", "metrics",]:
 
             try:
 
@@ -28,3 +29,24 @@ class PathTenantMiddleware(TenantMainMiddleware):
 
             except OrganizationModel.DoesNotExist:
                 raise Http404('Organization does not exist or is inactive.')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Middleware that starts every request reading from the primary and, when the
+    request wrote, pins the reads of its user to the primary for a few seconds.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+
+        with replica_routing_context():
+
+            response = self.get_response(request)
+
+            if wrote_to_primary() and replica_is_configured():
+                pin_to_primary(request)
+
+        return response
@@ -8,3 +8,27 @@ class BaseModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class ActiveManager(models.Manager):
+    """
+    Manager without the soft deleted rows.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(BaseModel):
+    """
+    Model whose rows are marked as deleted first and removed later by a
+    background task. objects hides the deleted rows, all_objects has them.
+    """
+
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        abstract = True
@@ -0,0 +1,50 @@
+from django_tenants.postgresql_backend.base import DatabaseWrapper as TenantDatabaseWrapper
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class DatabaseWrapper(TenantDatabaseWrapper):
+    """
+    django-tenants backend that is safe to use with a connection pool.
+
+    The tenant search_path is tracked per checkout: it is forgotten every time
+    a connection is taken from the pool and every time a transaction or savepoint
+    is rolled back (a rollback also reverts a SET executed inside it), so the
+    next cursor sets it again even when TENANT_LIMIT_SET_CALLS is enabled.
+    """
+
+    def get_new_connection(self, conn_params):
+
+        connection = super().get_new_connection(conn_params)
+        self.search_path_set_schemas = None
+
+        return connection
+
+    def _rollback(self):
+
+        self.search_path_set_schemas = None
+        return super()._rollback()
+
+    def _savepoint_rollback(self, sid):
+
+        self.search_path_set_schemas = None
+        return super()._savepoint_rollback(sid)
+
+    def pool_stats(self):
+        """
+        Get the statistics of the connection pool of this alias.
+
+        :return: dict with the pool counters or None if pooling is disabled
+        """
+
+        if not self.pool:
+            return None
+
+        return {
+            'alias': self.alias,
+            'min_size': self.pool.min_size,
+            'max_size': self.pool.max_size,
+            **self.pool.get_stats(),
+        }
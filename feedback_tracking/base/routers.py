@@ -0,0 +1,170 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django_tenants.routers import TenantSyncRouter
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+REPLICA_DB_ALIAS = 'replica'
+
+# Reads of the current request/task are allowed to go to the replica
+_read_from_replica = ContextVar('read_from_replica', default=False)
+# The current request/task wrote to the primary, every read stays there
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+
+def replica_is_configured():
+    """
+    Check if there is a replica database configured.
+
+    :return: True if the replica alias exists
+    """
+
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def wrote_to_primary():
+    """
+    Check if the current request/task already wrote to the primary.
+
+    :return: True if there was a write
+    """
+
+    return _pinned_to_primary.get()
+
+
+@contextmanager
+def replica_routing_context():
+    """
+    Isolate the routing state of a request/task, it starts reading from the
+    primary and without writes.
+    """
+
+    read_token = _read_from_replica.set(False)
+    pinned_token = _pinned_to_primary.set(False)
+
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(read_token)
+        _pinned_to_primary.reset(pinned_token)
+
+
+def get_primary_pin_key(schema_name, user_id):
+    """
+    Build the cache key that pins the reads of a user to the primary.
+
+    :param schema_name: schema of the tenant
+    :param user_id: id of the user that wrote
+    :return: cache key
+    """
+
+    return f'replica:pin:{schema_name}:{user_id}'
+
+
+def is_pinned_to_primary(request):
+    """
+    Check if the reads of a request must go to the primary, that happens when
+    the request already wrote or when its user wrote a few seconds ago, so the
+    user always reads its own writes even with replication lag.
+
+    :param request: request being processed
+    :return: True if the reads must go to the primary
+    """
+
+    if _pinned_to_primary.get():
+        return True
+
+    user = getattr(request, 'user', None)
+
+    if not user or not user.is_authenticated:
+        return False
+
+    schema_name = connections[DEFAULT_DB_ALIAS].schema_name
+
+    return cache.get(get_primary_pin_key(schema_name, user.id)) is not None
+
+
+def pin_to_primary(request):
+    """
+    Pin the next reads of the user of a request to the primary for
+    REPLICA_PIN_SECONDS.
+
+    :param request: request that wrote to the primary
+    """
+
+    user = getattr(request, 'user', None)
+
+    if not user or not user.is_authenticated:
+        return
+
+    schema_name = connections[DEFAULT_DB_ALIAS].schema_name
+
+    cache.set(get_primary_pin_key(schema_name, user.id),
+              1, settings.REPLICA_PIN_SECONDS)
+
+
+def use_replica(view_func):
+    """
+    Decorator for read only views, their queries go to the replica unless the
+    user must read its own writes from the primary.
+
+    Example:
+        @api_view(['GET'])
+        @permission_classes([IsAuthenticated])
+        @use_replica
+        def get_feedbacks(request, portal):
+            ...
+    """
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+
+        token = _read_from_replica.set(
+            replica_is_configured() and not is_pinned_to_primary(request))
+
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _read_from_replica.reset(token)
+
+    return wrapper
+
+
+class TenantReplicaRouter(TenantSyncRouter):
+    """
+    Router that sends the reads of the views decorated with use_replica to the
+    replica database, keeping the search_path of the replica connection in the
+    same tenant as the primary one. Writes and migrations always go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+
+        if not _read_from_replica.get() or _pinned_to_primary.get():
+            return DEFAULT_DB_ALIAS
+
+        primary = connections[DEFAULT_DB_ALIAS]
+        replica = connections[REPLICA_DB_ALIAS]
+
+        if primary.tenant is not None and replica.schema_name != primary.schema_name:
+            replica.set_tenant(primary.tenant, primary.include_public_schema)
+
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+
+        _pinned_to_primary.set(True)
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+
+        # Both aliases hold the same data
+        return True
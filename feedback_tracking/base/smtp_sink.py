@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import threading
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSink():
+    """
+    Local SMTP server that accepts and discards every message, it is used to
+    measure the email throughput without a real mail server.
+
+    It speaks the part of SMTP that smtplib uses (EHLO, AUTH PLAIN, MAIL,
+    RCPT, DATA, RSET, NOOP and QUIT), STARTTLS is not supported so
+    EMAIL_USE_TLS must be False.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 1025, latency_ms: int = 0):
+
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.connections = 0
+        self.messages = 0
+        self.server = None
+
+    async def reply(self, writer, line: str):
+
+        writer.write(f'{line}\r\n'.encode())
+        await writer.drain()
+
+    async def handle_client(self, reader, writer):
+
+        self.connections += 1
+
+        await self.reply(writer, '220 sink ESMTP')
+
+        try:
+
+            while line := await reader.readline():
+
+                command = line.decode(errors='replace').strip()
+                verb = command.split(' ', 1)[0].upper()
+
+                if verb == 'EHLO':
+                    await self.reply(writer, '250-sink\r\n250-8BITMIME\r\n250 AUTH PLAIN')
+                elif verb == 'HELO':
+                    await self.reply(writer, '250 sink')
+                elif verb == 'AUTH':
+                    await self.reply(writer, '235 Authentication successful')
+                elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                    await self.reply(writer, '250 OK')
+                elif verb == 'DATA':
+                    await self.reply(writer, '354 End data with <CR><LF>.<CR><LF>')
+
+                    # The message is discarded
+                    while await reader.readline() not in (b'.\r\n', b'.\n', b''):
+                        pass
+
+                    if self.latency_ms:
+                        await asyncio.sleep(self.latency_ms / 1000)
+
+                    self.messages += 1
+                    await self.reply(writer, '250 OK queued')
+                elif verb == 'QUIT':
+                    await self.reply(writer, '221 Bye')
+                    break
+                else:
+                    await self.reply(writer, '502 Command not implemented')
+
+        except ConnectionError:
+            pass
+
+        finally:
+            writer.close()
+
+    async def start(self):
+
+        self.server = await asyncio.start_server(
+            self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+        return self.server
+
+    def run(self):
+        """
+        Run the sink until it is interrupted.
+        """
+
+        async def serve():
+            server = await self.start()
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(serve())
+
+    def run_in_thread(self):
+        """
+        Run the sink in a daemon thread.
+
+        :return: port the sink is listening on
+        """
+
+        started = threading.Event()
+        loop = asyncio.new_event_loop()
+
+        def serve():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        started.wait()
+
+        return self.port
@@ -1,9 +1,14 @@
 import datetime
 
+from django.conf import settings
 from django_tenants.utils import schema_context
 from celery import shared_task
 
 from feedback_tracking.administrative_system.organizations.models import OrganizationModel
+from .email_outbox import claim_emails, send_batch, release_stale_emails
+# autodiscover_tasks only imports the tasks modules, the import registers
+# the tenant fan-out tasks in the worker
+from .tenant_tasks import fan_out_tenant_task, run_tenant_chunk, tenant_fan_out_completed  # noqa: F401
 
 
 __author__ = 'Ricardo'
@@ -25,3 +30,24 @@ def disable_trial_organizations():
             is_active=True,
             created_at__lt=datetime.datetime.now() - datetime.timedelta(days=30),
         ).update(is_active=False)
+
+
+@shared_task
+def dispatch_email_outbox():
+    """
+    Task to send the due emails of the outbox, one SMTP connection is used by
+    batch of EMAIL_OUTBOX_BATCH_SIZE emails. It is queued when an email is
+    stored and run periodically to retry the failed ones.
+
+    :return: number of emails sent
+    """
+
+    release_stale_emails()
+
+    sent = 0
+
+    while emails := claim_emails(settings.EMAIL_OUTBOX_BATCH_SIZE):
+        sent += send_batch(emails)
+
+    return sent
+
@@ -0,0 +1,210 @@
+import time
+import logging
+
+from celery import Task, shared_task, chain, chord, group, current_app
+from django.conf import settings
+from django_tenants.utils import schema_context, get_public_schema_name
+
+from feedback_tracking.administrative_system.organizations.models import OrganizationModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+class TenantTask(Task):
+    """
+    Base class for tasks that must run inside a tenant schema.
+
+    The task receives the schema as the ``schema_name`` keyword argument and its
+    body runs with the connection search_path pointing to that schema, so the
+    tenant models can be used as in a normal request.
+
+    Example:
+        @shared_task(base=TenantTask)
+        def rollup_feedbacks():
+            ...
+
+        rollup_feedbacks.delay(schema_name='evilcorp')
+    """
+
+    def __call__(self, *args, schema_name=None, **kwargs):
+
+        if not schema_name:
+            raise ValueError(f'{self.name} requires the schema_name argument')
+
+        start = time.perf_counter()
+
+        with schema_context(schema_name):
+            result = super().__call__(*args, **kwargs)
+
+        logger.info('Task %s finished in schema %s in %.1f ms',
+                    self.name, schema_name, (time.perf_counter() - start) * 1000)
+
+        return result
+
+
+def get_tenant_schemas(include_inactive=False):
+    """
+    Get the schema names of every tenant, excluding the public one.
+
+    :param include_inactive: also return schemas of inactive organizations
+    :return: list of schema names
+    """
+
+    with schema_context(get_public_schema_name()):
+
+        organizations = OrganizationModel.objects.exclude(
+            schema_name=get_public_schema_name())
+
+        if not include_inactive:
+            organizations = organizations.filter(is_active=True)
+
+        return list(organizations.order_by('id').values_list('schema_name', flat=True))
+
+
+def build_tenant_fan_out(task_name, schemas, chunk_size=None, max_concurrency=None, task_kwargs=None, callback=None):
+    """
+    Build the canvas that runs a TenantTask once per schema.
+
+    Schemas are split in chunks of ``chunk_size`` and the chunks are spread over
+    at most ``max_concurrency`` lanes. Each lane is a chain, so a lane only keeps
+    one worker busy at a time, and all lanes run in parallel inside a chord whose
+    body collects the per-tenant results.
+
+    :param task_name: registered name of the TenantTask to run
+    :param schemas: schema names to run the task on
+    :param chunk_size: number of schemas handled by each subtask
+    :param max_concurrency: maximum number of subtasks running at the same time
+    :param task_kwargs: keyword arguments passed to the task on every schema
+    :param callback: optional signature called with the summary once every tenant is done
+    :return: celery signature ready to be applied
+    """
+
+    chunk_size = chunk_size or settings.TENANT_FAN_OUT_CHUNK_SIZE
+    max_concurrency = max_concurrency or settings.TENANT_FAN_OUT_MAX_CONCURRENCY
+    task_kwargs = task_kwargs or {}
+
+    chunks = [schemas[i:i + chunk_size]
+              for i in range(0, len(schemas), chunk_size)]
+    lanes = [chunks[i::max_concurrency]
+             for i in range(min(max_concurrency, len(chunks)))]
+
+    header = group(
+        chain(
+            run_tenant_chunk.s([], task_name, lane[0], task_kwargs),
+            *[run_tenant_chunk.s(task_name, lane_chunk, task_kwargs)
+              for lane_chunk in lane[1:]]
+        )
+        for lane in lanes
+    )
+
+    return chord(header, tenant_fan_out_completed.s(task_name, callback))
+
+
+@shared_task
+def run_tenant_chunk(previous_results, task_name, schemas, task_kwargs):
+    """
+    Run a TenantTask on every schema of a chunk, one after another.
+
+    A failure in one tenant is recorded and does not stop the rest of the chunk.
+
+    :param previous_results: results of the previous chunks of the same lane
+    :param task_name: registered name of the TenantTask to run
+    :param schemas: schema names of the chunk
+    :param task_kwargs: keyword arguments passed to the task
+    :return: results of the lane so far
+    """
+
+    task = current_app.tasks[task_name]
+    results = list(previous_results)
+
+    for schema_name in schemas:
+
+        start = time.perf_counter()
+
+        try:
+            result = task(schema_name=schema_name, **task_kwargs)
+            status = 'SUCCESS'
+        except Exception as e:
+            logger.exception('Task %s failed in schema %s',
+                             task_name, schema_name)
+            result = str(e)
+            status = 'FAILURE'
+
+        results.append({
+            'schema_name': schema_name,
+            'status': status,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+            'result': result,
+        })
+
+    return results
+
+
+@shared_task
+def tenant_fan_out_completed(lanes_results, task_name, callback=None):
+    """
+    Chord body of a tenant fan-out, it summarizes the per-tenant results.
+
+    :param lanes_results: list with the results of every lane
+    :param task_name: name of the task that was fanned out
+    :param callback: optional signature called with the summary
+    :return: summary of the fan-out
+    """
+
+    results = [result for lane in lanes_results for result in lane]
+    failed = [result['schema_name']
+              for result in results if result['status'] == 'FAILURE']
+    slowest = sorted(results, key=lambda r: r['elapsed_ms'], reverse=True)[:5]
+
+    summary = {
+        'task': task_name,
+        'tenants': len(results),
+        'failed': failed,
+        'total_elapsed_ms': round(sum(r['elapsed_ms'] for r in results), 1),
+        'slowest': [{'schema_name': r['schema_name'], 'elapsed_ms': r['elapsed_ms']} for r in slowest],
+    }
+
+    logger.info('Tenant fan-out of %s finished: %s tenants, %s failed',
+                task_name, summary['tenants'], len(failed))
+
+    if callback:
+        current_app.signature(callback).delay(summary)
+
+    return summary
+
+
+@shared_task
+def fan_out_tenant_task(task_name, task_kwargs=None, chunk_size=None, max_concurrency=None, include_inactive=False, callback=None):
+    """
+    Entry point to run a TenantTask over every tenant, meant to be scheduled
+    from a single celery beat entry.
+
+    :param task_name: registered name of the TenantTask to run
+    :param task_kwargs: keyword arguments passed to the task on every schema
+    :param chunk_size: number of schemas handled by each subtask
+    :param max_concurrency: maximum number of subtasks running at the same time
+    :param include_inactive: also run the task on inactive organizations
+    :param callback: optional signature called with the summary once every tenant is done
+    :return: number of schemas dispatched
+    """
+
+    schemas = get_tenant_schemas(include_inactive=include_inactive)
+
+    if not schemas:
+        return 0
+
+    build_tenant_fan_out(
+        task_name,
+        schemas,
+        chunk_size=chunk_size,
+        max_concurrency=max_concurrency,
+        task_kwargs=task_kwargs,
+        callback=callback,
+    ).apply_async()
+
+    return len(schemas)
@@ -0,0 +1,117 @@
+import json
+
+from django.db import connection
+from django_tenants.test.cases import TenantTestCase
+
+from feedback_tracking.administrative_system.users.models import UserModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def get_plan_nodes(plan):
+    """
+    Walk an EXPLAIN (FORMAT JSON) plan.
+
+    :param plan: plan node
+    :return: generator with every node of the plan
+    """
+
+    yield plan
+
+    for child in plan.get('Plans', []):
+        yield from get_plan_nodes(child)
+
+
+def get_parent_indexes(cursor, index_name):
+    """
+    Get the indexes of the partitioned tables an index is attached to, a query
+    on a partitioned table scans the indexes of the partitions.
+
+    :param cursor: database cursor
+    :param index_name: name of an index in the current schema
+    :return: list with the names of the parent indexes
+    """
+
+    cursor.execute(
+        '''
+        WITH RECURSIVE parents (oid) AS (
+            SELECT inhparent FROM pg_inherits WHERE inhrelid = %s::regclass
+            UNION
+            SELECT pg_inherits.inhparent FROM pg_inherits JOIN parents ON pg_inherits.inhrelid = parents.oid
+        )
+        SELECT relname FROM pg_class JOIN parents ON pg_class.oid = parents.oid
+        ''',
+        [index_name]
+    )
+
+    return [name for (name,) in cursor.fetchall()]
+
+
+class QueryPlanMixin:
+    """
+    Assertions on the plan of a queryset. Sequential scans are disabled so the
+    plan does not depend on how many rows the test tables have.
+    """
+
+    def setUp(self):
+
+        super().setUp()
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def explain(self, queryset):
+        """
+        :param queryset: queryset to explain
+        :return: list of plan nodes
+        """
+
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+
+        return list(get_plan_nodes(plan))
+
+    def assertUsesIndex(self, queryset, index_name):
+
+        scanned = set()
+
+        with connection.cursor() as cursor:
+            for node in self.explain(queryset):
+                if 'Index Name' in node:
+                    scanned.add(node['Index Name'])
+                    scanned.update(get_parent_indexes(cursor, node['Index Name']))
+
+        self.assertIn(index_name, scanned, queryset.explain())
+
+    def assertScansOnly(self, queryset, relation_name):
+
+        scanned = {node['Relation Name'] for node in self.explain(queryset) if 'Relation Name' in node}
+
+        self.assertEqual(scanned, {relation_name}, queryset.explain())
+
+
+class OrganizationTestCase(TenantTestCase):
+    """
+    Test case running in the schema of a new organization.
+    """
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+
+        tenant.owner = UserModel.objects.create(
+            first_name='Owner', middle_name='Test', last_name='Tenant',
+            username='tenant_owner', email='owner@test.com')
+        tenant.name = 'Test organization'
+        tenant.state = 'Test'
+        tenant.company_email = 'organization@test.com'
+        tenant.phone_number = '0000000000'
+        # Set so save does not replace the schema name
+        tenant.portal = 'test-organization'
+
+    @classmethod
+    def tearDownClass(cls):
+
+        owner = cls.tenant.owner
+        super().tearDownClass()
+        owner.delete(force_drop=True)
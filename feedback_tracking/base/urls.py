@@ -0,0 +1,15 @@
+from django.urls import path
+
+from .views import get_database_pool_metrics, get_stripe_client_metrics
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+urlpatterns = [
+    path('database-pool/', get_database_pool_metrics,
+         name='database_pool_metrics'),
+    path('stripe-client/', get_stripe_client_metrics,
+         name='stripe_client_metrics'),
+]
@@ -1,3 +1,41 @@
-from django.shortcuts import render
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
-# Create your views here.
+from feedback_tracking.singletons.stripe_singleton import StripeSingleton
+from .db import get_pool_stats
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_database_pool_metrics(request):
+    """
+    Get the metrics of the database connection pools
+
+    :return: pool statistics by database alias
+    """
+
+    pools = get_pool_stats()
+
+    if not pools:
+        return Response({'msg': 'Connection pooling is disabled'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'pools': pools}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_stripe_client_metrics(request):
+    """
+    Get the circuit state and the latency and errors by endpoint of the Stripe
+    client of the process that serves the request
+
+    :return: Stripe client statistics
+    """
+
+    return Response(StripeSingleton.stats(), status=status.HTTP_200_OK)
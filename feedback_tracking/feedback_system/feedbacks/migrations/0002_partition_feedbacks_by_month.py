@@ -0,0 +1,284 @@
+# Generated by Django 5.1.14 on 2026-10-18 10:12
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.utils import timezone
+
+
+# Frozen copies of feedbacks/partitions.py, the module can change later but
+# this migration must always do the same
+
+PARTITIONED_TABLES = (
+    ('feedbacks_feedbackmodel', 'created_at'),
+    ('feedbacks_positivefeedbacktypemodel', 'feedback_created_at'),
+    ('feedbacks_negativefeedbacktypemodel', 'feedback_created_at'),
+)
+
+FEEDBACK_TABLE = 'feedbacks_feedbackmodel'
+
+MODEL_NAMES = {
+    'feedbacks_feedbackmodel': 'FeedbackModel',
+    'feedbacks_positivefeedbacktypemodel': 'PositiveFeedbackTypeModel',
+    'feedbacks_negativefeedbacktypemodel': 'NegativeFeedbackTypeModel',
+}
+
+# Months created ahead when a schema is converted, the periodic task keeps them going
+PARTITIONS_AHEAD = 3
+
+# Rows moved to the partitioned tables by statement, every batch is committed
+# on its own so the locks and the WAL stay bounded
+COPY_BATCH_SIZE = 10000
+
+
+def get_month_start(value=None):
+
+    value = (value or timezone.now()).astimezone(datetime.timezone.utc)
+
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month_start, months):
+
+    index = month_start.year * 12 + month_start.month - 1 + months
+
+    return month_start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def create_month_partitions(cursor, month_start):
+
+    for table, _ in PARTITIONED_TABLES:
+        cursor.execute(
+            f'CREATE TABLE {table}_p{month_start:%Y_%m} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)',
+            [month_start, add_months(month_start, 1)]
+        )
+
+
+def get_unpartitioned_table(table):
+
+    return f'{table}_unpartitioned'
+
+
+def table_exists(cursor, table):
+
+    cursor.execute('SELECT to_regclass(%s)', [table])
+
+    return cursor.fetchone()[0] is not None
+
+
+def is_partitioned(cursor, table):
+
+    cursor.execute(
+        'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [table])
+
+    return cursor.fetchone()[0]
+
+
+def create_partitioned_table(cursor, table, key):
+    """
+    Rename a table and create in its place an empty table with the same columns
+    partitioned by range on the key. The primary key becomes (id, key) and the
+    id keeps its own sequence, it starts after the ids of the old table.
+    """
+
+    old_table = get_unpartitioned_table(table)
+
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {old_table}')
+    cursor.execute(
+        f'ALTER TABLE {old_table} RENAME CONSTRAINT {table}_pkey TO {old_table}_pkey')
+    cursor.execute(
+        f'ALTER TABLE {old_table} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+
+    # The new table creates indexes with the same names, the copy only needs the primary key
+    cursor.execute(
+        'SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() '
+        'AND tablename = %s AND indexname <> %s',
+        [old_table, f'{old_table}_pkey']
+    )
+    for (index_name,) in cursor.fetchall():
+        cursor.execute(f'DROP INDEX {index_name}')
+
+    cursor.execute(
+        f'CREATE TABLE {table} (LIKE {old_table} INCLUDING DEFAULTS) PARTITION BY RANGE ({key})')
+    cursor.execute(f'ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL')
+    cursor.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, {key})')
+    cursor.execute(f'CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    cursor.execute(
+        f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+    cursor.execute(
+        f"SELECT setval('{table}_id_seq', (SELECT coalesce(max(id), 0) + 1 FROM {old_table}), false)")
+    cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+
+def create_constraints(schema_editor, model, table):
+    """
+    Create the foreign keys and indexes of the model on the partitioned table
+    while it is empty. The types reference their feedback with a composite key
+    that includes the partition key, Django can not declare it on the field.
+    """
+
+    for field in model._meta.local_fields:
+
+        if field.remote_field and field.db_constraint:
+            schema_editor.execute(schema_editor._create_fk_sql(
+                model, field, '_fk_%(to_table)s_%(to_column)s'))
+
+        for sql in schema_editor._field_indexes_sql(model, field):
+            schema_editor.execute(sql)
+
+    if table != FEEDBACK_TABLE:
+        schema_editor.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {table}_feedback_fk '
+            f'FOREIGN KEY (feedback_id, feedback_created_at) '
+            f'REFERENCES {FEEDBACK_TABLE} (id, created_at) ON DELETE CASCADE')
+
+
+def prepare_partitioned_tables(apps, schema_editor):
+    """
+    Create the partitioned tables, in one transaction so a rerun of a failed
+    migration finds them either all created or none.
+    """
+
+    with transaction.atomic(using=schema_editor.connection.alias), schema_editor.connection.cursor() as cursor:
+
+        if is_partitioned(cursor, FEEDBACK_TABLE):
+            return
+
+        for table, key in PARTITIONED_TABLES:
+            create_partitioned_table(cursor, table, key)
+
+        # Monthly partitions from the oldest feedback to some months ahead
+        cursor.execute(
+            f'SELECT min(created_at) FROM {get_unpartitioned_table(FEEDBACK_TABLE)}')
+        first = cursor.fetchone()[0]
+        month_start = get_month_start(first)
+        last_month = add_months(get_month_start(), PARTITIONS_AHEAD)
+
+        while month_start <= last_month:
+            create_month_partitions(cursor, month_start)
+            month_start = add_months(month_start, 1)
+
+        for table, _ in PARTITIONED_TABLES:
+            create_constraints(schema_editor, apps.get_model(
+                'feedbacks', MODEL_NAMES[table]), table)
+
+
+def copy_batches(cursor, sql):
+    """
+    Run a batch until it moves less rows than COPY_BATCH_SIZE.
+    """
+
+    while True:
+        cursor.execute(sql, [COPY_BATCH_SIZE])
+        if cursor.fetchone()[0] < COPY_BATCH_SIZE:
+            return
+
+
+def copy_rows(apps, schema_editor):
+    """
+    Move the rows of the old tables to the partitioned ones by batches, the
+    feedbacks first so the types can reference them. The partition key of the
+    types is read from their feedback in the same statement, types without
+    feedback can not satisfy the foreign key and are left out.
+
+    Every batch deletes the rows it copies from the old table, a rerun after a
+    failure continues with the rows that are left.
+    """
+
+    with schema_editor.connection.cursor() as cursor:
+
+        for table, key in PARTITIONED_TABLES:
+
+            old_table = get_unpartitioned_table(table)
+
+            if not table_exists(cursor, old_table):
+                continue
+            columns = [field.column for field in apps.get_model(
+                'feedbacks', MODEL_NAMES[table])._meta.local_fields if field.column != key]
+            moved_columns = ', '.join(columns)
+
+            if table == FEEDBACK_TABLE:
+                insert = (f'INSERT INTO {table} ({moved_columns}, {key}) '
+                          f'SELECT {moved_columns}, {key} FROM moved')
+                returning = f'{moved_columns}, {key}'
+            else:
+                insert = (f'INSERT INTO {table} ({moved_columns}, {key}) '
+                          f'SELECT {", ".join(f"moved.{column}" for column in columns)}, feedback.created_at '
+                          f'FROM moved JOIN {FEEDBACK_TABLE} AS feedback ON feedback.id = moved.feedback_id')
+                returning = moved_columns
+
+            copy_batches(cursor, f'''
+                WITH moved AS (
+                    DELETE FROM {old_table} WHERE id IN (
+                        SELECT id FROM {old_table} ORDER BY id LIMIT %s
+                    ) RETURNING {returning}
+                ), inserted AS (
+                    {insert}
+                )
+                SELECT count(*) FROM moved
+            ''')
+
+
+def drop_unpartitioned_tables(apps, schema_editor):
+
+    with transaction.atomic(using=schema_editor.connection.alias), schema_editor.connection.cursor() as cursor:
+        for table, _ in reversed(PARTITIONED_TABLES):
+            cursor.execute(f'DROP TABLE IF EXISTS {get_unpartitioned_table(table)}')
+
+
+class Migration(migrations.Migration):
+
+    # Every batch of the copy is its own transaction, every step can be run
+    # again when the migration failed halfway
+    atomic = False
+
+    dependencies = [
+        ('feedbacks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='negativefeedbacktypemodel',
+            name='feedback',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='negative_types', to='feedbacks.feedbackmodel'),
+        ),
+        migrations.AlterField(
+            model_name='positivefeedbacktypemodel',
+            name='feedback',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='positive_types', to='feedbacks.feedbackmodel'),
+        ),
+        # Filled while the rows are copied, NOT NULL on the partitioned tables
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='negativefeedbacktypemodel',
+                    name='feedback_created_at',
+                    field=models.DateTimeField(),
+                    preserve_default=False,
+                ),
+                migrations.AddField(
+                    model_name='positivefeedbacktypemodel',
+                    name='feedback_created_at',
+                    field=models.DateTimeField(),
+                    preserve_default=False,
+                ),
+            ],
+            # IF NOT EXISTS, the migration is not atomic and can be run again
+            database_operations=[
+                migrations.RunSQL(
+                    'ALTER TABLE feedbacks_negativefeedbacktypemodel '
+                    'ADD COLUMN IF NOT EXISTS feedback_created_at timestamp with time zone NULL',
+                    reverse_sql='ALTER TABLE feedbacks_negativefeedbacktypemodel DROP COLUMN feedback_created_at',
+                ),
+                migrations.RunSQL(
+                    'ALTER TABLE feedbacks_positivefeedbacktypemodel '
+                    'ADD COLUMN IF NOT EXISTS feedback_created_at timestamp with time zone NULL',
+                    reverse_sql='ALTER TABLE feedbacks_positivefeedbacktypemodel DROP COLUMN feedback_created_at',
+                ),
+            ],
+        ),
+        migrations.RunPython(prepare_partitioned_tables),
+        migrations.RunPython(copy_rows),
+        migrations.RunPython(drop_unpartitioned_tables),
+    ]
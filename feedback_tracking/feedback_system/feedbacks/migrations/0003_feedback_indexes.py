@@ -0,0 +1,89 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:31
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+# CREATE INDEX CONCURRENTLY is not supported on partitioned tables, so every
+# index is created invalid on the parent only, built concurrently on each
+# partition and attached, the parent index becomes valid with the last one
+PARTITIONED_INDEXES = (
+    ('feedback_loc_created_idx', 'btree', 'location_id, created_at'),
+    ('feedback_class_created_idx', 'btree', 'classification, created_at'),
+    ('feedback_created_brin_idx', 'brin', 'created_at'),
+)
+
+
+def create_partitioned_indexes(apps, schema_editor):
+
+    table = apps.get_model('feedbacks', 'FeedbackModel')._meta.db_table
+
+    with schema_editor.connection.cursor() as cursor:
+
+        cursor.execute(
+            'SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = %s::regclass',
+            [table]
+        )
+        partitions = [row[0] for row in cursor.fetchall()]
+
+        for name, method, columns in PARTITIONED_INDEXES:
+
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} USING {method} ({columns})')
+
+            for partition in partitions:
+
+                partition_index = f'{partition}_{name.removeprefix("feedback_")}'
+
+                cursor.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} '
+                    f'ON {partition} USING {method} ({columns})')
+
+                cursor.execute(
+                    'SELECT 1 FROM pg_inherits WHERE inhrelid = %s::regclass AND inhparent = %s::regclass',
+                    [partition_index, name]
+                )
+
+                if cursor.fetchone() is None:
+                    cursor.execute(
+                        f'ALTER INDEX {name} ATTACH PARTITION {partition_index}')
+
+
+def drop_partitioned_indexes(apps, schema_editor):
+
+    with schema_editor.connection.cursor() as cursor:
+        for name, _, _ in PARTITIONED_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('feedbacks', '0002_partition_feedbacks_by_month'),
+        ('locations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='feedbackmodel',
+                    index=models.Index(fields=['location', 'created_at'], name='feedback_loc_created_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='feedbackmodel',
+                    index=models.Index(fields=['classification', 'created_at'], name='feedback_class_created_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='feedbackmodel',
+                    index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='feedback_created_brin_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_partitioned_indexes,
+                                     drop_partitioned_indexes),
+            ],
+        ),
+    ]
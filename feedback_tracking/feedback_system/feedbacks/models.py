@@ -1,8 +1,15 @@
 from django.db import models
+from django.contrib.postgres.indexes import BrinIndex
 from feedback_tracking.base.models import BaseModel
 
 
 class FeedbackModel(BaseModel):
+    """
+    Feedback given in a location.
+
+    The table is partitioned by month on created_at (see partitions.py), so
+    filter by a created_at range whenever possible to scan only those months.
+    """
 
     class FeedbackClassification(models.TextChoices):
         EXCELLENT = "EX", "Excelente"
@@ -19,6 +26,16 @@ class FeedbackModel(BaseModel):
     location = models.ForeignKey(
         "locations.LocationModel", on_delete=models.CASCADE, related_name="location_feedbacks")
 
+    class Meta:
+        indexes = [
+            models.Index(name='feedback_loc_created_idx',
+                         fields=['location', 'created_at']),
+            models.Index(name='feedback_class_created_idx',
+                         fields=['classification', 'created_at']),
+            # Rows are appended in created_at order, a BRIN index stays tiny
+            BrinIndex(name='feedback_created_brin_idx', fields=['created_at']),
+        ]
+
     def __repr__(self):
         return f'FeedbackModel(id={self.id}, classification={self.classification}, comment={self.comment}, location={self.location})'
 
@@ -49,8 +66,12 @@ class NegativeFeedbackModel(BaseModel):
 
 
 class PositiveFeedbackTypeModel(BaseModel):
+    # The constraint is the composite (feedback_id, feedback_created_at) ->
+    # (id, created_at) ON DELETE CASCADE of migration 0002, Django can not declare it
     feedback = models.ForeignKey(
-        FeedbackModel, on_delete=models.CASCADE, related_name="positive_types")
+        FeedbackModel, on_delete=models.CASCADE, related_name="positive_types", db_constraint=False)
+    # Partition key, always the created_at of the feedback
+    feedback_created_at = models.DateTimeField()
     positive_feedback = models.ForeignKey(
         PositiveFeedbackModel, on_delete=models.CASCADE, related_name="positive_feedbacks")
 
@@ -62,8 +83,12 @@ class PositiveFeedbackTypeModel(BaseModel):
 
 
 class NegativeFeedbackTypeModel(models.Model):
+    # The constraint is the composite (feedback_id, feedback_created_at) ->
+    # (id, created_at) ON DELETE CASCADE of migration 0002, Django can not declare it
     feedback = models.ForeignKey(
-        FeedbackModel, on_delete=models.CASCADE, related_name="negative_types")
+        FeedbackModel, on_delete=models.CASCADE, related_name="negative_types", db_constraint=False)
+    # Partition key, always the created_at of the feedback
+    feedback_created_at = models.DateTimeField()
     negative_feedback = models.ForeignKey(
         NegativeFeedbackModel, on_delete=models.CASCADE, related_name="negative_feedbacks")
 
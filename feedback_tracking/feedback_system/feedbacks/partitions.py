@@ -0,0 +1,284 @@
+import re
+import logging
+import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+# Tables partitioned by month and the column used as partition key, the join
+# tables use the creation date of their feedback so a month is always complete
+PARTITIONED_TABLES = (
+    ('feedbacks_feedbackmodel', 'created_at'),
+    ('feedbacks_positivefeedbacktypemodel', 'feedback_created_at'),
+    ('feedbacks_negativefeedbacktypemodel', 'feedback_created_at'),
+)
+
+FEEDBACK_TABLE = PARTITIONED_TABLES[0][0]
+
+PARTITION_NAME_REGEX = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def get_month_start(value=None):
+    """
+    Get the first instant of the month of a datetime in UTC.
+
+    :param value: aware datetime, now by default
+    :return: aware datetime of the month start
+    """
+
+    value = (value or timezone.now()).astimezone(datetime.timezone.utc)
+
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month_start, months):
+    """
+    Move a month start some months forward or backward.
+
+    :param month_start: datetime of a month start
+    :param months: number of months, negative to go backward
+    :return: datetime of the new month start
+    """
+
+    index = month_start.year * 12 + month_start.month - 1 + months
+
+    return month_start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def get_partition_name(table, month_start):
+    """
+    Get the name of the partition of a table for a month.
+
+    :param table: name of the partitioned table
+    :param month_start: datetime of the month start
+    :return: partition name, e.g. feedbacks_feedbackmodel_p2025_08
+    """
+
+    return f'{table}_p{month_start:%Y_%m}'
+
+
+def get_default_partition_name(table):
+    """
+    :param table: name of the partitioned table
+    :return: name of its default partition
+    """
+
+    return f'{table}_default'
+
+
+def move_rows_out_of_default(cursor, month_start, month_end):
+    """
+    Move to temporary tables the rows of a month that are in the default
+    partitions, a partition can not be created while the default one holds
+    rows of its range. The types reference their feedback with ON DELETE
+    CASCADE, so every type of the month is moved, also the ones already in a
+    partition. It must run in a transaction.
+
+    :param cursor: database cursor
+    :param month_start: datetime of the month start
+    :param month_end: datetime of the next month start
+    :return: list of tuples (table, temporary table, number of rows)
+    """
+
+    moved = []
+    sources = []
+
+    for table, key in PARTITIONED_TABLES:
+
+        source = get_default_partition_name(table) if table == FEEDBACK_TABLE else table
+        temporary = f'{table}_moving'
+
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {temporary} ON COMMIT DROP AS '
+            f'SELECT * FROM {source} WHERE {key} >= %s AND {key} < %s',
+            [month_start, month_end]
+        )
+        moved.append((table, temporary, cursor.rowcount))
+        sources.append((source, key))
+
+    # The types first, deleting a feedback deletes its types
+    for source, key in reversed(sources):
+        cursor.execute(
+            f'DELETE FROM {source} WHERE {key} >= %s AND {key} < %s', [month_start, month_end])
+
+    return moved
+
+
+def create_month_partitions(cursor, month_start):
+    """
+    Create the partitions of a month in every partitioned table of the
+    current schema, if they do not exist yet.
+
+    Rows of the month can already be in the default partitions (backdated or
+    far future feedbacks, months removed by the retention), they are moved out,
+    the partitions are created and the rows are inserted again so they land in
+    the new partitions. It must run in a transaction.
+
+    :param cursor: database cursor
+    :param month_start: datetime of the month start
+    :return: list with the names of the created partitions
+    """
+
+    month_end = add_months(month_start, 1)
+    missing = []
+
+    for table, key in PARTITIONED_TABLES:
+
+        name = get_partition_name(table, month_start)
+        cursor.execute('SELECT to_regclass(%s)', [name])
+
+        if cursor.fetchone()[0] is None:
+            missing.append((table, key, name))
+
+    if not missing:
+        return []
+
+    stranded = False
+
+    for table, key, _ in missing:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {get_default_partition_name(table)} WHERE {key} >= %s AND {key} < %s)',
+            [month_start, month_end]
+        )
+        stranded = stranded or cursor.fetchone()[0]
+
+    moved = move_rows_out_of_default(cursor, month_start, month_end) if stranded else []
+
+    for table, _, name in missing:
+        cursor.execute(
+            f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)',
+            [month_start, month_end]
+        )
+
+    # The feedbacks first, the types reference them
+    for table, temporary, rows in moved:
+
+        cursor.execute(f'INSERT INTO {table} SELECT * FROM {temporary}')
+        cursor.execute(f'DROP TABLE {temporary}')
+
+        if rows:
+            logger.warning('%s rows of %s moved to the partition of %s',
+                           rows, table, f'{month_start:%Y-%m}')
+
+    return [name for _, _, name in missing]
+
+
+def get_partitions(cursor, table):
+    """
+    Get the monthly partitions of a table in the current schema, the default
+    partition is not included.
+
+    :param cursor: database cursor
+    :param table: name of the partitioned table
+    :return: list of tuples (partition name, month start) sorted by month
+    """
+
+    cursor.execute(
+        '''
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = %s::regclass
+        ''',
+        [table]
+    )
+
+    partitions = []
+
+    for (name,) in cursor.fetchall():
+
+        match = PARTITION_NAME_REGEX.search(name)
+
+        if match:
+            month_start = datetime.datetime(
+                int(match.group(1)), int(match.group(2)), 1, tzinfo=datetime.timezone.utc)
+            partitions.append((name, month_start))
+
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_feedback_partitions(months_ahead=None):
+    """
+    Create the partitions of the current month and the following ones in the
+    current schema, so inserts never fall in the default partition.
+
+    :param months_ahead: number of future months, FEEDBACK_PARTITIONS_AHEAD by default
+    :return: list with the names of the created partitions
+    """
+
+    if months_ahead is None:
+        months_ahead = settings.FEEDBACK_PARTITIONS_AHEAD
+
+    current_month = get_month_start()
+    created = []
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for months in range(months_ahead + 1):
+            created += create_month_partitions(
+                cursor, add_months(current_month, months))
+
+    return created
+
+
+def remove_feedback_partitions_before(cutoff, detach=False):
+    """
+    Remove the monthly partitions that end before a date in the current schema.
+    Removing a partition is a catalog operation, no rows are deleted one by one.
+
+    The types are removed first because they reference the feedbacks, a
+    detached type partition loses its foreign key so it does not block the
+    removal of the feedbacks. The feedback partitions are always detached
+    before they are dropped, detaching checks that no type references them.
+
+    :param cutoff: datetime, partitions of older months are removed
+    :param detach: detach the partitions and keep them as plain tables instead of dropping them
+    :return: list with the names of the removed partitions
+    """
+
+    cutoff_month = get_month_start(cutoff)
+    removed = []
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table, _ in reversed(PARTITIONED_TABLES):
+            for name, month_start in get_partitions(cursor, table):
+
+                if month_start >= cutoff_month:
+                    break
+
+                cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+
+                if not detach:
+                    cursor.execute(f'DROP TABLE {name}')
+                elif table != FEEDBACK_TABLE:
+                    drop_feedback_foreign_keys(cursor, name)
+
+                removed.append(name)
+
+    return removed
+
+
+def drop_feedback_foreign_keys(cursor, table):
+    """
+    Drop the foreign keys of a table to the feedbacks.
+
+    :param cursor: database cursor
+    :param table: name of the table
+    """
+
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f' "
+        'AND confrelid = %s::regclass',
+        [table, FEEDBACK_TABLE]
+    )
+
+    for (name,) in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
@@ -0,0 +1,44 @@
+from celery import shared_task
+from django.conf import settings
+
+from feedback_tracking.base.tenant_tasks import TenantTask
+from .partitions import add_months, ensure_feedback_partitions, get_month_start, remove_feedback_partitions_before
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+@shared_task(base=TenantTask)
+def create_feedback_partitions(months_ahead=None):
+    """
+    Task to create the monthly feedback partitions of the next months in a tenant.
+    It should be fanned out over every tenant periodically (e.g., daily).
+
+    :param months_ahead: number of future months, FEEDBACK_PARTITIONS_AHEAD by default
+    :return: names of the created partitions
+    """
+
+    return ensure_feedback_partitions(months_ahead)
+
+
+@shared_task(base=TenantTask)
+def apply_feedback_retention(months=None, detach=None):
+    """
+    Task to remove the feedback partitions older than the retention period in a tenant.
+    Nothing is removed when the retention is not configured.
+
+    :param months: months to keep, FEEDBACK_RETENTION_MONTHS by default
+    :param detach: detach instead of drop, FEEDBACK_RETENTION_DETACH by default
+    :return: names of the removed partitions
+    """
+
+    months = settings.FEEDBACK_RETENTION_MONTHS if months is None else months
+    detach = settings.FEEDBACK_RETENTION_DETACH if detach is None else detach
+
+    if not months:
+        return []
+
+    cutoff = add_months(get_month_start(), -months)
+
+    return remove_feedback_partitions_before(cutoff, detach=detach)
@@ -1,3 +1,84 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from feedback_tracking.base.test_cases import OrganizationTestCase, QueryPlanMixin
+from feedback_tracking.feedback_system.feedbacks.models import FeedbackModel
+from feedback_tracking.feedback_system.feedbacks.partitions import add_months, get_month_start, get_partition_name
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+UTC = datetime.timezone.utc
+
+
+class PartitionHelpersTests(SimpleTestCase):
+
+    def test_get_month_start(self):
+
+        value = datetime.datetime(2025, 8, 17, 13, 45, 12, 500, tzinfo=UTC)
+
+        self.assertEqual(get_month_start(value), datetime.datetime(2025, 8, 1, tzinfo=UTC))
+
+    def test_get_month_start_converts_to_utc(self):
+
+        # Still July in UTC
+        value = datetime.datetime(2025, 8, 1, 1, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=3)))
+
+        self.assertEqual(get_month_start(value), datetime.datetime(2025, 7, 1, tzinfo=UTC))
+
+    def test_add_months(self):
+
+        month_start = datetime.datetime(2025, 8, 1, tzinfo=UTC)
+
+        self.assertEqual(add_months(month_start, 0), month_start)
+        self.assertEqual(add_months(month_start, 1), datetime.datetime(2025, 9, 1, tzinfo=UTC))
+        self.assertEqual(add_months(month_start, -8), datetime.datetime(2024, 12, 1, tzinfo=UTC))
+
+    def test_add_months_across_years(self):
+
+        month_start = datetime.datetime(2025, 12, 1, tzinfo=UTC)
+
+        self.assertEqual(add_months(month_start, 1), datetime.datetime(2026, 1, 1, tzinfo=UTC))
+        self.assertEqual(add_months(month_start, 25), datetime.datetime(2028, 1, 1, tzinfo=UTC))
+        self.assertEqual(add_months(month_start, -12), datetime.datetime(2024, 12, 1, tzinfo=UTC))
+
+    def test_get_partition_name(self):
+
+        self.assertEqual(
+            get_partition_name('feedbacks_feedbackmodel', datetime.datetime(2025, 3, 1, tzinfo=UTC)),
+            'feedbacks_feedbackmodel_p2025_03'
+        )
+
+
+class FeedbackQueryPlanTests(QueryPlanMixin, OrganizationTestCase):
+
+    def setUp(self):
+
+        super().setUp()
+
+        month_start = get_month_start()
+        self.month_partition = get_partition_name(FeedbackModel._meta.db_table, month_start)
+        self.this_month = FeedbackModel.objects.filter(
+            created_at__gte=month_start, created_at__lt=add_months(month_start, 1))
+
+    def test_partition_pruning(self):
+
+        self.assertScansOnly(self.this_month, self.month_partition)
+
+    def test_feedbacks_by_location_and_date(self):
+
+        self.assertUsesIndex(self.this_month.filter(location_id=1), 'feedback_loc_created_idx')
+
+    def test_feedbacks_by_classification_and_date(self):
+
+        self.assertUsesIndex(
+            self.this_month.filter(classification=FeedbackModel.FeedbackClassification.BAD),
+            'feedback_class_created_idx'
+        )
+
+    def test_feedbacks_by_date(self):
+
+        self.assertUsesIndex(self.this_month, 'feedback_created_brin_idx')
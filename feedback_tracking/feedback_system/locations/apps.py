@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
 
 
 class LocationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'feedback_tracking.feedback_system.locations'
+
+    def ready(self):
+
+        from .models import LocationModel
+        from .kiosk_auth import forget_location_kiosk_auth
+
+        # A location changed or removed invalidates the kiosk credentials cached
+        post_save.connect(forget_location_kiosk_auth, sender=LocationModel,
+                          dispatch_uid='kiosk_auth_location_saved')
+        post_delete.connect(forget_location_kiosk_auth, sender=LocationModel,
+                            dispatch_uid='kiosk_auth_location_deleted')
@@ -0,0 +1,62 @@
+from django.db.models import F
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+# Weekday fields of AvailabilityModel in the order of datetime.weekday(),
+# the bit of a day in weekdays_mask is 1 << weekday
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+ALL_WEEKDAYS_MASK = (1 << len(WEEKDAYS)) - 1
+
+
+def get_weekdays_mask(days: dict):
+    """
+    :param days: weekday name -> bool, e.g. the fields of an availability
+    :return: bitmask of the open weekdays
+    """
+
+    return sum(1 << weekday for weekday, day in enumerate(WEEKDAYS) if days.get(day))
+
+
+def get_second_of_day(value):
+    """
+    :param value: time or datetime
+    :return: seconds since midnight
+    """
+
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def is_open_on(weekdays_mask: int, at):
+    """
+    :param weekdays_mask: bitmask of the open weekdays
+    :param at: date or datetime
+    :return: True when the weekday of at is open
+    """
+
+    return bool(weekdays_mask & (1 << at.weekday()))
+
+
+def filter_open_at(queryset, at, prefix: str = ''):
+    """
+    Keep the rows whose availability is open at a moment, every row is
+    evaluated by the database in the same query with a bitwise AND.
+
+    :param queryset: queryset of AvailabilityModel or of a model related to it
+    :param at: datetime
+    :param prefix: lookup of the availability, e.g. 'availability_location__'
+    :return: filtered queryset
+    """
+
+    second = get_second_of_day(at)
+
+    return queryset.annotate(
+        open_weekday=F(f'{prefix}weekdays_mask').bitand(1 << at.weekday()),
+    ).filter(**{
+        'open_weekday__gt': 0,
+        f'{prefix}start_second__lte': second,
+        f'{prefix}end_second__gte': second,
+    })
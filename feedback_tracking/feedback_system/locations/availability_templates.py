@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AvailabilityModel, GroupAvailabilityTemplateModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def get_group_templates(group_ids):
+    """
+    :param group_ids: ids of the groups
+    :return: dict group id -> GroupAvailabilityTemplateModel, groups without template are missing
+    """
+
+    return {
+        template.group_id: template
+        for template in GroupAvailabilityTemplateModel.objects.filter(group_id__in=set(group_ids))
+    }
+
+
+def build_location_availability(location, template=None):
+    """
+    :param location: new location
+    :param template: template of the group of the location, optional
+    :return: unsaved AvailabilityModel, the default one without template
+    """
+
+    if template is None:
+        return AvailabilityModel(location=location)
+
+    return template.build_availability(location)
+
+
+@transaction.atomic
+def save_group_template(group, schedule: dict, apply: bool = True):
+    """
+    Save the availability template of a group and copy it to the availability
+    of every location of the group with one UPDATE.
+
+    :param group: group of the template
+    :param schedule: start_time, end_time and the weekdays
+    :param apply: also update the locations of the group
+    :return: tuple (template, updated availabilities)
+    """
+
+    template = GroupAvailabilityTemplateModel.objects.filter(group=group).first() \
+        or GroupAvailabilityTemplateModel(group=group)
+
+    for field, value in schedule.items():
+        setattr(template, field, value)
+
+    template.save()
+
+    updated = apply_group_template(template) if apply else 0
+
+    return template, updated
+
+
+def apply_group_template(template):
+    """
+    Copy a template to the availability of every location of its group, the
+    values are the same for every row so it is a single UPDATE statement.
+
+    :param template: GroupAvailabilityTemplateModel
+    :return: updated availabilities
+    """
+
+    return AvailabilityModel.objects.filter(location__group_id=template.group_id).update(
+        **template.get_schedule(), updated_at=timezone.now())
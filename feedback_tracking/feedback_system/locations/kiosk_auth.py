@@ -0,0 +1,90 @@
+import hmac
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from feedback_tracking.base.cache import is_shared_cache
+from .models import LocationModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def get_kiosk_auth_cache_key(schema_name: str, location_id: int):
+    """
+    :param schema_name: schema of the tenant
+    :param location_id: id of the location
+    :return: cache key of the machine number of the location
+    """
+
+    return f'kiosk_auth:{schema_name}:{location_id}'
+
+
+def get_kiosk_machine_number(location_id: int):
+    """
+    Get the machine number of an active location, it is cached so the kiosks
+    do not query the location on every request. It is only cached when the
+    cache is shared, the rotations run in celery workers and must invalidate
+    the machine number in every web process.
+
+    :param location_id: id of the location
+    :return: machine number, '' when the location does not exist or is inactive
+    """
+
+    def get_current():
+        return LocationModel.objects.filter(
+            id=location_id, is_active=True).values_list('machine_number', flat=True).first() or ''
+
+    if not is_shared_cache():
+        return get_current()
+
+    key = get_kiosk_auth_cache_key(
+        connections[DEFAULT_DB_ALIAS].schema_name, location_id)
+    machine_number = cache.get(key)
+
+    if machine_number is None:
+        machine_number = get_current()
+        cache.set(key, machine_number, settings.KIOSK_AUTH_CACHE_SECONDS)
+
+    return machine_number
+
+
+def is_kiosk_authorized(location_id, machine_number: str):
+    """
+    :param location_id: id of the location sent by the kiosk
+    :param machine_number: machine number sent by the kiosk
+    :return: True when the machine number is the current one of an active location
+    """
+
+    try:
+        location_id = int(location_id)
+    except (TypeError, ValueError):
+        return False
+
+    current = get_kiosk_machine_number(location_id)
+
+    return bool(current) and hmac.compare_digest(current, machine_number)
+
+
+def forget_kiosk_auth(location_ids):
+    """
+    Remove the cached machine numbers of the locations once the transaction
+    that changed them is committed.
+
+    :param location_ids: ids of the locations
+    """
+
+    schema_name = connections[DEFAULT_DB_ALIAS].schema_name
+    keys = [get_kiosk_auth_cache_key(schema_name, location_id) for location_id in location_ids]
+
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget_location_kiosk_auth(sender, instance, **kwargs):
+    """
+    Receiver of the changes of a location.
+    """
+
+    forget_kiosk_auth([instance.id])
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='availabilitymodel',
+            name='end_second',
+            field=models.PositiveIntegerField(default=86399),
+        ),
+        migrations.AddField(
+            model_name='availabilitymodel',
+            name='start_second',
+            field=models.PositiveIntegerField(default=21600),
+        ),
+        migrations.AddField(
+            model_name='availabilitymodel',
+            name='weekdays_mask',
+            field=models.PositiveSmallIntegerField(default=127),
+        ),
+        migrations.RunSQL(
+            sql=(
+                'UPDATE locations_availabilitymodel SET '
+                'weekdays_mask = monday::int | (tuesday::int << 1) | (wednesday::int << 2) | '
+                '(thursday::int << 3) | (friday::int << 4) | (saturday::int << 5) | (sunday::int << 6), '
+                'start_second = FLOOR(EXTRACT(EPOCH FROM start_time))::int, '
+                'end_second = FLOOR(EXTRACT(EPOCH FROM end_time))::int'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
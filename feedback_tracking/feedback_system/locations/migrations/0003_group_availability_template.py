@@ -0,0 +1,39 @@
+# Generated by Django 5.1.14 on 2026-10-18 23:01
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0002_availability_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupAvailabilityTemplateModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('start_time', models.TimeField(default=datetime.time(6, 0))),
+                ('end_time', models.TimeField(default=datetime.time(23, 59, 59))),
+                ('monday', models.BooleanField(default=True)),
+                ('tuesday', models.BooleanField(default=True)),
+                ('wednesday', models.BooleanField(default=True)),
+                ('thursday', models.BooleanField(default=True)),
+                ('friday', models.BooleanField(default=True)),
+                ('saturday', models.BooleanField(default=True)),
+                ('sunday', models.BooleanField(default=True)),
+                ('weekdays_mask', models.PositiveSmallIntegerField(default=127)),
+                ('start_second', models.PositiveIntegerField(default=21600)),
+                ('end_second', models.PositiveIntegerField(default=86399)),
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='availability_template', to='locations.groupmodel')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
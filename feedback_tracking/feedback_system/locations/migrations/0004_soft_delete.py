@@ -0,0 +1,23 @@
+# Generated by Django 5.1.14 on 2026-10-18 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0003_group_availability_template'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupmodel',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='locationmodel',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
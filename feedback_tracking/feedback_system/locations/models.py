@@ -7,10 +7,11 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
 from django.db import models
 
-from feedback_tracking.base.models import BaseModel
+from feedback_tracking.base.models import BaseModel, SoftDeleteModel
+from .availability import ALL_WEEKDAYS_MASK, WEEKDAYS, get_weekdays_mask, get_second_of_day
 
 
-class GroupModel(BaseModel):
+class GroupModel(SoftDeleteModel):
     name = models.CharField(unique=True, max_length=100,
                             null=False, blank=False)
     target_percentage = models.IntegerField(
@@ -29,7 +30,7 @@ class GroupModel(BaseModel):
         return f'GroupModel(id={self.id}, name={self.name}, target_percentage={self.target_percentage}, description={self.description})'
 
 
-class LocationModel(BaseModel):
+class LocationModel(SoftDeleteModel):
 
     name = models.CharField(max_length=100, null=False,
                             blank=False, unique=True)
@@ -46,13 +47,21 @@ class LocationModel(BaseModel):
         GroupModel, on_delete=models.CASCADE, related_name="location_group")
     is_active = models.BooleanField(default=True)
 
-    def generate_credentials(self):
-        """Regenerate the machine number and signature."""
+    def build_credentials(self):
+        """
+        Set a new machine number and signature without saving them, used
+        before inserting the location (also by bulk_create).
+        """
 
         self.machine_number = self.name.replace(
             ' ', '') + str(uuid.uuid4())[:8]
         self.signature = hmac.new(
             settings.HMAC_SECRET_KEY.encode(), self.machine_number.encode(), hashlib.sha256).hexdigest()
+
+    def generate_credentials(self):
+        """Regenerate the machine number and signature."""
+
+        self.build_credentials()
         super().save(update_fields=["machine_number", "signature"])
 
     @staticmethod
@@ -75,11 +84,11 @@ class LocationModel(BaseModel):
 
     def save(self, *args, **kwargs):
 
-        creating = self._state.adding and not self.pk
-        super().save(*args, **kwargs)
+        # The credentials are inserted with the location, no second UPDATE
+        if self._state.adding and not self.pk and not self.machine_number:
+            self.build_credentials()
 
-        if creating:
-            self.generate_credentials()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -94,9 +103,7 @@ class LocationModel(BaseModel):
                 f'is_active={self.is_active}')
 
 
-class AvailabilityModel(BaseModel):
-    location = models.OneToOneField(
-        LocationModel, on_delete=models.CASCADE, related_name="availability_location")
+class BaseAvailabilityModel(BaseModel):
     start_time = models.TimeField(default=time(6, 0, 0))
     end_time = models.TimeField(default=time(23, 59, 59))
 
@@ -109,6 +116,50 @@ class AvailabilityModel(BaseModel):
     saturday = models.BooleanField(default=True)
     sunday = models.BooleanField(default=True)
 
+    # Compact copy of the fields above, kept by save(), to evaluate many
+    # availabilities at once: bit 1 << weekday() and seconds of the day
+    weekdays_mask = models.PositiveSmallIntegerField(default=ALL_WEEKDAYS_MASK)
+    start_second = models.PositiveIntegerField(default=6 * 3600)
+    end_second = models.PositiveIntegerField(default=86399)
+
+    # Fields that define an availability
+    SCHEDULE_FIELDS = ('start_time', 'end_time', *WEEKDAYS,
+                       'weekdays_mask', 'start_second', 'end_second')
+
+    class Meta:
+        abstract = True
+
+    def build_index(self):
+        """Set weekdays_mask, start_second and end_second from the fields."""
+
+        self.weekdays_mask = get_weekdays_mask(
+            {day: getattr(self, day) for day in WEEKDAYS})
+        self.start_second = get_second_of_day(self.start_time)
+        self.end_second = get_second_of_day(self.end_time)
+
+    def get_schedule(self):
+        """
+        :return: dict with the values of SCHEDULE_FIELDS
+        """
+
+        return {field: getattr(self, field) for field in self.SCHEDULE_FIELDS}
+
+    def save(self, *args, **kwargs):
+
+        self.build_index()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields, 'weekdays_mask', 'start_second', 'end_second'}
+
+        super().save(*args, **kwargs)
+
+
+class AvailabilityModel(BaseAvailabilityModel):
+    location = models.OneToOneField(
+        LocationModel, on_delete=models.CASCADE, related_name="availability_location")
+
     def __str__(self):
         return f'{self.id}'
 
@@ -125,3 +176,31 @@ class AvailabilityModel(BaseModel):
                 f'sunday={self.sunday}, '
                 f'created_at={self.created_at}, '
                 f'updated_at={self.updated_at})')
+
+
+class GroupAvailabilityTemplateModel(BaseAvailabilityModel):
+    """
+    Availability shared by the locations of a group, new locations of the
+    group start with it and it can be applied to the existing ones.
+    """
+
+    group = models.OneToOneField(
+        GroupModel, on_delete=models.CASCADE, related_name="availability_template")
+
+    def build_availability(self, location):
+        """
+        :param location: location of the group
+        :return: unsaved AvailabilityModel with the schedule of the template
+        """
+
+        return AvailabilityModel(location=location, **self.get_schedule())
+
+    def __str__(self):
+        return f'{self.id}'
+
+    def __repr__(self):
+        return (f'GroupAvailabilityTemplateModel(id={self.id}, '
+                f'group={self.group_id}, '
+                f'start_time={self.start_time}, '
+                f'end_time={self.end_time}, '
+                f'weekdays_mask={self.weekdays_mask})')
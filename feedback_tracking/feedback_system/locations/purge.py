@@ -0,0 +1,147 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from feedback_tracking.feedback_system.feedbacks.models import FeedbackModel
+from feedback_tracking.feedback_system.permissions.models import UserLocationPermissionModel, UserGroupPermissionModel
+from feedback_tracking.feedback_system.permissions.cache import bump_permissions_versions
+from .models import LocationModel, GroupModel, AvailabilityModel, GroupAvailabilityTemplateModel
+from .kiosk_auth import forget_kiosk_auth
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+# A chunk of feedbacks of a location, their types are removed by the
+# ON DELETE CASCADE of the composite foreign key to the partitioned feedbacks
+PURGE_FEEDBACKS_SQL = '''
+    DELETE FROM {feedbacks} WHERE (id, created_at) IN (
+        SELECT id, created_at FROM {feedbacks} WHERE location_id = %s LIMIT %s
+    )
+'''.format(feedbacks=FeedbackModel._meta.db_table)
+
+PURGE_ROWS_SQL = 'DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {column} = %s LIMIT %s)'
+
+
+@transaction.atomic
+def soft_delete_locations(location_ids):
+    """
+    Mark the locations as deleted and inactive, their kiosks stop working at
+    once and their data is removed later by purge_location.
+
+    :param location_ids: ids of the locations
+    :return: number of locations marked
+    """
+
+    now = timezone.now()
+    deleted = LocationModel.objects.filter(id__in=location_ids).update(
+        deleted_at=now, is_active=False, updated_at=now)
+
+    forget_kiosk_auth(location_ids)
+
+    return deleted
+
+
+@transaction.atomic
+def soft_delete_group(group):
+    """
+    Mark a group and its locations as deleted.
+
+    :param group: GroupModel
+    :return: number of locations marked
+    """
+
+    now = timezone.now()
+    GroupModel.objects.filter(id=group.id).update(deleted_at=now, updated_at=now)
+
+    return soft_delete_locations(list(
+        LocationModel.objects.filter(group_id=group.id).values_list('id', flat=True)))
+
+
+def purge_rows(model, column: str, value, chunk_size: int):
+    """
+    Delete the rows of a model with column = value by chunks, every chunk is
+    committed on its own so the locks and the WAL of a statement stay bounded.
+
+    :param model: model of the table
+    :param column: column of the filter, e.g. location_id
+    :param value: value of the column
+    :param chunk_size: rows by statement
+    :return: number of deleted rows
+    """
+
+    sql = PURGE_ROWS_SQL.format(table=model._meta.db_table, column=column)
+    deleted = 0
+
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(sql, [value, chunk_size])
+            deleted += cursor.rowcount
+            if cursor.rowcount < chunk_size:
+                return deleted
+
+
+def purge_feedbacks(location_id: int, chunk_size: int, on_chunk=None):
+    """
+    Delete the feedbacks of a location and their types by chunks.
+
+    :param location_id: id of the location
+    :param chunk_size: feedbacks by statement
+    :param on_chunk: callable(deleted) called after every chunk
+    :return: number of deleted feedbacks
+    """
+
+    deleted = 0
+
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(PURGE_FEEDBACKS_SQL, [location_id, chunk_size])
+            count = cursor.rowcount
+            deleted += count
+
+            if on_chunk is not None:
+                on_chunk(deleted)
+
+            if count < chunk_size:
+                return deleted
+
+
+def purge_location(location_id: int, chunk_size: int, on_chunk=None):
+    """
+    Remove a soft deleted location with its feedbacks, permissions and
+    availability without loading them in memory.
+
+    :param location_id: id of the location
+    :param chunk_size: rows by statement
+    :param on_chunk: callable(deleted feedbacks) called after every chunk
+    :return: number of deleted feedbacks
+    """
+
+    deleted = purge_feedbacks(location_id, chunk_size, on_chunk)
+
+    user_ids = list(UserLocationPermissionModel.objects.filter(
+        location_id=location_id).values_list('user_id', flat=True).distinct())
+    purge_rows(UserLocationPermissionModel, 'location_id', location_id, chunk_size)
+    bump_permissions_versions(user_ids)
+
+    purge_rows(AvailabilityModel, 'location_id', location_id, chunk_size)
+    purge_rows(LocationModel, 'id', location_id, chunk_size)
+
+    return deleted
+
+
+def purge_group(group_id: int, chunk_size: int):
+    """
+    Remove a soft deleted group, its locations must be purged first.
+
+    :param group_id: id of the group
+    :param chunk_size: rows by statement
+    """
+
+    user_ids = list(UserGroupPermissionModel.objects.filter(
+        group_id=group_id).values_list('user_id', flat=True).distinct())
+    purge_rows(UserGroupPermissionModel, 'group_id', group_id, chunk_size)
+    bump_permissions_versions(user_ids)
+
+    purge_rows(GroupAvailabilityTemplateModel, 'group_id', group_id, chunk_size)
+    purge_rows(GroupModel, 'id', group_id, chunk_size)
@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LocationModel
+from .kiosk_auth import forget_kiosk_auth
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def rotate_credentials(locations, batch_size: int, on_progress=None):
+    """
+    Give new credentials to many locations. The machine numbers and signatures
+    are computed in Python and saved with one bulk_update by batch, every batch
+    is committed on its own and its kiosk credentials cache is removed.
+
+    :param locations: LocationModel queryset
+    :param batch_size: locations by batch
+    :param on_progress: callable(done, total) called after every batch
+    :return: number of rotated locations
+    """
+
+    location_ids = list(locations.order_by('id').values_list('id', flat=True))
+    total = len(location_ids)
+    done = 0
+
+    for start in range(0, total, batch_size):
+
+        batch_ids = location_ids[start:start + batch_size]
+        now = timezone.now()
+
+        with transaction.atomic():
+
+            batch = list(LocationModel.objects.filter(
+                id__in=batch_ids).select_for_update().only('id', 'name'))
+
+            for location in batch:
+                location.build_credentials()
+                location.updated_at = now
+
+            LocationModel.objects.bulk_update(
+                batch, ['machine_number', 'signature', 'updated_at'])
+            forget_kiosk_auth(batch_ids)
+
+        done += len(batch_ids)
+
+        if on_progress is not None:
+            on_progress(done, total)
+
+    return done
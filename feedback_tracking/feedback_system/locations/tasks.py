@@ -0,0 +1,149 @@
+import uuid
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from feedback_tracking.base.tenant_tasks import TenantTask
+from .models import LocationModel, GroupModel
+from .rotation import rotate_credentials
+from .purge import purge_location, purge_group
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocationJobError(Exception):
+    """
+    Failure of a background job of the locations. It is stored as the result
+    of the job with the schema, so the status is only shown to its tenant, and
+    a generic message, the real error is only logged.
+    """
+
+    def __init__(self, schema_name, msg):
+
+        super().__init__(schema_name, msg)
+        self.schema_name = schema_name
+        self.msg = msg
+
+
+@shared_task(bind=True, base=TenantTask)
+def rotate_location_credentials(self, location_ids=None, group_ids=None, batch_size=None):
+    """
+    Task to rotate the credentials of many locations of a tenant, the progress
+    is reported in the PROGRESS state with done and total.
+
+    :param location_ids: ids of the locations, every location when None
+    :param group_ids: only the locations of these groups when given
+    :param batch_size: locations by batch, LOCATION_ROTATION_BATCH_SIZE by default
+    :return: dict with the schema, done and total
+    :raises LocationJobError: if the rotation fails
+    """
+
+    schema_name = connections[DEFAULT_DB_ALIAS].schema_name
+    locations = LocationModel.objects.all()
+
+    if location_ids is not None:
+        locations = locations.filter(id__in=location_ids)
+
+    if group_ids is not None:
+        locations = locations.filter(group_id__in=group_ids)
+
+    def on_progress(done, total):
+        # Without id the task runs eagerly and there is nothing to report to
+        if self.request.id:
+            self.update_state(state='PROGRESS', meta={
+                'schema_name': schema_name, 'done': done, 'total': total})
+
+    try:
+        done = rotate_credentials(
+            locations, batch_size or settings.LOCATION_ROTATION_BATCH_SIZE, on_progress)
+    except Exception:
+        logger.exception('Credentials rotation failed in schema %s', schema_name)
+        raise LocationJobError(schema_name, 'Credentials rotation failed')
+
+    return {'schema_name': schema_name, 'done': done, 'total': done}
+
+
+@shared_task(bind=True, base=TenantTask)
+def purge_deleted_locations(self, location_ids=None, group_ids=None, chunk_size=None):
+    """
+    Task to remove the soft deleted locations and groups of a tenant with
+    their data, by chunks of raw SQL. The progress is reported in the PROGRESS
+    state with the purged locations (done, total) and the deleted feedbacks.
+    Without ids every soft deleted location and group is purged, it is also
+    run periodically to finish the purges of lost tasks.
+
+    :param location_ids: ids of soft deleted locations, optional
+    :param group_ids: ids of soft deleted groups, their locations are purged too
+    :param chunk_size: rows by statement, LOCATION_PURGE_CHUNK_SIZE by default
+    :return: dict with the schema, done, total and deleted_feedbacks
+    :raises LocationJobError: if the purge fails
+    """
+
+    schema_name = connections[DEFAULT_DB_ALIAS].schema_name
+    chunk_size = chunk_size or settings.LOCATION_PURGE_CHUNK_SIZE
+
+    groups = GroupModel.all_objects.filter(deleted_at__isnull=False)
+    locations = LocationModel.all_objects.filter(deleted_at__isnull=False)
+
+    if location_ids is not None or group_ids is not None:
+        groups = groups.filter(id__in=group_ids or [])
+        locations = locations.filter(id__in=location_ids or [])
+
+    group_ids = list(groups.values_list('id', flat=True))
+    location_ids = list(
+        (locations | LocationModel.all_objects.filter(group_id__in=group_ids))
+        .order_by('id').values_list('id', flat=True).distinct())
+
+    progress = {'schema_name': schema_name, 'done': 0,
+                'total': len(location_ids), 'deleted_feedbacks': 0}
+
+    def report(deleted_feedbacks=0):
+        # Without id the task runs eagerly and there is nothing to report to
+        if self.request.id:
+            self.update_state(state='PROGRESS', meta={
+                **progress, 'deleted_feedbacks': progress['deleted_feedbacks'] + deleted_feedbacks})
+
+    try:
+
+        for location_id in location_ids:
+            progress['deleted_feedbacks'] += purge_location(location_id, chunk_size, report)
+            progress['done'] += 1
+            report()
+
+        for group_id in group_ids:
+            purge_group(group_id, chunk_size)
+
+    except Exception:
+        logger.exception('Purge of deleted locations failed in schema %s', schema_name)
+        raise LocationJobError(schema_name, 'Purge of deleted locations failed')
+
+    return progress
+
+
+def queue_location_purge(location_ids=None, group_ids=None):
+    """
+    Queue purge_deleted_locations once the soft delete is committed.
+
+    :param location_ids: ids of soft deleted locations, optional
+    :param group_ids: ids of soft deleted groups, optional
+    :return: id of the task
+    """
+
+    task_id = str(uuid.uuid4())
+    kwargs = {
+        'location_ids': location_ids,
+        'group_ids': group_ids,
+        'schema_name': connections[DEFAULT_DB_ALIAS].schema_name,
+    }
+
+    transaction.on_commit(
+        lambda: purge_deleted_locations.apply_async(kwargs=kwargs, task_id=task_id))
+
+    return task_id
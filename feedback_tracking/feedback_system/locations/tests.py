@@ -1,3 +1,96 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from feedback_tracking.base.test_cases import OrganizationTestCase
+from .availability import ALL_WEEKDAYS_MASK, WEEKDAYS, filter_open_at, get_second_of_day, get_weekdays_mask, is_open_on
+from .models import AvailabilityModel, GroupModel, LocationModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+# A Monday and a Saturday
+MONDAY_NOON = datetime.datetime(2026, 10, 19, 12, 0, tzinfo=datetime.timezone.utc)
+SATURDAY_NOON = datetime.datetime(2026, 10, 24, 12, 0, tzinfo=datetime.timezone.utc)
+
+
+class WeekdaysMaskTests(SimpleTestCase):
+
+    def test_every_day(self):
+
+        self.assertEqual(get_weekdays_mask({day: True for day in WEEKDAYS}), ALL_WEEKDAYS_MASK)
+
+    def test_no_day(self):
+
+        self.assertEqual(get_weekdays_mask({day: False for day in WEEKDAYS}), 0)
+        self.assertEqual(get_weekdays_mask({}), 0)
+
+    def test_bit_by_weekday(self):
+
+        self.assertEqual(get_weekdays_mask({'monday': True}), 0b0000001)
+        self.assertEqual(get_weekdays_mask({'sunday': True}), 0b1000000)
+        self.assertEqual(get_weekdays_mask({'monday': True, 'saturday': True, 'sunday': False}), 0b0100001)
+
+    def test_is_open_on(self):
+
+        mask = get_weekdays_mask({'monday': True})
+
+        self.assertTrue(is_open_on(mask, MONDAY_NOON))
+        self.assertFalse(is_open_on(mask, SATURDAY_NOON))
+
+    def test_get_second_of_day(self):
+
+        self.assertEqual(get_second_of_day(datetime.time(0, 0)), 0)
+        self.assertEqual(get_second_of_day(datetime.time(23, 59, 59)), 86399)
+        self.assertEqual(get_second_of_day(MONDAY_NOON), 12 * 3600)
+
+
+class FilterOpenAtTests(OrganizationTestCase):
+
+    def setUp(self):
+
+        group = GroupModel.objects.create(name='Group', description='Group')
+
+        self.weekdays = self.create_location(group, 'Weekdays', saturday=False, sunday=False)
+        self.mornings = self.create_location(group, 'Mornings', end_time=datetime.time(11, 0))
+        self.every_day = self.create_location(group, 'Every day')
+
+    def create_location(self, group, name, **schedule):
+
+        location = LocationModel.objects.create(name=name, group=group)
+        AvailabilityModel.objects.create(location=location, **schedule)
+
+        return location
+
+    def get_open_ids(self, queryset, at, prefix=''):
+
+        return set(filter_open_at(queryset, at, prefix).values_list('id', flat=True))
+
+    def test_open_availabilities(self):
+
+        availabilities = AvailabilityModel.objects.all()
+
+        self.assertEqual(
+            self.get_open_ids(availabilities, MONDAY_NOON),
+            {self.weekdays.availability_location.id, self.every_day.availability_location.id}
+        )
+
+    def test_open_locations_by_weekday(self):
+
+        locations = LocationModel.objects.all()
+
+        self.assertEqual(self.get_open_ids(locations, MONDAY_NOON, 'availability_location__'),
+                         {self.weekdays.id, self.every_day.id})
+        self.assertEqual(self.get_open_ids(locations, SATURDAY_NOON, 'availability_location__'),
+                         {self.every_day.id})
+
+    def test_open_locations_by_time(self):
+
+        locations = LocationModel.objects.all()
+
+        self.assertEqual(self.get_open_ids(locations, MONDAY_NOON.replace(hour=7), 'availability_location__'),
+                         {self.weekdays.id, self.mornings.id, self.every_day.id})
+        self.assertEqual(self.get_open_ids(locations, MONDAY_NOON.replace(hour=5), 'availability_location__'),
+                         set())
@@ -0,0 +1,101 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from feedback_tracking.base.cache import is_shared_cache
+from .models import UserLocationPermissionModel, UserGroupPermissionModel
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+def get_permissions_version_key(schema_name: str, user_id: int):
+    """
+    :param schema_name: schema of the tenant
+    :param user_id: id of the user
+    :return: cache key of the version of the user permissions
+    """
+
+    return f'permissions:version:{schema_name}:{user_id}'
+
+
+def get_permissions_version(schema_name: str, user_id: int):
+    """
+    :param schema_name: schema of the tenant
+    :param user_id: id of the user
+    :return: version of the user permissions
+    """
+
+    return cache.get_or_set(get_permissions_version_key(schema_name, user_id), 1, None)
+
+
+def bump_permissions_versions(user_ids):
+    """
+    Invalidate the cached permissions of the users once the transaction that
+    changed them is committed, the entries of the old versions expire alone.
+
+    :param user_ids: ids of the users whose permissions changed
+    """
+
+    schema_name = connections[DEFAULT_DB_ALIAS].schema_name
+    keys = [get_permissions_version_key(schema_name, user_id) for user_id in set(user_ids)]
+
+    def bump():
+        for key in keys:
+            # incr is atomic, two changes at once can not end in the same version
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, 2, None)
+
+    transaction.on_commit(bump)
+
+
+def get_granted_ids(user, model, field: str):
+    """
+    Get the ids of the granted permissions of a user, they are cached by
+    version of the user permissions. They are only cached when the cache is
+    shared, a version bumped in a process must reach the others or revoked
+    permissions would still be granted.
+
+    :param user: user of the permissions
+    :param model: UserLocationPermissionModel or UserGroupPermissionModel
+    :param field: foreign key of the permission, e.g. location
+    :return: frozenset of ids
+    """
+
+    granted = model.objects.filter(user=user, has_permission=True).values_list(f'{field}_id', flat=True)
+
+    if not is_shared_cache():
+        return frozenset(granted)
+
+    schema_name = connections[DEFAULT_DB_ALIAS].schema_name
+    version = get_permissions_version(schema_name, user.id)
+    key = f'permissions:{field}:{schema_name}:{user.id}:{version}'
+
+    granted_ids = cache.get(key)
+
+    if granted_ids is None:
+        granted_ids = frozenset(granted)
+        cache.set(key, granted_ids, settings.PERMISSIONS_CACHE_SECONDS)
+
+    return granted_ids
+
+
+def get_granted_location_ids(user):
+    """
+    :param user: user of the permissions
+    :return: frozenset of the granted location ids
+    """
+
+    return get_granted_ids(user, UserLocationPermissionModel, 'location')
+
+
+def get_granted_group_ids(user):
+    """
+    :param user: user of the permissions
+    :return: frozenset of the granted group ids
+    """
+
+    return get_granted_ids(user, UserGroupPermissionModel, 'group')
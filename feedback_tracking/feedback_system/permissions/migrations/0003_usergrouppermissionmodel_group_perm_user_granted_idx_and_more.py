@@ -0,0 +1,27 @@
+# Generated by Django 5.1.14 on 2026-10-18 22:26
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('feedback_system_permissions', '0002_initial'),
+        ('locations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='usergrouppermissionmodel',
+            index=models.Index(condition=models.Q(('has_permission', True)), fields=['user', 'group'], name='group_perm_user_granted_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userlocationpermissionmodel',
+            index=models.Index(fields=['user', 'has_permission', 'location'], name='location_perm_user_idx'),
+        ),
+    ]
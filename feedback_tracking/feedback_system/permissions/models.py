@@ -14,6 +14,13 @@ class UserGroupPermissionModel(BaseModel):
                               on_delete=models.CASCADE, related_name='group_permissions')
     has_permission = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Only the granted rows are ever read
+            models.Index(name='group_perm_user_granted_idx', fields=['user', 'group'],
+                         condition=models.Q(has_permission=True)),
+        ]
+
     def __str__(self):
         return f"{self.id}"
 
@@ -28,6 +35,12 @@ class UserLocationPermissionModel(BaseModel):
         'locations.LocationModel', on_delete=models.CASCADE, related_name='location_permissions')
     has_permission = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(name='location_perm_user_idx',
+                         fields=['user', 'has_permission', 'location']),
+        ]
+
     def __str__(self):
         return f"{self.id}"
 
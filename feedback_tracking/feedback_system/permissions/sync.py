@@ -0,0 +1,144 @@
+from django.db import transaction
+
+from .models import UserLocationPermissionModel, UserGroupPermissionModel
+from .cache import bump_permissions_versions
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+@transaction.atomic
+def sync_permissions(model, user, field: str, wanted_ids):
+    """
+    Leave a user with exactly the granted permissions of wanted_ids.
+
+    The existing rows are read in one query and compared as sets, the missing
+    ones are created with one bulk_create, the ones not wanted are removed with
+    one delete and the denied ones that are wanted again are granted with one
+    update, so the number of queries does not depend on the number of ids.
+
+    :param model: UserLocationPermissionModel or UserGroupPermissionModel
+    :param user: user of the permissions
+    :param field: foreign key of the permission, e.g. location
+    :param wanted_ids: ids that the user must have
+    :return: tuple (added ids, removed ids)
+    """
+
+    wanted_ids = set(wanted_ids)
+    existing = {}
+
+    for permission_id, related_id, has_permission in model.objects.filter(user=user).values_list(
+            'id', f'{field}_id', 'has_permission'):
+        existing.setdefault(related_id, []).append((permission_id, has_permission))
+
+    added_ids = wanted_ids - existing.keys()
+    removed_ids = existing.keys() - wanted_ids
+    denied_ids = [
+        permission_id
+        for related_id in wanted_ids & existing.keys()
+        for permission_id, has_permission in existing[related_id]
+        if not has_permission
+    ]
+
+    if removed_ids:
+        model.objects.filter(user=user, **{f'{field}_id__in': removed_ids}).delete()
+
+    if denied_ids:
+        model.objects.filter(id__in=denied_ids).update(has_permission=True)
+
+    if added_ids:
+        model.objects.bulk_create([
+            model(user=user, has_permission=True, **{f'{field}_id': related_id})
+            for related_id in added_ids
+        ])
+
+    if added_ids or removed_ids or denied_ids:
+        bump_permissions_versions([user.id])
+
+    return added_ids, removed_ids
+
+
+@transaction.atomic
+def bulk_assign_permissions(model, field: str, user_ids, related_ids):
+    """
+    Grant the permissions of related_ids to every user, the existing pairs are
+    read in one query, the missing ones are created with one bulk_create and
+    the denied ones are granted with one update.
+
+    :param model: UserLocationPermissionModel or UserGroupPermissionModel
+    :param field: foreign key of the permission, e.g. location
+    :param user_ids: ids of the users
+    :param related_ids: ids of the locations or groups
+    :return: tuple (created permissions, granted permissions)
+    """
+
+    user_ids = set(user_ids)
+    related_ids = set(related_ids)
+    existing = set()
+    denied_ids = []
+
+    for permission_id, user_id, related_id, has_permission in model.objects.filter(
+            user_id__in=user_ids, **{f'{field}_id__in': related_ids}).values_list(
+            'id', 'user_id', f'{field}_id', 'has_permission'):
+
+        existing.add((user_id, related_id))
+
+        if not has_permission:
+            denied_ids.append(permission_id)
+
+    permissions = [
+        model(user_id=user_id, has_permission=True, **{f'{field}_id': related_id})
+        for user_id in user_ids
+        for related_id in related_ids
+        if (user_id, related_id) not in existing
+    ]
+
+    model.objects.bulk_create(permissions, batch_size=1000)
+
+    if denied_ids:
+        model.objects.filter(id__in=denied_ids).update(has_permission=True)
+
+    bump_permissions_versions(user_ids)
+
+    return len(permissions), len(denied_ids)
+
+
+@transaction.atomic
+def bulk_revoke_permissions(model, field: str, user_ids, related_ids):
+    """
+    Remove the permissions of related_ids from every user with one delete.
+
+    :param model: UserLocationPermissionModel or UserGroupPermissionModel
+    :param field: foreign key of the permission, e.g. location
+    :param user_ids: ids of the users
+    :param related_ids: ids of the locations or groups
+    :return: number of removed permissions
+    """
+
+    removed, _ = model.objects.filter(
+        user_id__in=set(user_ids), **{f'{field}_id__in': set(related_ids)}).delete()
+
+    bump_permissions_versions(user_ids)
+
+    return removed
+
+
+def sync_location_permissions(user, location_ids):
+    """
+    :param user: user of the permissions
+    :param location_ids: locations the user must have
+    :return: tuple (added ids, removed ids)
+    """
+
+    return sync_permissions(UserLocationPermissionModel, user, 'location', location_ids)
+
+
+def sync_group_permissions(user, group_ids):
+    """
+    :param user: user of the permissions
+    :param group_ids: groups the user must have
+    :return: tuple (added ids, removed ids)
+    """
+
+    return sync_permissions(UserGroupPermissionModel, user, 'group', group_ids)
@@ -1,3 +1,92 @@
-from django.test import TestCase
+from feedback_tracking.base.test_cases import OrganizationTestCase, QueryPlanMixin
+from feedback_tracking.administrative_system.users.models import UserModel
+from feedback_tracking.feedback_system.locations.models import GroupModel
+from feedback_tracking.feedback_system.permissions.models import UserGroupPermissionModel, UserLocationPermissionModel
+from feedback_tracking.feedback_system.permissions.sync import sync_permissions
 
-# Create your tests here.
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+class PermissionQueryPlanTests(QueryPlanMixin, OrganizationTestCase):
+
+    def test_granted_group_permissions_of_a_user(self):
+
+        self.assertUsesIndex(
+            UserGroupPermissionModel.objects.filter(
+                user_id=1, has_permission=True).values_list('group_id', flat=True),
+            'group_perm_user_granted_idx'
+        )
+
+    def test_location_permissions_of_a_user(self):
+
+        self.assertUsesIndex(
+            UserLocationPermissionModel.objects.filter(
+                user_id=1, has_permission=True).values_list('location_id', flat=True),
+            'location_perm_user_idx'
+        )
+
+
+class SyncPermissionsTests(OrganizationTestCase):
+
+    def setUp(self):
+
+        self.user = UserModel.objects.create(
+            first_name='Ana', middle_name='Maria', last_name='Lopez', username='alopez', email='alopez@test.com')
+        self.groups = [GroupModel.objects.create(name=f'Group {index}', description='Group') for index in range(4)]
+        self.group_ids = [group.id for group in self.groups]
+
+    def get_granted_ids(self):
+
+        return set(UserGroupPermissionModel.objects.filter(
+            user=self.user, has_permission=True).values_list('group_id', flat=True))
+
+    def test_adds_missing_permissions(self):
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            added, removed = sync_permissions(UserGroupPermissionModel, self.user, 'group', self.group_ids[:2])
+
+        self.assertEqual(added, set(self.group_ids[:2]))
+        self.assertEqual(removed, set())
+        self.assertEqual(self.get_granted_ids(), set(self.group_ids[:2]))
+        self.assertEqual(len(callbacks), 1)
+
+    def test_removes_unwanted_permissions(self):
+
+        sync_permissions(UserGroupPermissionModel, self.user, 'group', self.group_ids[:3])
+
+        added, removed = sync_permissions(UserGroupPermissionModel, self.user, 'group', self.group_ids[2:])
+
+        self.assertEqual(added, {self.group_ids[3]})
+        self.assertEqual(removed, set(self.group_ids[:2]))
+        self.assertEqual(self.get_granted_ids(), set(self.group_ids[2:]))
+
+    def test_grants_denied_permissions(self):
+
+        UserGroupPermissionModel.objects.create(user=self.user, group=self.groups[0], has_permission=False)
+
+        added, removed = sync_permissions(UserGroupPermissionModel, self.user, 'group', self.group_ids[:1])
+
+        self.assertEqual(added, set())
+        self.assertEqual(removed, set())
+        self.assertEqual(self.get_granted_ids(), set(self.group_ids[:1]))
+        self.assertEqual(UserGroupPermissionModel.objects.filter(user=self.user).count(), 1)
+
+    def test_unchanged_permissions(self):
+
+        sync_permissions(UserGroupPermissionModel, self.user, 'group', self.group_ids)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            added, removed = sync_permissions(UserGroupPermissionModel, self.user, 'group', self.group_ids)
+
+        self.assertEqual((added, removed), (set(), set()))
+        self.assertEqual(callbacks, [])
+
+    def test_empty_removes_everything(self):
+
+        sync_permissions(UserGroupPermissionModel, self.user, 'group', self.group_ids)
+
+        sync_permissions(UserGroupPermissionModel, self.user, 'group', [])
+
+        self.assertFalse(UserGroupPermissionModel.objects.filter(user=self.user).exists())
@@ -0,0 +1,221 @@
+import os
+import re
+import time
+import logging
+import threading
+
+import stripe
+
+
+__author__ = 'Ricardo'
+__version__ = '0.1'
+
+
+logger = logging.getLogger(__name__)
+
+
+# Path segments like cus_NffrFeUfNV2Hib or cs_test_a1B2c3 are object ids
+STRIPE_ID_SEGMENT = re.compile(
+    r'^[a-z]+(_[a-z]+)?_(?=[A-Za-z0-9]*[A-Z0-9])[A-Za-z0-9]{8,}$')
+
+
+def get_endpoint(method: str, url: str):
+    """
+    Get the endpoint of a request without the object ids, so the metrics of
+    every customer are grouped together.
+
+    :param method: HTTP method
+    :param url: url of the request
+    :return: endpoint, e.g. GET /v1/customers/{id}
+    """
+
+    path = url.split('://', 1)[-1].split('?', 1)[0]
+    path = path[path.find('/'):] if '/' in path else '/'
+
+    segments = ['{id}' if STRIPE_ID_SEGMENT.match(segment) else segment
+                for segment in path.split('/')]
+
+    return f'{method.upper()} {"/".join(segments)}'
+
+
+class StripeCircuitBreaker():
+    """
+    Stop calling Stripe after consecutive failures.
+
+    The circuit opens after failure_threshold failures in a row, every call is
+    rejected while it is open and after reset_seconds a single trial call is
+    let through (half-open), the circuit closes again if it succeeds.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_seconds: int):
+
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.__lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        :return: True if the call can be done
+        """
+
+        with self.__lock:
+
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                return True
+
+            return False
+
+    def record_success(self):
+
+        with self.__lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+
+        with self.__lock:
+
+            self.failures += 1
+
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+
+                if self.state != self.OPEN:
+                    logger.warning('Stripe circuit opened after %s failures',
+                                   self.failures)
+
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+
+        with self.__lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_seconds': self.reset_seconds,
+            }
+
+
+class StripeMetrics():
+    """
+    Latency and error counters by endpoint of the current process.
+    """
+
+    def __init__(self):
+
+        self.__endpoints = {}
+        self.__lock = threading.Lock()
+
+    def record(self, endpoint: str, duration_ms: float, failed: bool):
+
+        with self.__lock:
+
+            metrics = self.__endpoints.setdefault(endpoint, {
+                'calls': 0,
+                'errors': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+            })
+
+            metrics['calls'] += 1
+            metrics['errors'] += int(failed)
+            metrics['total_ms'] += duration_ms
+            metrics['max_ms'] = max(metrics['max_ms'], duration_ms)
+
+    def stats(self):
+
+        with self.__lock:
+            return {
+                endpoint: {
+                    'calls': metrics['calls'],
+                    'errors': metrics['errors'],
+                    'avg_ms': round(metrics['total_ms'] / metrics['calls'], 2),
+                    'max_ms': round(metrics['max_ms'], 2),
+                }
+                for endpoint, metrics in self.__endpoints.items()
+            }
+
+    def reset(self):
+
+        with self.__lock:
+            self.__endpoints.clear()
+
+
+class InstrumentedRequestsClient(stripe.RequestsClient):
+    """
+    HTTP client of the Stripe library with a circuit breaker and metrics.
+
+    Every thread keeps its own requests session, so connections to Stripe are
+    kept alive between calls. Retries are done by the Stripe library around
+    request(), with jittered exponential backoff and an idempotency key on
+    POST calls, so every attempt is measured and counted by the breaker.
+    """
+
+    name = 'instrumented_requests'
+
+    def __init__(self, circuit_breaker: StripeCircuitBreaker, metrics: StripeMetrics, **kwargs):
+
+        super().__init__(**kwargs)
+        self.circuit_breaker = circuit_breaker
+        self.metrics = metrics
+
+    def request(self, method, url, headers, post_data=None):
+
+        endpoint = get_endpoint(method, url)
+
+        if not self.circuit_breaker.allow_request():
+            self.metrics.record(endpoint, 0, True)
+            raise stripe.APIConnectionError(
+                'Stripe circuit is open, the call was not done.', should_retry=False)
+
+        start = time.perf_counter()
+
+        try:
+            response = super().request(method, url, headers, post_data)
+        except stripe.APIConnectionError:
+            self.metrics.record(
+                endpoint, (time.perf_counter() - start) * 1000, True)
+            self.circuit_breaker.record_failure()
+            raise
+
+        status_code = response[1]
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        # Errors of the request (4xx) do not mean Stripe is unavailable
+        unavailable = status_code >= 500 or status_code == 429
+
+        self.metrics.record(endpoint, duration_ms, status_code >= 400)
+
+        if unavailable:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+        logger.debug('Stripe %s -> %s in %.1f ms',
+                     endpoint, status_code, duration_ms)
+
+        return response
+
+    def stats(self):
+        """
+        :return: metrics of the client in the current process
+        """
+
+        return {
+            'pid': os.getpid(),
+            'circuit': self.circuit_breaker.stats(),
+            'endpoints': self.metrics.stats(),
+        }
@@ -2,6 +2,8 @@ from django.conf import settings
 
 import stripe
 
+from .stripe_http_client import InstrumentedRequestsClient, StripeCircuitBreaker, StripeMetrics
+
 
 __author__ = 'Ricardo'
 __version__ = '0.1'
@@ -14,11 +16,26 @@ class StripeSingleton():
     @classmethod
     def __get_connection(self):
         """
-        This method create our client
+        This method create our client, every call to Stripe goes through the
+        instrumented HTTP client configured here
         """
 
         stripe.api_key = settings.STRIPE_SECRET_KEY
 
+        if settings.STRIPE_API_BASE:
+            stripe.api_base = settings.STRIPE_API_BASE
+
+        stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+        stripe.default_http_client = InstrumentedRequestsClient(
+            circuit_breaker=StripeCircuitBreaker(
+                failure_threshold=settings.STRIPE_CIRCUIT_FAILURE_THRESHOLD,
+                reset_seconds=settings.STRIPE_CIRCUIT_RESET_SECONDS,
+            ),
+            metrics=StripeMetrics(),
+            timeout=(settings.STRIPE_CONNECT_TIMEOUT,
+                     settings.STRIPE_READ_TIMEOUT),
+        )
+
         return stripe
 
     def __new__(cls, *args, **kwargs):
@@ -29,3 +46,13 @@ class StripeSingleton():
             cls.__client = cls.__get_connection()
 
         return cls.__client
+
+    @classmethod
+    def stats(cls):
+        """
+        Get the metrics of the Stripe client of the current process
+
+        :return: dict with the circuit state and the metrics by endpoint
+        """
+
+        return cls().default_http_client.stats()